@@ -1,11 +1,48 @@
 from __future__ import annotations
 
-from ._config import load_config
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from ._version import version as __version__
 from .glossary import GLOSSARY
 
+if TYPE_CHECKING:
+    from . import fs, health, units, user
+    from ._config import DiceConfig, load_config, load_config_view
+
+# public names and subpackages, imported when first used to keep ``import dice_lib`` fast
+_LAZY = {
+    "DiceConfig": "._config",
+    "load_config": "._config",
+    "load_config_view": "._config",
+    "fs": ".fs",
+    "health": ".health",
+    "units": ".units",
+    "user": ".user",
+}
+
 __all__ = (
     "__version__",
+    "DiceConfig",
     "GLOSSARY",
+    "fs",
+    "health",
     "load_config",
+    "load_config_view",
+    "units",
+    "user",
 )
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    module = importlib.import_module(_LAZY[name], __name__)
+    value = module if module.__name__ == f"{__name__}.{name}" else getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import hashlib
+import pickle
+import tempfile
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
-from omegaconf import OmegaConf
+from .logger import log
 
 DEFAULT_DICE_CONFIG_PATH = "/etc/dice/config.yaml"
+# bumped whenever the config dataclasses change, invalidating on-disk caches
+CACHE_FORMAT = 1
 
 
 class ServerStatus(Enum):
@@ -21,7 +26,7 @@ class ServerStatus(Enum):
     DECOMMISSIONING = "decommissioning"
 
 
-@dataclass
+@dataclass(frozen=True)
 class ComputingElement:
     """DICE computing element config structure"""
 
@@ -30,7 +35,7 @@ class ComputingElement:
     type: str
 
 
-@dataclass
+@dataclass(frozen=True)
 class StorageElement:
     """DICE storage element config structure"""
 
@@ -41,7 +46,7 @@ class StorageElement:
     root_dir: str
 
 
-@dataclass
+@dataclass(frozen=True)
 class ComputingGrid:
     """DICE WLCG config structure"""
 
@@ -52,19 +57,19 @@ class ComputingGrid:
     fts_servers: list[str]
 
 
-@dataclass
+@dataclass(frozen=True)
 class Storage:
     """DICE storage config structure. Refers to a storage type, e.g. HDFS, NFS, etc."""
 
     mounts: list[str]
-    binaries: dict[str, str] | None
-    env: dict[str, str] | None
-    extras: dict[str, Any] | None
+    binaries: dict[str, str] | None = None
+    env: dict[str, str] | None = None
+    extras: dict[str, Any] | None = None
     protocol: str | None = "file://"
     remove_mount_for_native_access: bool | None = False
 
 
-@dataclass
+@dataclass(frozen=True)
 class LoginNode:
     """DICE login node config structure"""
 
@@ -73,7 +78,7 @@ class LoginNode:
     group: str
 
 
-@dataclass
+@dataclass(frozen=True)
 class DiceConfig:
     """DICE config file structure"""
 
@@ -87,12 +92,112 @@ class DiceConfig:
     node_info: dict[str, Any]
 
 
-def load_config(config_file: str = DEFAULT_DICE_CONFIG_PATH) -> Any:
-    """Loads the DICE config file and returns a structured OmegaConf object"""
-    path = Path(config_file)
-    if not path.exists():
-        msg = f"DICE config, {config_file}, does not exist. Please contact dice-admin"
-        raise FileNotFoundError(msg)
+# (kind, resolved path) -> (file signature, loaded config)
+_CACHE: dict[tuple[str, str], tuple[tuple[int, int], Any]] = {}
+
+
+def _signature(path: Path) -> tuple[int, int]:
+    """(mtime, size) of the config file, which change whenever it is edited."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        msg = f"DICE config, {path}, does not exist. Please contact dice-admin"
+        raise FileNotFoundError(msg) from None
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached(kind: str, path: Path, load: Callable[[], Any]) -> Any:
+    key = (kind, str(path.resolve()))
+    signature = _signature(path)
+    entry = _CACHE.get(key)
+    if entry is None or entry[0] != signature:
+        entry = _CACHE[key] = (signature, load())
+    return entry[1]
+
+
+def _load_omegaconf(path: Path) -> Any:
+    # omegaconf takes a while to import and is not needed for cached views
+    from omegaconf import OmegaConf
+
     schema = OmegaConf.structured(DiceConfig)
     conf = OmegaConf.load(path)
     return OmegaConf.merge(schema, conf)
+
+
+def load_config(
+    config_file: str = DEFAULT_DICE_CONFIG_PATH, use_cache: bool = True
+) -> Any:
+    """
+    Loads the DICE config file and returns a structured OmegaConf object.
+    The result is read-only, the dataclasses of the schema being frozen, and shared by
+    all callers in the process until the file's mtime or size changes. With
+    ``use_cache=False`` the file is parsed again, e.g. to pick up an edit made within
+    the mtime resolution; that result is read-only as well.
+    """
+    path = Path(config_file)
+    if not use_cache:
+        _signature(path)
+        return _load_omegaconf(path)
+    return _cached("omegaconf", path, lambda: _load_omegaconf(path))
+
+
+def _disk_cache_path(cache_dir: str | Path, path: Path) -> Path:
+    digest = hashlib.sha1(str(path.resolve()).encode()).hexdigest()
+    return Path(cache_dir) / f"dice-config-{digest}.pickle"
+
+
+def _to_view(path: Path) -> DiceConfig:
+    from omegaconf import OmegaConf
+
+    return OmegaConf.to_object(load_config(str(path)))  # type: ignore[return-value]
+
+
+def _load_view(path: Path, cache_dir: str | Path | None) -> DiceConfig:
+    if cache_dir is None:
+        return _to_view(path)
+    cache_file = _disk_cache_path(cache_dir, path)
+    key = (CACHE_FORMAT, str(path.resolve()), _signature(path))
+    try:
+        with cache_file.open("rb") as f:
+            cached_key, view = pickle.load(f)
+        if cached_key == key and isinstance(view, DiceConfig):
+            return view
+    except FileNotFoundError:
+        pass
+    except Exception as e:  # pylint: disable=broad-except
+        log.debug("Ignoring unreadable config cache %s: %s", cache_file, e)
+    view = _to_view(path)
+    try:
+        Path(cache_dir).mkdir(parents=True, exist_ok=True)
+        # written to a temporary file first, so readers never see a partial cache
+        with tempfile.NamedTemporaryFile(
+            dir=cache_dir, prefix=".dice-config-", delete=False
+        ) as tmp:
+            pickle.dump((key, view), tmp, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            Path(tmp.name).replace(cache_file)
+        except OSError:
+            Path(tmp.name).unlink()
+            raise
+    except OSError as e:
+        log.debug("Could not write config cache %s: %s", cache_file, e)
+    return view
+
+
+def load_config_view(
+    config_file: str = DEFAULT_DICE_CONFIG_PATH, cache_dir: str | Path | None = None
+) -> DiceConfig:
+    """
+    Returns the DICE config as frozen ``DiceConfig`` dataclasses, which are much faster to
+    read than OmegaConf nodes. It is cached in the process like ``load_config``. With
+    ``cache_dir`` it is also stored there as a pickle, so that new processes skip the
+    YAML parsing as long as the config file is unchanged. Only use directories that
+    nobody else can write to.
+    """
+    path = Path(config_file)
+    return _cached("view", path, lambda: _load_view(path, cache_dir))  # type: ignore[no-any-return]
+
+
+def clear_config_cache() -> None:
+    """Forgets all configs loaded in this process."""
+    _CACHE.clear()
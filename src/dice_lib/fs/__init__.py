@@ -1,46 +1,128 @@
 from __future__ import annotations
 
+import importlib
+import queue
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Dict
-
-from .._config import DEFAULT_DICE_CONFIG_PATH, load_config
-from ._base import FileSystem
-from ._davix import DavixFileSystem
-from ._gridftp import GridFTPFileSystem
-from ._hdfs import HDFS
-from ._posix import PosixFileSystem
-from ._s3 import S3FileSystem
-from ._xrootd import XrootDFileSystem
-
-FACTORIES: dict[str, type[FileSystem]] = {
-    # "davs://": DavixFileSystem,
-    "hdfs://": HDFS,
-    # "gsiftp://": GridFTPFileSystem,
-    "file://": PosixFileSystem,
-    # "s3://": S3FileSystem,
-    # "root://": XrootDFileSystem,
-    "Default": PosixFileSystem,
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Mapping,
+    TypeVar,
+)
+
+from .._config import DEFAULT_DICE_CONFIG_PATH
+from ._base import DEFAULT_CHUNK_SIZE, FileSystem, LsFormat, size_tuples
+from ._cache import CachedFileSystem, MetadataCache
+from ._checksum import DEFAULT_ALGORITHM, ChecksumCache
+from ._progress import Progress, ProgressCallback
+from ._transfer import DEFAULT_BUFFERS, DEFAULT_MAX_TRANSFERS, transfer
+from ._usage_index import UpdateStats, UsageIndex
+
+if TYPE_CHECKING:
+    from ._async import AsyncFSClient
+    from ._davix import DavixFileSystem
+    from ._gridftp import GridFTPFileSystem
+    from ._hdfs import HDFS, namespace_report
+    from ._posix import PosixFileSystem
+    from ._s3 import S3FileSystem
+    from ._xrootd import XrootDFileSystem
+
+# public names from modules that pull in heavy dependencies (pyhdfs, plumbum, boto3,
+# requests, ...), imported when first used
+_LAZY = {
+    "AsyncFSClient": "._async",
+    "DavixFileSystem": "._davix",
+    "GridFTPFileSystem": "._gridftp",
+    "HDFS": "._hdfs",
+    "namespace_report": "._hdfs",
+    "PosixFileSystem": "._posix",
+    "S3FileSystem": "._s3",
+    "XrootDFileSystem": "._xrootd",
 }
 
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
+
+
+class _Factories(Mapping[str, type[FileSystem]]):
+    """Filesystem classes by protocol, each backend is imported on first lookup."""
+
+    def __init__(self, names: dict[str, str]) -> None:
+        self._names = names
+
+    def __getitem__(self, protocol: str) -> type[FileSystem]:
+        factory: type[FileSystem] = __getattr__(self._names[protocol])
+        return factory
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+FACTORIES: Mapping[str, type[FileSystem]] = _Factories(
+    {
+        "davs://": "DavixFileSystem",
+        "hdfs://": "HDFS",
+        # "gsiftp://": "GridFTPFileSystem",
+        "file://": "PosixFileSystem",
+        "s3://": "S3FileSystem",
+        # "root://": "XrootDFileSystem",
+        "Default": "PosixFileSystem",
+    }
+)
+
 MountSettings = Dict[str, Any]
+T = TypeVar("T")
 
 __all__ = [
+    "AsyncFSClient",
+    "ChecksumCache",
     "FileSystem",
     "DavixFileSystem",
     "HDFS",
+    "MetadataCache",
     "GridFTPFileSystem",
+    "MountIndex",
+    "LsFormat",
     "PosixFileSystem",
+    "Progress",
     "S3FileSystem",
+    "UsageIndex",
     "XrootDFileSystem",
+    "namespace_report",
 ]
 
 
+def _deduce_protocol(path: str | Path) -> str:
+    """Deduce the FACTORIES key for a path."""
+    for prefix in FACTORIES:
+        if str(path).startswith(prefix):
+            return prefix
+    return "Default"
+
+
 def _deduce_fs_from_path(path: str | Path) -> FileSystem:
     """Deduce the filesystem from the path."""
-    for prefix, factory in FACTORIES.items():
-        if str(path).startswith(prefix):
-            return factory()
-    return FACTORIES["Default"]()
+    return FACTORIES[_deduce_protocol(path)]()
 
 
 def get_mount_settings_from_config(config: dict[str, Any]) -> MountSettings:
@@ -65,26 +147,67 @@ def get_mount_settings_from_config(config: dict[str, Any]) -> MountSettings:
     return mount_settings
 
 
-def prepare_paths(paths: list[str], mount_settings: MountSettings) -> list[str]:
+class MountIndex:
+    """
+    Longest-prefix matcher from paths to mount points, built once from MountSettings.
+    Mounts only match on path-component boundaries, i.e. ``/users`` matches ``/users/x`` but
+    not ``/usersc/x``. Resolving a path costs one dictionary lookup per path component.
+    """
+
+    def __init__(self, mount_settings: MountSettings) -> None:
+        self._mounts = {
+            mount.rstrip("/"): settings
+            for mount, settings in mount_settings.items()
+            if mount.rstrip("/")
+        }
+        self._max_length = max((len(mount) for mount in self._mounts), default=0)
+
+    def match(self, path: str) -> tuple[str, dict[str, Any]] | None:
+        """Returns (mount, settings) for the longest mount containing the path, if any."""
+        if not path.startswith("/"):
+            return None
+        end = len(path)
+        if end > self._max_length:
+            # longest candidate that could be a mount and ends on a component boundary
+            end = path.rfind("/", 0, self._max_length + 1)
+        while end > 0:
+            candidate = path[:end]
+            settings = self._mounts.get(candidate)
+            if settings is not None:
+                return candidate, settings
+            end = path.rfind("/", 0, end)
+        return None
+
+    def resolve(self, path: str) -> str:
+        """Prepares a single path, see ``prepare_paths``."""
+        path = path.rstrip("/")
+        match = self.match(path)
+        if match is None:
+            return path
+        mount, settings = match
+        protocol = str(settings.get("protocol", "file://"))
+        if settings.get("remove_mount_for_native_access", False):
+            path = path[len(mount) :] or "/"
+        return protocol + path
+
+    def prepare(self, paths: list[str]) -> list[str]:
+        """Prepares a batch of paths, see ``prepare_paths``."""
+        resolve = self.resolve
+        return [resolve(path) for path in paths]
+
+
+def prepare_paths(
+    paths: list[str], mount_settings: MountSettings | MountIndex
+) -> list[str]:
     """
     1. Remove trailing slashes from paths
-    2. lookup file system mounts
+    2. lookup file system mounts (longest matching mount wins)
     3. Replace protocols (e.g. /hdfs/<path> --> hdfs://<path>)
     4. If no protocol is specified, assume local filesystem
     """
-    processed_paths = [path.rstrip("/") for path in paths]
-    for mount, settings in mount_settings.items():
-        for path in processed_paths:
-            processed_path = path
-            if path.startswith(mount):
-                protocol = settings.get("protocol", "file://")
-                remove_mount_for_native_access = settings.get(
-                    "remove_mount_for_native_access", False
-                )
-                if remove_mount_for_native_access:
-                    processed_path = path[len(mount) :]
-                processed_paths[processed_paths.index(path)] = protocol + processed_path
-    return processed_paths
+    if not isinstance(mount_settings, MountIndex):
+        mount_settings = MountIndex(mount_settings)
+    return mount_settings.prepare(paths)
 
 
 class FSClient:
@@ -92,18 +215,312 @@ class FSClient:
 
     # TODO: can we simplify all filesystems to have the same interface?
 
-    def __init__(self, config_path: str = DEFAULT_DICE_CONFIG_PATH) -> None:
+    def __init__(
+        self,
+        config_path: str = DEFAULT_DICE_CONFIG_PATH,
+        usage_index_dir: str | None = None,
+        metadata_cache: MetadataCache | None = None,
+    ) -> None:
+        # omegaconf is only needed once a client is created
+        from .._config import load_config
+
         config = load_config(config_path)
         self.mount_settings = get_mount_settings_from_config(config)
+        self.mount_index = MountIndex(self.mount_settings)
+        self._filesystems: dict[str, FileSystem] = {}
+        # directory with one usage index database per local mount
+        self.usage_index_dir = usage_index_dir
+        self._usage_indexes: dict[str, UsageIndex] = {}
+        # optional cache of owners, sizes and statuses shared by all filesystems
+        self.metadata_cache = metadata_cache
+
+    def _get_filesystem(self, path: str) -> FileSystem:
+        """Returns the (cached) filesystem instance responsible for a prepared path."""
+        protocol = _deduce_protocol(path)
+        if protocol not in self._filesystems:
+            fs = FACTORIES[protocol]()
+            if self.metadata_cache is not None:
+                fs = CachedFileSystem(fs, self.metadata_cache)
+            self._filesystems[protocol] = fs
+        return self._filesystems[protocol]
+
+    def _groups(self, paths: list[str]) -> list[tuple[FileSystem, list[int]]]:
+        """The filesystem of each protocol with the indices of its paths."""
+        groups: dict[str, list[int]] = defaultdict(list)
+        for index, path in enumerate(paths):
+            groups[_deduce_protocol(path)].append(index)
+        return [
+            (self._get_filesystem(paths[indices[0]]), indices)
+            for indices in groups.values()
+        ]
+
+    def _run_groups(
+        self, paths: list[str], run: Callable[[FileSystem, list[str]], T]
+    ) -> list[tuple[list[int], T]]:
+        """
+        Runs a batch operation on prepared paths that may belong to different filesystems.
+        The paths are grouped by protocol, ``run(filesystem, group)`` is called for each
+        group, groups run concurrently (e.g. HDFS requests overlap local scans) and the
+        indices of every group's paths are returned with its result. All groups run to
+        completion before the first error, if any, is raised.
+        """
+        tasks = self._groups(paths)
+
+        def call(fs: FileSystem, indices: list[int]) -> T:
+            return run(fs, [paths[index] for index in indices])
+
+        if not tasks:
+            return []
+        if len(tasks) == 1:
+            fs, indices = tasks[0]
+            return [(indices, call(fs, indices))]
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [executor.submit(call, fs, indices) for fs, indices in tasks]
+            wait(futures)
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                raise error
+        return [
+            (indices, future.result()) for (_, indices), future in zip(tasks, futures)
+        ]
+
+    def _dispatch(self, paths: list[str], method: str) -> list[Any]:
+        """
+        Runs ``getattr(filesystem, method)`` on the paths of each filesystem, see
+        ``_run_groups``, and returns the results in input order.
+        """
+        paths = prepare_paths(paths, self.mount_index)
+        results: list[Any] = [None] * len(paths)
+        for indices, values in self._run_groups(
+            paths, lambda fs, group: list(getattr(fs, method)(group))
+        ):
+            for index, value in zip(indices, values):
+                results[index] = value
+        return results
 
     def get_owner(self, pathstr: str) -> str:
         """Get the owner of a given path."""
-        pathstr = prepare_paths([pathstr], self.mount_settings)[0]
-        fs = _deduce_fs_from_path(pathstr)
+        pathstr = prepare_paths([pathstr], self.mount_index)[0]
+        fs = self._get_filesystem(pathstr)
         return fs.get_owner(pathstr)
 
-    def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
-        """Get the size of a given path."""
-        paths = prepare_paths(paths, self.mount_settings)
-        fs = _deduce_fs_from_path(paths[0])
-        return fs.size_of_paths(paths)
+    def get_owners(self, paths: list[str]) -> list[str]:
+        """Get the owners of a list of paths, which can be on different filesystems."""
+        return self._dispatch(paths, "get_owners")
+
+    def size_of_paths(
+        self, paths: list[str], from_index: bool = False
+    ) -> list[tuple[str, int, float, str]]:
+        """
+        Get the sizes of a list of paths, which can be on different filesystems.
+        With ``from_index``, directories covered by the usage index are answered from the
+        index (as of its last update) and only the remaining paths are measured.
+        """
+        if not from_index:
+            return _with_paths(paths, self._dispatch(paths, "size_of_paths"))
+        sizes: list[Any] = [None] * len(paths)
+        indexed: list[int] = []
+        totals: list[int] = []
+        for index, path in enumerate(paths):
+            usage = self._indexed_usage(path)
+            if usage is not None:
+                indexed.append(index)
+                totals.append(usage[0])
+        indexed_paths = [paths[index] for index in indexed]
+        for index, size in zip(indexed, size_tuples(indexed_paths, totals)):
+            sizes[index] = size
+        missing = [index for index, size in enumerate(sizes) if size is None]
+        if missing:
+            measured = self._dispatch(
+                [paths[index] for index in missing], "size_of_paths"
+            )
+            for index, size in zip(missing, measured):
+                sizes[index] = size
+        return _with_paths(paths, sizes)
+
+    def _is_local_mount(self, mount: str) -> bool:
+        from ._posix import PosixFileSystem
+
+        protocol = self.mount_settings[mount].get("protocol", "file://")
+        return issubclass(FACTORIES[_deduce_protocol(protocol)], PosixFileSystem)
+
+    def _get_usage_index(self, mount: str) -> UsageIndex:
+        if self.usage_index_dir is None:
+            msg = "FSClient was created without a usage_index_dir"
+            raise ValueError(msg)
+        if mount not in self._usage_indexes:
+            self._usage_indexes[mount] = UsageIndex.for_mount(
+                mount, self.usage_index_dir
+            )
+        return self._usage_indexes[mount]
+
+    def _indexed_usage(self, path: str) -> tuple[int, int] | None:
+        match = self.mount_index.match(path.rstrip("/"))
+        if match is None or not self._is_local_mount(match[0]):
+            return None
+        return self._get_usage_index(match[0]).usage(path)
+
+    def update_usage_index(
+        self, mounts: list[str] | None = None, full: bool = False
+    ) -> dict[str, UpdateStats]:
+        """
+        Updates the usage index of the given mounts, by default all local mounts from the
+        ``storage`` config section that exist on this machine.
+        Only directories that changed since the last update are re-read unless ``full``.
+        """
+        if mounts is None:
+            mounts = [
+                mount
+                for mount in self.mount_settings
+                if self._is_local_mount(mount) and Path(mount).is_dir()
+            ]
+        return {
+            mount: self._get_usage_index(mount).update(full=full) for mount in mounts
+        }
+
+    def transfer(
+        self,
+        src: str,
+        dest: str,
+        checksum: str | None = None,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        buffers: int = DEFAULT_BUFFERS,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        """
+        Copies a file or directory tree between any two filesystems, e.g. from /storage to
+        /hdfs, without going through FUSE mounts. Data is streamed in ``chunk_size`` chunks
+        with reads overlapping writes, ``max_transfers`` files at a time. With ``checksum``
+        (``adler32``, ``crc32`` or a ``hashlib`` algorithm such as ``md5``) every file is
+        read back and verified.
+        """
+        src, dest = prepare_paths([src, dest], self.mount_index)
+        return transfer(
+            self._get_filesystem(src),
+            src,
+            self._get_filesystem(dest),
+            dest,
+            max_transfers=max_transfers,
+            chunk_size=chunk_size,
+            buffers=buffers,
+            checksum=checksum,
+            on_progress=on_progress,
+        )
+
+    def find(self, root: str, **filters: Any) -> Iterator[LsFormat]:
+        """Runs ``FileSystem.find`` on the filesystem of ``root``, see there for the filters."""
+        root = prepare_paths([root], self.mount_index)[0]
+        return self._get_filesystem(root).find(root, **filters)
+
+    def checksum(
+        self,
+        paths: list[str],
+        algorithm: str = DEFAULT_ALGORITHM,
+        cache: ChecksumCache | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields (path, checksum) for files on any filesystem, e.g. adler32 for grid
+        transfers, with the paths as given. The filesystems are checksummed concurrently
+        and results are yielded as they complete. Errors are raised once all filesystems
+        have finished.
+        """
+        prepared = prepare_paths(paths, self.mount_index)
+        tasks = self._groups(prepared)
+        # results of all filesystems, then None or the error of each finished one
+        results: queue.Queue[tuple[str, str] | Exception | None] = queue.Queue()
+
+        def run(fs: FileSystem, indices: list[int]) -> None:
+            # backends yield their own form of the path, e.g. without the protocol
+            pending: dict[str, list[int]] = defaultdict(list)
+            for index in indices:
+                pending[_unprefixed(prepared[index])].append(index)
+            try:
+                for path, checksum in fs.checksum(
+                    [prepared[index] for index in indices], algorithm, cache
+                ):
+                    matches = pending.get(_unprefixed(path))
+                    results.put((paths[matches.pop(0)] if matches else path, checksum))
+            except Exception as e:  # pylint: disable=broad-except
+                results.put(e)
+                return
+            results.put(None)
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=max(len(tasks), 1)) as executor:
+            for fs, indices in tasks:
+                executor.submit(run, fs, indices)
+            running = len(tasks)
+            while running:
+                result = results.get()
+                if isinstance(result, tuple):
+                    yield result
+                    continue
+                running -= 1
+                if result is not None:
+                    errors.append(result)
+        if errors:
+            raise errors[0]
+
+    def bulk_delete(
+        self,
+        paths: list[str],
+        dry_run: bool = False,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        """
+        Removes many files and directory trees, which can be on different filesystems, with
+        the concurrent deleter of each filesystem. With ``dry_run`` nothing is removed and the
+        returned totals show what would be.
+        """
+        paths = prepare_paths(paths, self.mount_index)
+        # latest progress of each filesystem, by the first path of its group
+        latest: dict[str, Progress] = {}
+        lock = threading.Lock()
+
+        def delete(fs: FileSystem, group: list[str]) -> Exception | None:
+            def record(progress: Progress) -> None:
+                with lock:
+                    latest[group[0]] = progress
+                    if on_progress is not None:
+                        on_progress(_merged(latest.values()))
+
+            try:
+                record(fs.bulk_delete(group, dry_run=dry_run, on_progress=record))
+            except Exception as e:  # pylint: disable=broad-except
+                # the other filesystems carry on, failures are reported with the totals
+                return e
+            return None
+
+        errors = [
+            error for _, error in self._run_groups(paths, delete) if error is not None
+        ]
+        total = _merged(latest.values())
+        if total.failed:
+            msg = f"Could not remove {len(total.failed)} paths"
+            raise OSError(msg) from (errors[0] if errors else None)
+        if errors:
+            raise errors[0]
+        return total
+
+
+def _merged(progresses: Iterable[Progress]) -> Progress:
+    """Totals of the progress of several concurrent operations."""
+    total = Progress()
+    for progress in progresses:
+        total.add(files=progress.files, nbytes=progress.bytes)
+        total.failed.extend(progress.failed)
+    return total
+
+
+def _unprefixed(path: str) -> str:
+    """The path without its protocol, as most backends report their paths."""
+    return path.split("://", 1)[-1]
+
+
+def _with_paths(
+    paths: list[str], sizes: list[tuple[str, int, float, str]]
+) -> list[tuple[str, int, float, str]]:
+    """Size tuples with the paths as given by the caller instead of the backend paths."""
+    return [(path, *size[1:]) for path, size in zip(paths, sizes)]
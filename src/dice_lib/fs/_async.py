@@ -0,0 +1,319 @@
+"""
+Asyncio counterparts of the filesystems and of FSClient.
+
+HDFS talks WebHDFS through a non-blocking ``httpx.AsyncClient`` when httpx is installed.
+Every other backend (and HDFS without httpx) runs its blocking implementation on a
+dedicated, bounded thread pool, so callers never block the event loop and the default
+executor is left alone. Each backend has a semaphore that limits how many of its
+operations run at once.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, TypeVar
+from urllib.parse import quote
+
+import pyhdfs
+
+from .._config import DEFAULT_DICE_CONFIG_PATH
+from ..logger import log
+from ..user import current_user
+from . import FACTORIES, FSClient, _deduce_protocol, _with_paths, prepare_paths
+from ._base import DEFAULT_LS_BATCH_SIZE, FileSystem, LsFormat, size_tuples
+from ._hdfs import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_REQUEST_TIMEOUT,
+    HDFS,
+    get_namenodes,
+    statuses_to_ls_format,
+)
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None  # type: ignore[assignment]
+
+T = TypeVar("T")
+
+# threads of the executor shared by all blocking backends of an AsyncFSClient
+DEFAULT_MAX_LOCAL_WORKERS = 16
+# operations per backend that may run at the same time
+DEFAULT_BACKEND_LIMITS = {"hdfs://": DEFAULT_MAX_IN_FLIGHT, "Default": 8}
+_WEBHDFS_PATH = "/webhdfs/v1"
+# marks the end of a blocking iterator driven from the event loop
+_END = object()
+
+
+class AsyncFileSystem(ABC):
+    """Async interface of a filesystem, see FileSystem for the meaning of each method."""
+
+    def __init__(self, semaphore: asyncio.Semaphore) -> None:
+        # limits the concurrent operations on this backend
+        self.semaphore = semaphore
+
+    @abstractmethod
+    async def ls(self, path: str) -> LsFormat:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> AsyncIterator[LsFormat]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def size_of_paths(
+        self, paths: list[str]
+    ) -> list[tuple[str, int, float, str]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_owners(self, paths: list[str]) -> list[str]:
+        raise NotImplementedError
+
+    # optional hook, backends without connections have nothing to release
+    async def aclose(self) -> None:  # noqa: B027
+        """Releases connections held by the filesystem."""
+
+
+class ThreadedAsyncFileSystem(AsyncFileSystem):
+    """Runs a blocking FileSystem on a bounded executor."""
+
+    def __init__(
+        self,
+        fs: FileSystem,
+        executor: ThreadPoolExecutor,
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        super().__init__(semaphore)
+        self.fs = fs
+        self.executor = executor
+
+    async def _run(self, function: Callable[..., T], *args: Any) -> T:
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, function, *args)
+
+    async def ls(self, path: str) -> LsFormat:
+        return await self._run(self.fs.ls, path)
+
+    async def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> AsyncIterator[LsFormat]:
+        # the blocking iterator is advanced one batch at a time on the executor
+        batches = await self._run(self.fs.iter_ls, path, batch_size)
+        while True:
+            batch = await self._run(next, batches, _END)
+            if batch is _END:
+                return
+            yield batch
+
+    async def size_of_paths(
+        self, paths: list[str]
+    ) -> list[tuple[str, int, float, str]]:
+        return await self._run(self.fs.size_of_paths, paths)
+
+    async def get_owners(self, paths: list[str]) -> list[str]:
+        return await self._run(self.fs.get_owners, paths)
+
+
+class AsyncHDFS(AsyncFileSystem):
+    """WebHDFS over a non-blocking HTTP client, with namenode failover like pyhdfs."""
+
+    protocol: str = "hdfs://"
+
+    def __init__(
+        self,
+        semaphore: asyncio.Semaphore,
+        user: str | None = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        transport: Any = None,
+    ) -> None:
+        if httpx is None:
+            msg = (
+                "AsyncHDFS requires httpx, install it with: pip install dice-lib[async]"
+            )
+            raise ImportError(msg)
+        super().__init__(semaphore)
+        self.user = current_user() if user is None else user
+        self.hosts = get_namenodes()
+        self.client = httpx.AsyncClient(timeout=request_timeout, transport=transport)
+
+    def _remove_protocol(self, path: str) -> str:
+        return path.replace(self.protocol, "")
+
+    async def _get(self, path: str, op: str, **params: Any) -> Any:
+        """
+        Sends a WebHDFS GET to the namenodes in turn, starting with the last active one,
+        until one that is not in standby answers. Errors raise the pyhdfs exceptions.
+        """
+        params.update({"op": op, "user.name": self.user})
+        for host in list(self.hosts):
+            url = f"http://{host}{_WEBHDFS_PATH}{quote(path)}"
+            try:
+                async with self.semaphore:
+                    response = await self.client.get(url, params=params)
+                # pylint: disable-next=protected-access
+                pyhdfs._check_response(response)  # type: ignore[arg-type]
+            except (httpx.TransportError, pyhdfs.HdfsStandbyException) as e:
+                log.debug("Namenode %s is not available: %s", host, e)
+                continue
+            if self.hosts[0] != host:
+                self.hosts = [host] + [other for other in self.hosts if other != host]
+            return response.json()
+        msg = f"Could not use any of the given hosts: {self.hosts}"
+        raise pyhdfs.HdfsNoServerException(msg)
+
+    async def _iter_status_pages(self, path: str) -> AsyncIterator[list[Any]]:
+        """Async version of ``iter_status_pages``."""
+        start_after: str | None = None
+        while True:
+            params = {} if start_after is None else {"startAfter": start_after}
+            try:
+                payload = await self._get(path, "LISTSTATUS_BATCH", **params)
+            except (
+                pyhdfs.HdfsUnsupportedOperationException,
+                pyhdfs.HdfsIllegalArgumentException,
+            ):
+                if start_after is not None:
+                    raise
+                payload = await self._get(path, "LISTSTATUS")
+                yield payload["FileStatuses"]["FileStatus"]
+                return
+            listing = payload["DirectoryListing"]
+            statuses = listing["partialListing"]["FileStatuses"]["FileStatus"]
+            yield statuses
+            if not statuses or not listing.get("remainingEntries"):
+                return
+            start_after = statuses[-1]["pathSuffix"]
+
+    async def ls(self, path: str) -> LsFormat:
+        return LsFormat.concat([batch async for batch in self.iter_ls(path)])
+
+    async def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> AsyncIterator[LsFormat]:
+        path = self._remove_protocol(path)
+        pending: list[Any] = []
+        async for statuses in self._iter_status_pages(path):
+            pending.extend(statuses)
+            while len(pending) >= batch_size:
+                yield statuses_to_ls_format(path, pending[:batch_size])
+                pending = pending[batch_size:]
+        if pending:
+            yield statuses_to_ls_format(path, pending)
+
+    async def _space_consumed(self, path: str) -> int:
+        payload = await self._get(path, "GETCONTENTSUMMARY")
+        return int(payload["ContentSummary"]["spaceConsumed"])
+
+    async def size_of_paths(
+        self, paths: list[str]
+    ) -> list[tuple[str, int, float, str]]:
+        paths = [self._remove_protocol(path) for path in paths]
+        totals = await asyncio.gather(*(self._space_consumed(path) for path in paths))
+        return size_tuples(paths, list(totals))
+
+    async def _owner(self, path: str) -> str:
+        payload = await self._get(self._remove_protocol(path), "GETFILESTATUS")
+        return str(payload["FileStatus"]["owner"])
+
+    async def get_owners(self, paths: list[str]) -> list[str]:
+        return list(await asyncio.gather(*(self._owner(path) for path in paths)))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class AsyncFSClient:
+    """
+    Asyncio version of FSClient. Use it as ``async with AsyncFSClient() as fs:`` so that
+    connections and threads are released at the end.
+    """
+
+    def __init__(
+        self,
+        config_path: str = DEFAULT_DICE_CONFIG_PATH,
+        max_local_workers: int = DEFAULT_MAX_LOCAL_WORKERS,
+        backend_limits: dict[str, int] | None = None,
+    ) -> None:
+        # mount resolution is shared with the blocking client
+        self.mount_index = FSClient(config_path).mount_index
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_local_workers, thread_name_prefix="dice-fs"
+        )
+        self.backend_limits = {**DEFAULT_BACKEND_LIMITS, **(backend_limits or {})}
+        self._filesystems: dict[str, AsyncFileSystem] = {}
+
+    async def __aenter__(self) -> AsyncFSClient:
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        for fs in self._filesystems.values():
+            await fs.aclose()
+        self._filesystems.clear()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _get_filesystem(self, path: str) -> AsyncFileSystem:
+        """Returns the (cached) async filesystem responsible for a prepared path."""
+        protocol = _deduce_protocol(path)
+        if protocol not in self._filesystems:
+            limit = self.backend_limits.get(protocol, self.backend_limits["Default"])
+            semaphore = asyncio.Semaphore(limit)
+            if FACTORIES[protocol] is HDFS and httpx is not None:
+                self._filesystems[protocol] = AsyncHDFS(semaphore)
+            else:
+                self._filesystems[protocol] = ThreadedAsyncFileSystem(
+                    FACTORIES[protocol](), self.executor, semaphore
+                )
+        return self._filesystems[protocol]
+
+    def _prepare(self, path: str) -> str:
+        return prepare_paths([path], self.mount_index)[0]
+
+    async def ls(self, path: str) -> LsFormat:
+        path = self._prepare(path)
+        return await self._get_filesystem(path).ls(path)
+
+    async def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> AsyncIterator[LsFormat]:
+        path = self._prepare(path)
+        async for batch in self._get_filesystem(path).iter_ls(path, batch_size):
+            yield batch
+
+    async def _dispatch(self, paths: list[str], method: str) -> list[Any]:
+        """Async version of ``FSClient._dispatch``: backends are queried concurrently."""
+        paths = prepare_paths(paths, self.mount_index)
+        groups: dict[str, list[int]] = defaultdict(list)
+        for index, path in enumerate(paths):
+            groups[_deduce_protocol(path)].append(index)
+
+        async def run(indices: list[int]) -> list[Any]:
+            group = [paths[index] for index in indices]
+            return list(await getattr(self._get_filesystem(group[0]), method)(group))
+
+        results: list[Any] = [None] * len(paths)
+        group_results = await asyncio.gather(*(run(group) for group in groups.values()))
+        for indices, values in zip(groups.values(), group_results):
+            for index, value in zip(indices, values):
+                results[index] = value
+        return results
+
+    async def size_of_paths(
+        self, paths: list[str]
+    ) -> list[tuple[str, int, float, str]]:
+        return _with_paths(paths, await self._dispatch(paths, "size_of_paths"))
+
+    async def get_owners(self, paths: list[str]) -> list[str]:
+        return await self._dispatch(paths, "get_owners")
+
+    async def get_owner(self, path: str) -> str:
+        return (await self.get_owners([path]))[0]
@@ -1,46 +1,186 @@
 from __future__ import annotations
 
+import posixpath
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, Sequence
 
-import pandas as pd
-from pydantic import BaseModel
+import pyarrow as pa
 
+from ..units import convert_to_largest_unit_array
+from ._checksum import DEFAULT_ALGORITHM, ChecksumCache, checksum_chunks
+from ._find import DEFAULT_MAX_WORKERS as DEFAULT_FIND_WORKERS
+from ._find import build_filter, filter_listing, iter_find
+from ._progress import Progress, ProgressCallback
 
-class LsFormat(BaseModel):
-    """A standard format for the output of the list function for different filesystems."""
+if TYPE_CHECKING:
+    import pandas as pd
 
-    permissions: list[str]
-    owner: list[str]
-    group: list[str]
-    size: list[int]
-    size_scaled: list[float]
-    size_unit: list[str]
-    date: list[datetime]
-    name: list[str]
+LS_SCHEMA = pa.schema(
+    [
+        ("permissions", pa.dictionary(pa.int32(), pa.string())),
+        ("owner", pa.dictionary(pa.int32(), pa.string())),
+        ("group", pa.dictionary(pa.int32(), pa.string())),
+        ("size", pa.int64()),
+        ("size_scaled", pa.float64()),
+        ("size_unit", pa.dictionary(pa.int32(), pa.string())),
+        ("date", pa.timestamp("ns", tz="UTC")),
+        ("name", pa.string()),
+    ]
+)
+# number of rows shown at the start and end of a long listing
+REPR_ROWS = 5
+# default number of entries per batch of FileSystem.iter_ls
+DEFAULT_LS_BATCH_SIZE = 10_000
+# default chunk size of FileSystem.read_chunks, large enough to amortise per-request costs
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+# files checksummed at once by backends that stream them through read_chunks
+DEFAULT_CHECKSUM_STREAMS = 8
+
+
+def _as_column(values: Any, field: pa.Field) -> pa.Array:
+    """Converts lists, NumPy arrays and Arrow arrays to an Arrow array of the field's type."""
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if not isinstance(values, pa.Array):
+        if pa.types.is_dictionary(field.type):
+            values = pa.array(values, type=pa.string())
+        elif pa.types.is_timestamp(field.type):
+            values = pa.array(values)
+            if pa.types.is_timestamp(values.type) and values.type.tz is None:
+                # naive datetimes are taken to be UTC
+                values = values.cast(pa.timestamp(values.type.unit, tz="UTC"))
+        else:
+            values = pa.array(values)
+    if values.type != field.type:
+        values = values.cast(field.type)
+    return values
+
+
+def size_tuples(
+    paths: list[str], totals: list[int]
+) -> list[tuple[str, int, float, str]]:
+    """
+    Builds the (path, size_in_bytes, size_in_largest_unit, largest_unit) tuples returned by
+    ``FileSystem.size_of_paths``, converting all sizes in a single vectorised call.
+    """
+    scaled, units = convert_to_largest_unit_array(totals, "B", scale=1024)
+    return list(zip(paths, totals, scaled.tolist(), units.to_pylist()))
+
+
+class LsFormat:
+    """
+    A standard format for the output of the list function for different filesystems.
+
+    The listing is stored as an Arrow table (see ``LS_SCHEMA``): permissions, owner, group and
+    size unit are dictionary encoded and dates are UTC timestamps. Columns are still available
+    as lists (e.g. ``listing.name``) for existing callers.
+    """
+
+    def __init__(self, **columns: Any) -> None:
+        missing = [name for name in LS_SCHEMA.names if name not in columns]
+        if missing:
+            msg = f"LsFormat is missing columns: {missing}"
+            raise ValueError(msg)
+        arrays = [_as_column(columns[field.name], field) for field in LS_SCHEMA]
+        self._table = pa.Table.from_arrays(arrays, schema=LS_SCHEMA)
+
+    @classmethod
+    def from_arrow(cls, data: pa.Table | pa.RecordBatch) -> LsFormat:
+        """Creates an LsFormat from an Arrow table or record batch with the LsFormat columns."""
+        return cls(**{name: data.column(name) for name in LS_SCHEMA.names})
+
+    @classmethod
+    def _from_table(cls, table: pa.Table) -> LsFormat:
+        """Wraps a table that already has the LsFormat schema, without any conversion."""
+        listing = cls.__new__(cls)
+        listing._table = table
+        return listing
+
+    @classmethod
+    def concat(cls, listings: list[LsFormat]) -> LsFormat:
+        """Concatenates several listings into one."""
+        if not listings:
+            return cls._from_table(LS_SCHEMA.empty_table())
+        return cls._from_table(pa.concat_tables([item.to_arrow() for item in listings]))
+
+    def slice(self, offset: int, length: int | None = None) -> LsFormat:
+        """Returns a zero-copy slice of the listing."""
+        return self._from_table(self._table.slice(offset, length))
+
+    @property
+    def permissions(self) -> list[str]:
+        return self._column("permissions")
+
+    @property
+    def owner(self) -> list[str]:
+        return self._column("owner")
+
+    @property
+    def group(self) -> list[str]:
+        return self._column("group")
+
+    @property
+    def size(self) -> list[int]:
+        return self._column("size")
+
+    @property
+    def size_scaled(self) -> list[float]:
+        return self._column("size_scaled")
+
+    @property
+    def size_unit(self) -> list[str]:
+        return self._column("size_unit")
+
+    @property
+    def date(self) -> list[datetime]:
+        return self._column("date")
+
+    @property
+    def name(self) -> list[str]:
+        return self._column("name")
+
+    def _column(self, name: str) -> list[Any]:
+        return self._table.column(name).to_pylist()  # type: ignore[no-any-return]
+
+    def __len__(self) -> int:
+        return int(self._table.num_rows)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LsFormat):
+            return NotImplemented
+        return bool(self._table.equals(other._table))
+
+    def to_arrow(self) -> pa.Table:
+        """Returns the underlying Arrow table."""
+        return self._table
 
     def to_pandas(self) -> pd.DataFrame:
-        """Converts the LsFormat to a pandas DataFrame."""
-        return pd.DataFrame(
-            {
-                "permissions": self.permissions,
-                "owner": self.owner,
-                "group": self.group,
-                "size": self.size,
-                "size_scaled": self.size_scaled,
-                "size_unit": self.size_unit,
-                "date": self.date,
-                "name": self.name,
-            }
-        )
+        """
+        Converts the LsFormat to a pandas DataFrame.
+        Numeric and date columns are converted without copying, dictionary columns become
+        categoricals.
+        """
+        return self._table.to_pandas(split_blocks=True)
 
     def __repr__(self) -> str:
-        return str(self.to_pandas().__repr__())
+        n_rows = len(self)
+        if n_rows <= 2 * REPR_ROWS:
+            return str(self.to_pandas().__repr__())
+        # only convert the rows that are shown
+        head = self._table.slice(0, REPR_ROWS).to_pandas()
+        tail = self._table.slice(n_rows - REPR_ROWS).to_pandas()
+        tail.index += n_rows - REPR_ROWS
+        return (
+            f"{head.to_string()}\n...\n{tail.to_string(header=False)}\n\n"
+            f"[{n_rows} rows x {self._table.num_columns} columns]"
+        )
 
     def to_list(self) -> Any:
         """Converts the LsFormat to a list."""
-        return self.to_pandas().to_numpy().tolist()
+        columns = [self._column(name) for name in LS_SCHEMA.names]
+        return [list(row) for row in zip(*columns)]
 
 
 class FileSystem(ABC):
@@ -49,8 +189,7 @@ class FileSystem(ABC):
     _protocol: str = "file://"
 
     @abstractmethod
-    def __init__(self) -> None:
-        ...
+    def __init__(self) -> None: ...
 
     @abstractmethod
     def size_of_path(self, path: str) -> tuple[str, int, float, str]:
@@ -68,10 +207,126 @@ class FileSystem(ABC):
     def get_owner(self, pathstr: str) -> str:
         """Returns the owner of a given path."""
 
+    def get_owners(self, paths: list[str]) -> list[str]:
+        """Returns the owners of a list of paths."""
+        return [self.get_owner(path) for path in paths]
+
     @abstractmethod
     def ls(self, path: str) -> LsFormat:
         """Returns a list of files in the given path."""
 
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        """
+        Yields the listing of the given path in batches of at most ``batch_size`` entries.
+        Backends that can stream yield batches as the entries are read, in the order the
+        filesystem returns them, so memory stays bounded and callers can stop early.
+        This default implementation lists the whole path first.
+        """
+        listing = self.ls(path)
+        for offset in range(0, len(listing), batch_size):
+            yield listing.slice(offset, batch_size)
+
+    def find(
+        self,
+        root: str,
+        *,
+        name_glob: str | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        older_than: timedelta | None = None,
+        owner: str | None = None,
+        type: str | None = None,  # pylint: disable=redefined-builtin
+        max_depth: int | None = None,
+        exclude: Sequence[str] = (),
+        max_workers: int = DEFAULT_FIND_WORKERS,
+    ) -> Iterator[LsFormat]:
+        """
+        Yields the entries below ``root`` that match all given conditions, like ``find``,
+        in batches with full paths as names. ``type`` is ``f`` (file), ``d`` (directory)
+        or ``l`` (symbolic link), ``older_than`` compares the modification time. The
+        filters are applied to every listing as it arrives and directories are listed
+        ``max_workers`` at a time; directories matching an ``exclude`` glob and levels
+        below ``max_depth`` (at least 1, the entries of ``root``) are not listed at all.
+        Directories that cannot be read are logged and skipped.
+        """
+        expression = build_filter(
+            name_glob, min_size, max_size, older_than, owner, type
+        )
+        if not self.is_dir(root):
+            directory = posixpath.dirname(root.rstrip("/"))
+            tables: Iterable[pa.Table] = [
+                filter_listing(directory, self.ls(root).to_arrow(), expression)
+            ]
+        else:
+            tables = iter_find(
+                self.iter_ls, root, expression, max_depth, exclude, max_workers
+            )
+        for table in tables:
+            if table.num_rows:
+                yield LsFormat._from_table(table)
+
+    def _unsupported(self, operation: str) -> str:
+        """Message of the NotImplementedError raised by optional operations."""
+        return f"{type(self).__name__} does not support {operation}"
+
+    def is_dir(self, path: str) -> bool:
+        """Returns True if the given path is a directory."""
+        raise NotImplementedError(self._unsupported("is_dir"))
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """Yields the contents of a file in chunks of at most ``chunk_size`` bytes."""
+        raise NotImplementedError(self._unsupported("streaming reads"))
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        """Creates or replaces a file from a stream of chunks, as they arrive."""
+        raise NotImplementedError(self._unsupported("streaming writes"))
+
+    def _file_version(self, path: str) -> tuple[int, int] | None:
+        """(size, mtime) of a file for the checksum cache, None if they are not known."""
+        raise NotImplementedError(self._unsupported("checksum caching"))
+
+    def _checksum_file(
+        self, path: str, algorithm: str, cache: ChecksumCache | None
+    ) -> str:
+        if cache is None:
+            return checksum_chunks(self.read_chunks(path), algorithm)
+        try:
+            version = self._file_version(path)
+        except NotImplementedError:
+            version = None
+        if version is None:
+            return checksum_chunks(self.read_chunks(path), algorithm)
+        key = (path, algorithm, *version)
+        checksum = cache.get(*key)
+        if checksum is None:
+            checksum = checksum_chunks(self.read_chunks(path), algorithm)
+            cache.put(*key, checksum)
+        return checksum
+
+    def checksum(
+        self,
+        paths: list[str],
+        algorithm: str = DEFAULT_ALGORITHM,
+        cache: ChecksumCache | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields (path, checksum) for the given files as they complete. ``algorithm`` is
+        ``adler32``, ``crc32`` or any hashlib algorithm. The default implementation reads
+        the files through ``read_chunks``, several at a time. The cache is used for the
+        files whose size and mtime ``_file_version`` can tell.
+        """
+        with ThreadPoolExecutor(max_workers=DEFAULT_CHECKSUM_STREAMS) as executor:
+            futures = {
+                executor.submit(self._checksum_file, path, algorithm, cache): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
     @abstractmethod
     def mkdir(self, path: str) -> None:
         """Creates a directory at the given path."""
@@ -81,8 +336,23 @@ class FileSystem(ABC):
         """Removes the file at the given path."""
 
     @abstractmethod
-    def rm_recursive(self, path: str) -> None:
-        """Removes the directory at the given path and all its contents."""
+    def rm_recursive(self, path: str) -> Progress | None:
+        """
+        Removes the directory at the given path and all its contents.
+        Backends that count what they remove return it as a Progress.
+        """
+
+    def bulk_delete(
+        self,
+        paths: list[str],
+        dry_run: bool = False,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        """
+        Removes many files and directory trees concurrently. With ``dry_run`` nothing is
+        removed and the returned Progress holds the files and bytes that would be.
+        """
+        raise NotImplementedError(self._unsupported("bulk deletion"))
 
     @abstractmethod
     def copy(self, src: str, dest: str) -> None:
@@ -0,0 +1,296 @@
+"""
+Opt-in cache for file metadata (owner, size, status) shared by all backends.
+
+Entries expire after a per-backend time to live and the least recently used ones are
+evicted once the cache is full. Operations that change the namespace through a cached
+filesystem (mkdir, rm, move, copy, ...) drop the entries of the paths they touch, of
+everything below them and the sizes of their parent directories. Changes made by other
+processes are only seen once the entries expire.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator
+
+from ._base import DEFAULT_CHUNK_SIZE, DEFAULT_LS_BATCH_SIZE, FileSystem, LsFormat
+from ._checksum import DEFAULT_ALGORITHM, ChecksumCache
+from ._progress import Progress, ProgressCallback
+
+DEFAULT_MAX_ENTRIES = 100_000
+# seconds an entry stays valid, unless configured for its backend
+DEFAULT_TTL = 10.0
+DEFAULT_TTLS = {"file://": 5.0, "hdfs://": 30.0, "s3://": 60.0, "davs://": 60.0}
+_SCHEME = re.compile(r"^[a-z0-9]+://")
+
+
+def _normalise(path: str) -> str:
+    return _SCHEME.sub("", path).rstrip("/") or "/"
+
+
+@dataclass
+class CacheStats:
+    """Counters of a MetadataCache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class MetadataCache:
+    """Thread-safe LRU cache of metadata with a time to live per backend."""
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttls: dict[str, float] | None = None,
+        default_ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.max_entries = max_entries
+        # seconds an entry stays valid, by backend protocol
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        # (protocol, path, kind) -> (expiry, value), least recently used first
+        self._entries: OrderedDict[tuple[str, str, str], tuple[float, Any]] = (
+            OrderedDict()
+        )
+        self._kinds: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def ttl(self, protocol: str) -> float:
+        return self.ttls.get(protocol, self.default_ttl)
+
+    def get(self, protocol: str, kind: str, path: str) -> tuple[bool, Any]:
+        """Returns (True, value) for a valid entry and (False, None) otherwise."""
+        key = (protocol, _normalise(path), kind)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.stats.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return True, entry[1]
+
+    def put(self, protocol: str, kind: str, path: str, value: Any) -> None:
+        key = (protocol, _normalise(path), kind)
+        expiry = time.monotonic() + self.ttl(protocol)
+        with self._lock:
+            self._kinds.add(kind)
+            self._entries[key] = (expiry, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def get_or_load(
+        self, protocol: str, kind: str, path: str, load: Callable[[], Any]
+    ) -> Any:
+        found, value = self.get(protocol, kind, path)
+        if not found:
+            value = load()
+            self.put(protocol, kind, path, value)
+        return value
+
+    def get_or_load_many(
+        self,
+        protocol: str,
+        kind: str,
+        paths: list[str],
+        load: Callable[[list[str]], list[Any]],
+    ) -> list[Any]:
+        """Like ``get_or_load``, with all misses loaded by a single call of ``load``."""
+        values: list[Any] = [None] * len(paths)
+        missing = []
+        for index, path in enumerate(paths):
+            found, values[index] = self.get(protocol, kind, path)
+            if not found:
+                missing.append(index)
+        if missing:
+            loaded = load([paths[index] for index in missing])
+            for index, value in zip(missing, loaded):
+                values[index] = value
+                self.put(protocol, kind, paths[index], value)
+        return values
+
+    def invalidate(self, protocol: str, path: str, recursive: bool = False) -> None:
+        """
+        Drops the entries of ``path``, with ``recursive`` those of everything below it,
+        and the sizes of its parent directories.
+        """
+        path = _normalise(path)
+        parents = set()
+        parent = posixpath.dirname(path)
+        while parent and parent not in parents:
+            parents.add(parent)
+            parent = posixpath.dirname(parent)
+        prefix = path.rstrip("/") + "/"
+        with self._lock:
+            if recursive:
+                keys = [
+                    key
+                    for key in self._entries
+                    if key[0] == protocol
+                    and (key[1] == path or key[1].startswith(prefix))
+                ]
+            else:
+                keys = [(protocol, path, kind) for kind in self._kinds]
+            keys.extend((protocol, parent, "size") for parent in parents)
+            for key in keys:
+                self._entries.pop(key, None)
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class CachedFileSystem(FileSystem):
+    """
+    Serves metadata of a filesystem from a MetadataCache and keeps the cache up to date
+    with the changes made through it. Other attributes are those of the wrapped filesystem.
+    """
+
+    def __init__(self, fs: FileSystem, cache: MetadataCache) -> None:
+        self.fs = fs
+        self.cache = cache
+        self.protocol: str = getattr(fs, "protocol", fs._protocol)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.fs, name)
+
+    def _invalidate(self, path: str, recursive: bool = False) -> None:
+        self.cache.invalidate(self.protocol, path, recursive)
+
+    def size_of_path(self, path: str) -> tuple[str, int, float, str]:
+        return self.size_of_paths([path])[0]
+
+    def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
+        return self.cache.get_or_load_many(
+            self.protocol, "size", paths, self.fs.size_of_paths
+        )
+
+    def get_owner(self, pathstr: str) -> str:
+        return str(
+            self.cache.get_or_load(
+                self.protocol, "owner", pathstr, lambda: self.fs.get_owner(pathstr)
+            )
+        )
+
+    def get_owners(self, paths: list[str]) -> list[str]:
+        return self.cache.get_or_load_many(
+            self.protocol, "owner", paths, self.fs.get_owners
+        )
+
+    def status(self, path: str) -> Any:
+        """Cached ``status`` of backends that have one, e.g. HDFS."""
+        status = self.fs.status  # type: ignore[attr-defined]
+        return self.cache.get_or_load(
+            self.protocol, "status", path, lambda: status(path)
+        )
+
+    def is_dir(self, path: str) -> bool:
+        return bool(
+            self.cache.get_or_load(
+                self.protocol, "is_dir", path, lambda: self.fs.is_dir(path)
+            )
+        )
+
+    def ls(self, path: str) -> LsFormat:
+        return self.fs.ls(path)
+
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        return self.fs.iter_ls(path, batch_size)
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        return self.fs.read_chunks(path, chunk_size)
+
+    def checksum(
+        self,
+        paths: list[str],
+        algorithm: str = DEFAULT_ALGORITHM,
+        cache: ChecksumCache | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        return self.fs.checksum(paths, algorithm, cache)
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        try:
+            self.fs.write_chunks(path, chunks)
+        finally:
+            self._invalidate(path)
+
+    def mkdir(self, path: str) -> None:
+        try:
+            self.fs.mkdir(path)
+        finally:
+            # mkdir may create missing parents as well
+            self._invalidate(path, recursive=True)
+
+    def rm(self, path: str) -> None:
+        try:
+            self.fs.rm(path)
+        finally:
+            self._invalidate(path)
+
+    def rm_recursive(self, path: str, *args: Any, **kwargs: Any) -> Progress | None:
+        # backend options such as on_progress or dry_run are passed through unchanged
+        try:
+            return self.fs.rm_recursive(path, *args, **kwargs)
+        finally:
+            self._invalidate(path, recursive=True)
+
+    def bulk_delete(
+        self,
+        paths: list[str],
+        dry_run: bool = False,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        try:
+            return self.fs.bulk_delete(paths, dry_run=dry_run, on_progress=on_progress)
+        finally:
+            if not dry_run:
+                for path in paths:
+                    self._invalidate(path, recursive=True)
+
+    def copy(self, src: str, dest: str, *args: Any, **kwargs: Any) -> None:
+        try:
+            self.fs.copy(src, dest, *args, **kwargs)
+        finally:
+            # the destination may be a directory that receives the source
+            self._invalidate(dest, recursive=True)
+
+    def copy_recursive(self, src: str, dest: str, *args: Any, **kwargs: Any) -> None:
+        try:
+            self.fs.copy_recursive(src, dest, *args, **kwargs)
+        finally:
+            # the destination may be a directory that receives the source
+            self._invalidate(dest, recursive=True)
+
+    def move(self, src: str, dest: str, *args: Any, **kwargs: Any) -> None:
+        try:
+            self.fs.move(src, dest, *args, **kwargs)
+        finally:
+            self._invalidate(src, recursive=True)
+            # the destination may be a directory that receives the source
+            self._invalidate(dest, recursive=True)
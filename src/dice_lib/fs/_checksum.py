@@ -0,0 +1,178 @@
+"""
+File checksums as used by grid transfers (adler32) and for verification (md5, ...).
+
+Local files are read with large ``readinto`` buffers and hashed on a process pool, so that
+many files are checksummed on all cores at once. Results are yielded as they complete.
+A ChecksumCache remembers checksums by (path, size, mtime) across calls and runs.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Protocol
+
+DEFAULT_ALGORITHM = "adler32"
+# bytes read from a file at a time
+READ_BUFFER_SIZE = 8 * 1024 * 1024
+# workers are not forked, callers usually have other threads (HDFS, HTTP, thread pools)
+# running and forking a multithreaded process can deadlock
+MP_START_METHOD = "forkserver"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checksums (
+    path TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    PRIMARY KEY (path, algorithm)
+);
+"""
+
+
+class Checksum(Protocol):
+    def update(self, data: Any, /) -> None: ...
+
+    def hexdigest(self) -> str: ...
+
+
+class _Zlib:
+    """hashlib-like wrapper of the zlib checksums, hex encoded like gfal and xrootd."""
+
+    def __init__(self, function: Any, start: int) -> None:
+        self.function = function
+        self.value = start
+
+    def update(self, data: Any, /) -> None:
+        self.value = self.function(data, self.value)
+
+    def hexdigest(self) -> str:
+        return f"{self.value & 0xFFFFFFFF:08x}"
+
+
+def new_checksum(algorithm: str) -> Checksum:
+    """Returns a new checksum object for ``adler32``, ``crc32`` or any hashlib algorithm."""
+    if algorithm == "adler32":
+        return _Zlib(zlib.adler32, 1)
+    if algorithm == "crc32":
+        return _Zlib(zlib.crc32, 0)
+    return hashlib.new(algorithm)
+
+
+def checksum_chunks(chunks: Iterable[bytes], algorithm: str) -> str:
+    """Checksum of a stream of chunks, e.g. from FileSystem.read_chunks."""
+    checksum = new_checksum(algorithm)
+    for chunk in chunks:
+        checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+def checksum_file(path: str, algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """Checksum of a local file, read into a single reused buffer."""
+    checksum = new_checksum(algorithm)
+    buffer = bytearray(READ_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with Path(path).open("rb", buffering=0) as f:
+        while True:
+            size = f.readinto(buffer)
+            if not size:
+                break
+            checksum.update(view[:size])
+    return checksum.hexdigest()
+
+
+class ChecksumCache:
+    """Checksums by (path, size, mtime) in an SQLite database, ``:memory:`` by default."""
+
+    def __init__(self, db_path: str | Path = ":memory:") -> None:
+        self._connection = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._connection.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, path: str, algorithm: str, size: int, mtime: int) -> str | None:
+        """Returns the stored checksum unless the file changed since it was computed."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT checksum FROM checksums "
+                "WHERE path = ? AND algorithm = ? AND size = ? AND mtime = ?",
+                (path, algorithm, size, mtime),
+            ).fetchone()
+        return None if row is None else str(row[0])
+
+    def put(
+        self, path: str, algorithm: str, size: int, mtime: int, checksum: str
+    ) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checksums VALUES (?, ?, ?, ?, ?)",
+                (path, algorithm, size, mtime, checksum),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> ChecksumCache:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+
+def iter_file_checksums(
+    paths: Iterable[str],
+    algorithm: str = DEFAULT_ALGORITHM,
+    max_workers: int | None = None,
+    cache: ChecksumCache | None = None,
+    cache_prefix: str = "",
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields (path, checksum) for local files as they complete, hashing up to
+    ``max_workers`` (default: number of CPUs) files at once in separate processes.
+    Cached checksums of unchanged files are yielded first. Cache entries are stored
+    under ``cache_prefix + path``.
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context(MP_START_METHOD),
+    ) as executor:
+        pending: dict[Future[str], tuple[str, os.stat_result]] = {}
+
+        def finished(futures: set[Future[str]]) -> Iterator[tuple[str, str]]:
+            for future in futures:
+                path, st = pending.pop(future)
+                checksum = future.result()
+                if cache is not None:
+                    cache.put(
+                        cache_prefix + path,
+                        algorithm,
+                        st.st_size,
+                        st.st_mtime_ns,
+                        checksum,
+                    )
+                yield path, checksum
+
+        for path in paths:
+            st = Path(path).stat()
+            if cache is not None:
+                cached = cache.get(
+                    cache_prefix + path, algorithm, st.st_size, st.st_mtime_ns
+                )
+                if cached is not None:
+                    yield path, cached
+                    continue
+            # keeps millions of paths from being queued up front
+            if len(pending) >= 4 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from finished(done)
+            pending[executor.submit(checksum_file, path, algorithm)] = (path, st)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            yield from finished(done)
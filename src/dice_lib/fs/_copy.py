@@ -0,0 +1,228 @@
+"""
+In-process, parallel equivalent of ``cp -pr``.
+
+File contents are moved by the kernel with ``os.copy_file_range`` (server-side copies on
+NFS 4.2 and reflinks where supported), falling back to ``os.sendfile`` and finally to a
+plain read/write loop. Many files are copied at once on a bounded thread pool, which keeps
+network filesystems busy while the tree is still being walked.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import os
+import posixpath
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from ..logger import log
+from ._du import DEFAULT_MAX_WORKERS
+from ._progress import PROGRESS_INTERVAL, Progress, ProgressCallback
+
+# bytes handed to the kernel per copy_file_range/sendfile call
+CHUNK_SIZE = 64 * 1024 * 1024
+# errors meaning that a zero-copy call is not supported for this pair of files
+_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+def _copy_data(src_fd: int, dest_fd: int) -> int:
+    """Copies the contents of ``src_fd`` to ``dest_fd``, returns the number of bytes."""
+    copied = 0
+    if hasattr(os, "copy_file_range"):
+        try:
+            while True:
+                sent = os.copy_file_range(src_fd, dest_fd, CHUNK_SIZE)
+                if sent == 0:
+                    return copied
+                copied += sent
+        except OSError as e:
+            if copied or e.errno not in _UNSUPPORTED:
+                raise
+    try:
+        while True:
+            sent = os.sendfile(dest_fd, src_fd, copied, CHUNK_SIZE)
+            if sent == 0:
+                return copied
+            copied += sent
+    except OSError as e:
+        if copied or e.errno not in _UNSUPPORTED:
+            raise
+    with open(src_fd, "rb", closefd=False) as reader, open(
+        dest_fd, "wb", closefd=False
+    ) as writer:
+        shutil.copyfileobj(reader, writer, CHUNK_SIZE)
+        return writer.tell()
+
+
+def _copy_metadata(st: os.stat_result, dest: str) -> None:
+    """Preserves mode, ownership and timestamps like ``cp -p``."""
+    follow = not stat.S_ISLNK(st.st_mode)
+    # only root can give files away, cp -p silently keeps the new owner as well
+    with contextlib.suppress(PermissionError):
+        os.chown(dest, st.st_uid, st.st_gid, follow_symlinks=follow)
+    if follow:
+        Path(dest).chmod(stat.S_IMODE(st.st_mode))
+    if follow or os.utime in os.supports_follow_symlinks:
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns), follow_symlinks=follow)
+
+
+def copy_file(src: str, dest: str, st: os.stat_result | None = None) -> int:
+    """
+    Copies a single file, or re-creates a symbolic link, preserving its metadata.
+    Returns the number of bytes copied.
+    """
+    st = os.lstat(src) if st is None else st
+    if stat.S_ISLNK(st.st_mode):
+        link = Path(dest)
+        # like cp, a link left by an earlier copy is replaced
+        if link.is_symlink():
+            link.unlink()
+        link.symlink_to(os.readlink(src))
+        _copy_metadata(st, dest)
+        return 0
+    src_fd = os.open(src, os.O_RDONLY)
+    try:
+        dest_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            copied = _copy_data(src_fd, dest_fd)
+        finally:
+            os.close(dest_fd)
+    finally:
+        os.close(src_fd)
+    _copy_metadata(st, dest)
+    return copied
+
+
+class _TreeCopy:
+    """Walks a source tree and copies its files on a bounded pool."""
+
+    def __init__(
+        self,
+        executor: ThreadPoolExecutor,
+        max_pending: int,
+        on_progress: ProgressCallback,
+    ) -> None:
+        self.executor = executor
+        # keeps the walk from queueing millions of copies ahead of the workers
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.pending = 0
+        self.finished = threading.Condition()
+        self.progress = Progress()
+        self.on_progress = on_progress
+        self.last_report = time.monotonic()
+        # directories get their metadata once all files below them are in place
+        self.directories: list[tuple[os.stat_result, str]] = []
+
+    def _copy(self, src: str, dest: str, st: os.stat_result) -> None:
+        try:
+            nbytes = copy_file(src, dest, st)
+        except OSError as e:
+            self._fail(src, e)
+        else:
+            self.progress.add(files=1, nbytes=nbytes)
+        finally:
+            self.slots.release()
+            with self.finished:
+                self.pending -= 1
+                self.finished.notify()
+
+    def report(self) -> None:
+        if self.on_progress is not None:
+            self.on_progress(self.progress)
+        self.last_report = time.monotonic()
+
+    def submit(self, src: str, dest: str, st: os.stat_result) -> None:
+        while not self.slots.acquire(timeout=PROGRESS_INTERVAL):
+            self.report()
+        if time.monotonic() - self.last_report >= PROGRESS_INTERVAL:
+            self.report()
+        with self.finished:
+            self.pending += 1
+        self.executor.submit(self._copy, src, dest, st)
+
+    def _fail(self, path: str, error: OSError) -> None:
+        log.error("Could not copy %s: %s", path, error)
+        self.progress.fail(path)
+
+    def _visit(
+        self, entry: os.DirEntry[str], dest_dir: str, stack: list[tuple[str, str]]
+    ) -> None:
+        target = posixpath.join(dest_dir, entry.name)
+        try:
+            st = entry.stat(follow_symlinks=False)
+            if stat.S_ISDIR(st.st_mode):
+                Path(target).mkdir(exist_ok=True)
+                self.directories.append((st, target))
+                stack.append((entry.path, target))
+            elif stat.S_ISREG(st.st_mode) or stat.S_ISLNK(st.st_mode):
+                self.submit(entry.path, target, st)
+            else:
+                log.warning("Skipping special file %s", entry.path)
+        except OSError as e:
+            self._fail(entry.path, e)
+
+    def walk(self, src: str, dest: str) -> None:
+        """
+        Walks ``src`` and submits the copies of its files. Directories that already exist
+        below ``dest`` are reused; entries that cannot be read or created are recorded as
+        failures and the walk carries on.
+        """
+        st = os.lstat(src)
+        if not stat.S_ISDIR(st.st_mode):
+            self.submit(src, dest, st)
+            return
+        Path(dest).mkdir(parents=True, exist_ok=True)
+        self.directories.append((st, dest))
+        stack = [(src, dest)]
+        while stack:
+            src_dir, dest_dir = stack.pop()
+            try:
+                with os.scandir(src_dir) as entries:
+                    for entry in entries:
+                        self._visit(entry, dest_dir, stack)
+            except OSError as e:
+                self._fail(src_dir, e)
+
+    def wait(self) -> None:
+        with self.finished:
+            while self.pending:
+                if not self.finished.wait(timeout=PROGRESS_INTERVAL):
+                    self.report()
+        self.report()
+
+
+def copy_tree(
+    src: str,
+    dest: str,
+    max_workers: int | None = None,
+    on_progress: ProgressCallback = None,
+) -> Progress:
+    """
+    Copies ``src`` (a file or a directory tree) to ``dest`` like ``cp -pr src dest`` when
+    ``dest`` does not exist; copying again over an earlier copy updates it in place.
+    Up to ``max_workers`` files are copied at once while the tree is walked.
+    ``on_progress`` is called about every PROGRESS_INTERVAL seconds with the running
+    totals and once at the end.
+    Raises OSError once everything else has been copied if any file or directory failed.
+    """
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tree = _TreeCopy(executor, 4 * max_workers, on_progress)
+        try:
+            tree.walk(src, dest)
+        finally:
+            tree.wait()
+    # deepest directories first, so setting a parent's mtime is the last change to it
+    for st, directory in reversed(tree.directories):
+        _copy_metadata(st, directory)
+    progress = tree.progress
+    log.info("Copied %s to %s: %s", src, dest, progress)
+    if progress.failed:
+        msg = f"Could not copy {len(progress.failed)} files from {src} to {dest}"
+        raise OSError(msg)
+    return progress
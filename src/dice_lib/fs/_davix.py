@@ -1,9 +1,344 @@
 from __future__ import annotations
 
-from ._base import FileSystem
+import os
+import posixpath
+import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+from urllib.parse import quote, unquote, urlsplit
+
+import pyarrow as pa
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..logger import log
+from ..units import convert_to_largest_unit_array
+from ._base import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_LS_BATCH_SIZE,
+    FileSystem,
+    LsFormat,
+    size_tuples,
+)
+
+# WebDAV URL schemes and the HTTP schemes they are served over
+_SCHEMES = {"davs://": "https://", "dav://": "http://"}
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_TIMEOUT = 60.0
+# grid credentials, as used by davix and gfal
+DEFAULT_PROXY = f"/tmp/x509up_u{os.getuid()}"
+DEFAULT_CA_DIR = "/etc/grid-security/certificates"
+
+_DAV = "{DAV:}"
+_PROPFIND_BODY = """<?xml version="1.0" encoding="utf-8"?>
+<D:propfind xmlns:D="DAV:">
+  <D:prop>
+    <D:resourcetype/>
+    <D:getcontentlength/>
+    <D:getlastmodified/>
+    <D:owner/>
+  </D:prop>
+</D:propfind>
+"""
+
+
+def _default_cert() -> str | None:
+    proxy = os.environ.get("X509_USER_PROXY", DEFAULT_PROXY)
+    return proxy if Path(proxy).exists() else None
+
+
+def _default_verify() -> str | bool:
+    ca_dir = os.environ.get("X509_CERT_DIR", DEFAULT_CA_DIR)
+    return ca_dir if Path(ca_dir).is_dir() else True
+
+
+@lru_cache(maxsize=None)
+def _shared_session(cert: str | None, verify: str | bool) -> requests.Session:
+    """HTTP session with a keep-alive connection pool, shared by all threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.cert = cert
+    session.verify = verify
+    return session
+
+
+def to_url(path: str) -> str:
+    """Converts ``davs://host/path`` to the ``https://`` URL it is served from."""
+    for scheme, http_scheme in _SCHEMES.items():
+        if path.startswith(scheme):
+            return http_scheme + path[len(scheme) :]
+    return path
+
+
+def _parse_multistatus(content: bytes) -> list[dict[str, Any]]:
+    """Returns one dict of properties per ``response`` element of a PROPFIND reply."""
+    entries = []
+    for response in ET.fromstring(content).iter(f"{_DAV}response"):
+        href = unquote(urlsplit(response.findtext(f"{_DAV}href") or "").path)
+        entry: dict[str, Any] = {"href": href}
+        for propstat in response.iter(f"{_DAV}propstat"):
+            if " 200 " not in (propstat.findtext(f"{_DAV}status") or " 200 "):
+                continue
+            prop = propstat.find(f"{_DAV}prop")
+            if prop is None:
+                continue
+            resourcetype = prop.find(f"{_DAV}resourcetype")
+            if resourcetype is not None:
+                entry["is_dir"] = resourcetype.find(f"{_DAV}collection") is not None
+            length = prop.findtext(f"{_DAV}getcontentlength")
+            if length:
+                entry["getcontentlength"] = int(length)
+            modified = prop.findtext(f"{_DAV}getlastmodified")
+            if modified:
+                entry["modified"] = parsedate_to_datetime(modified)
+            owner = prop.find(f"{_DAV}owner")
+            if owner is not None:
+                entry["owner"] = "".join(owner.itertext()).strip()
+        entries.append(entry)
+    return entries
+
+
+def _entries_to_ls_format(base: str, entries: list[dict[str, Any]]) -> LsFormat:
+    """Builds the LsFormat columns for PROPFIND entries, named ``<base>/<name>``."""
+    size = [entry.get("getcontentlength", 0) for entry in entries]
+    size_scaled, size_unit = convert_to_largest_unit_array(size, "B", scale=1024)
+    return LsFormat(
+        permissions=[
+            "drwxr-xr-x" if entry.get("is_dir") else "-rw-r--r--" for entry in entries
+        ],
+        owner=[entry.get("owner", "") for entry in entries],
+        group=[""] * len(entries),
+        size=size,
+        size_scaled=size_scaled,
+        size_unit=size_unit,
+        date=pa.array(
+            [entry.get("modified") for entry in entries],
+            type=pa.timestamp("ns", tz="UTC"),
+        ),
+        name=[
+            posixpath.join(base, posixpath.basename(entry["href"].rstrip("/")))
+            for entry in entries
+        ],
+    )
 
 
 class DavixFileSystem(FileSystem):
     """Class for Davix filesystems."""
 
+    protocol: str = "davs://"
     _protocol: str = "davs://"
+
+    def __init__(
+        self,
+        cert: str | None = None,
+        verify: str | bool | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        # X.509 proxy and CA directory default to the usual grid locations
+        self.session = _shared_session(
+            cert or _default_cert(), _default_verify() if verify is None else verify
+        )
+        # maximum number of concurrent requests of a single operation
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        url = to_url(path)
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        if response.status_code == 404:
+            msg = f"No such file or directory: {path}"
+            raise FileNotFoundError(msg)
+        response.raise_for_status()
+        return response
+
+    def propfind(self, path: str, depth: int = 1) -> list[dict[str, Any]]:
+        """
+        Returns the properties of ``path`` (first) and, with ``depth=1``, of all its entries,
+        from a single PROPFIND request.
+        """
+        response = self._request(
+            "PROPFIND",
+            path,
+            data=_PROPFIND_BODY,
+            headers={"Depth": str(depth), "Content-Type": "application/xml"},
+        )
+        entries = _parse_multistatus(response.content)
+        own_path = unquote(urlsplit(to_url(path)).path).rstrip("/")
+        # servers do not always return the requested resource first
+        entries.sort(key=lambda entry: entry["href"].rstrip("/") != own_path)
+        return entries
+
+    def _list(self, path: str) -> tuple[dict[str, Any], list[dict[str, Any]]]:
+        entries = self.propfind(path, depth=1)
+        return entries[0], entries[1:]
+
+    def _sizes(self, paths: list[str]) -> list[int]:
+        """
+        Total size of the files below each path, from one PROPFIND per directory. The
+        directories of all paths share a single pool of ``max_concurrency`` requests.
+        (quota-used-bytes is not used: many servers report the usage of the whole
+        filesystem there.)
+        """
+        totals = [0] * len(paths)
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            pending: dict[
+                Future[tuple[dict[str, Any], list[dict[str, Any]]]], tuple[int, str]
+            ] = {
+                executor.submit(self._list, path): (index, path)
+                for index, path in enumerate(paths)
+            }
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, directory = pending.pop(future)
+                    own, children = future.result()
+                    if not own.get("is_dir"):
+                        totals[index] += int(own.get("getcontentlength", 0))
+                        continue
+                    for entry in children:
+                        if not entry.get("is_dir"):
+                            totals[index] += entry.get("getcontentlength", 0)
+                            continue
+                        name = posixpath.basename(entry["href"].rstrip("/"))
+                        child = posixpath.join(directory, quote(name))
+                        pending[executor.submit(self._list, child)] = (index, child)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return totals
+
+    def _remove_protocol(self, path: str) -> str:
+        return to_url(path).split("://", 1)[-1]
+
+    def size_of_path(self, path: str) -> tuple[str, int, float, str]:
+        return self.size_of_paths([path])[0]
+
+    def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
+        totals = self._sizes(paths)
+        return size_tuples([self._remove_protocol(path) for path in paths], totals)
+
+    def get_owner(self, pathstr: str) -> str:
+        return str(self.propfind(pathstr, depth=0)[0].get("owner") or "unknown")
+
+    def is_dir(self, path: str) -> bool:
+        try:
+            return bool(self.propfind(path, depth=0)[0].get("is_dir"))
+        except FileNotFoundError:
+            return False
+
+    def ls(self, path: str) -> LsFormat:
+        own, children = self._list(path)
+        base = self._remove_protocol(path).rstrip("/")
+        if not own.get("is_dir"):
+            return _entries_to_ls_format(posixpath.dirname(base), [own])
+        return _entries_to_ls_format(base, children)
+
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        # a PROPFIND reply cannot be paged, so this slices the complete listing
+        yield from super().iter_ls(path, batch_size)
+
+    def _exists(self, path: str) -> bool:
+        try:
+            self.propfind(path, depth=0)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def mkdir(self, path: str) -> None:
+        """
+        Creates the directory and any missing parents. The missing levels are found with
+        PROPFIND (``Depth: 0``) from the bottom up and only those are created with MKCOL,
+        as storage elements refuse MKCOL on parents the user cannot write to.
+        """
+        url = urlsplit(to_url(path))
+        parts = [part for part in url.path.split("/") if part]
+        missing = []
+        for depth in range(len(parts), 0, -1):
+            directory = url._replace(path="/" + "/".join(parts[:depth]) + "/").geturl()
+            if self._exists(directory):
+                break
+            missing.append(directory)
+        for directory in reversed(missing):
+            response = self.session.request("MKCOL", directory, timeout=self.timeout)
+            # 405: the collection was created by someone else in the meantime
+            if response.status_code not in (201, 405):
+                response.raise_for_status()
+
+    def rm(self, path: str) -> None:
+        log.debug("Removing %s", path)
+        self._request("DELETE", path)
+
+    def rm_recursive(self, path: str) -> None:
+        # DELETE of a collection removes everything below it
+        log.debug("Removing %s", path)
+        self._request("DELETE", path)
+
+    def _server_side(self, method: str, src: str, dest: str, depth: str) -> None:
+        self._request(
+            method,
+            src,
+            headers={"Destination": to_url(dest), "Overwrite": "T", "Depth": depth},
+        )
+
+    def copy(self, src: str, dest: str) -> None:
+        self._server_side("COPY", src, dest, "0")
+
+    def copy_recursive(self, src: str, dest: str) -> None:
+        self._server_side("COPY", src, dest, "infinity")
+
+    def move(self, src: str, dest: str) -> None:
+        self._server_side("MOVE", src, dest, "infinity")
+
+    def _file_version(self, path: str) -> tuple[int, int] | None:
+        entry = self.propfind(path, depth=0)[0]
+        if "getcontentlength" not in entry or "modified" not in entry:
+            return None
+        return entry["getcontentlength"], int(entry["modified"].timestamp())
+
+    def _get_range(self, path: str, start: int, end: int) -> bytes:
+        response = self._request(
+            "GET", path, headers={"Range": f"bytes={start}-{end - 1}"}
+        )
+        if response.status_code != 206:
+            msg = f"Server ignored the range request for {path}"
+            raise OSError(msg)
+        return response.content
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Fetches files larger than one chunk as ranges, up to ``max_concurrency`` at a time,
+        and yields them in order. Files are streamed with a single GET if the server does
+        not support range requests.
+        """
+        head = self._request("HEAD", path)
+        size = int(head.headers.get("Content-Length", 0))
+        if size <= chunk_size or head.headers.get("Accept-Ranges") != "bytes":
+            with self._request("GET", path, stream=True) as response:
+                yield from response.iter_content(chunk_size)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending: deque[Future[bytes]] = deque()
+            for start in range(0, size, chunk_size):
+                end = min(start + chunk_size, size)
+                pending.append(executor.submit(self._get_range, path, start, end))
+                if len(pending) >= self.max_concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        # requests sends iterables with chunked transfer encoding
+        self._request("PUT", path, data=iter(chunks))
@@ -0,0 +1,146 @@
+"""
+In-process, parallel equivalent of ``rm -fr``.
+
+Every directory is scanned as a separate task on a bounded thread pool and its files are
+unlinked by that task, so millions of small files are removed by all workers at once
+instead of one at a time. Directories are removed afterwards, deepest level first, with
+every level spread over the pool as well.
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from ..logger import log
+from ._du import DEFAULT_MAX_WORKERS
+from ._progress import PROGRESS_INTERVAL, Progress, ProgressCallback
+
+
+class _TreeDelete:
+    """Shared state of the tasks deleting one or more trees."""
+
+    def __init__(self, executor: ThreadPoolExecutor, dry_run: bool) -> None:
+        self.executor = executor
+        self.dry_run = dry_run
+        self.progress = Progress()
+        self.pending = 0
+        self.finished = threading.Condition()
+        # directories by depth, removed once all files are gone
+        self.directories: dict[int, list[str]] = defaultdict(list)
+
+    def _remove_file(self, path: str, size: int) -> None:
+        if not self.dry_run:
+            try:
+                Path(path).unlink()
+            except FileNotFoundError:
+                return
+            except OSError as e:
+                log.error("Could not remove %s: %s", path, e)
+                self.progress.fail(path)
+                return
+        self.progress.add(files=1, nbytes=size)
+
+    def _scan(self, path: str, depth: int) -> None:
+        subdirectories = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        subdirectories.append(entry.path)
+                    else:
+                        self._remove_file(entry.path, st.st_size)
+        except OSError as e:
+            log.error("Could not read directory %s: %s", path, e)
+            self.progress.fail(path)
+        finally:
+            with self.finished:
+                self.directories[depth + 1].extend(subdirectories)
+                # register the children before this task is marked as finished
+                self.pending += len(subdirectories) - 1
+                self.finished.notify()
+        for subdirectory in subdirectories:
+            self.executor.submit(self._scan, subdirectory, depth + 1)
+
+    def start(self, path: str) -> None:
+        """Removes ``path`` if it is a file, or schedules the walk of its contents."""
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            # like rm -f, missing paths are not an error
+            return
+        if not stat.S_ISDIR(st.st_mode):
+            self._remove_file(path, st.st_size)
+            return
+        with self.finished:
+            self.directories[0].append(path)
+            self.pending += 1
+        self.executor.submit(self._scan, path, 0)
+
+    def wait(self, on_progress: ProgressCallback) -> None:
+        with self.finished:
+            while self.pending:
+                if (
+                    not self.finished.wait(timeout=PROGRESS_INTERVAL)
+                    and on_progress is not None
+                ):
+                    on_progress(self.progress)
+
+    def _remove_directory(self, path: str) -> None:
+        try:
+            Path(path).rmdir()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            log.error("Could not remove directory %s: %s", path, e)
+            self.progress.fail(path)
+
+    def remove_directories(self) -> None:
+        """Removes the directories bottom-up, each level in parallel."""
+        for depth in sorted(self.directories, reverse=True):
+            list(self.executor.map(self._remove_directory, self.directories[depth]))
+
+
+def delete_trees(
+    paths: Iterable[str],
+    max_workers: int | None = None,
+    dry_run: bool = False,
+    on_progress: ProgressCallback = None,
+) -> Progress:
+    """
+    Removes files and directory trees like ``rm -fr``, using up to ``max_workers`` threads.
+    Symbolic links are removed, never followed. With ``dry_run`` nothing is removed and the
+    returned Progress holds the number of files and bytes that would be. ``on_progress`` is
+    called about every PROGRESS_INTERVAL seconds with the running totals and once at the end.
+    Raises OSError once everything else has been removed if anything failed.
+    """
+    paths = list(paths)
+    with ThreadPoolExecutor(max_workers=max_workers or DEFAULT_MAX_WORKERS) as executor:
+        tree = _TreeDelete(executor, dry_run)
+        for path in paths:
+            tree.start(path)
+        tree.wait(on_progress)
+        if not dry_run:
+            tree.remove_directories()
+    progress = tree.progress
+    if on_progress is not None:
+        on_progress(progress)
+    log.info(
+        "%s %s: %s",
+        "Would remove" if dry_run else "Removed",
+        ", ".join(paths),
+        progress,
+    )
+    if progress.failed:
+        msg = f"Could not remove {len(progress.failed)} paths below {', '.join(paths)}"
+        raise OSError(msg)
+    return progress
@@ -0,0 +1,158 @@
+"""
+Filtered, concurrent directory walks behind ``FileSystem.find``.
+
+Every listing is filtered with a single Arrow compute expression as soon as it arrives, so
+only matching entries are kept and converted. Directories are listed concurrently, and
+excluded directories, as well as those below ``max_depth``, are never listed.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import posixpath
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import timedelta
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from ..logger import log
+
+# directories listed at the same time
+DEFAULT_MAX_WORKERS = 16
+# find-style types and the first character of the permissions they match
+FILE_TYPES = {"f": "-", "d": "d", "l": "l"}
+
+Listing = Iterable[Any]
+
+
+def _glob_regex(pattern: str) -> str:
+    """``fnmatch`` pattern as a regular expression for Arrow, which uses RE2 syntax."""
+    regex = fnmatch.translate(pattern)
+    # RE2 spells Python's end-of-string anchor \Z as \z
+    return regex[:-2] + r"\z" if regex.endswith(r"\Z") else regex
+
+
+def build_filter(
+    name_glob: str | None = None,
+    min_size: int | None = None,
+    max_size: int | None = None,
+    older_than: timedelta | None = None,
+    owner: str | None = None,
+    type: str | None = None,  # pylint: disable=redefined-builtin
+    now: float | None = None,
+) -> pc.Expression:
+    """
+    Returns the Arrow expression that selects the entries of an LsFormat table matching all
+    of the given conditions. ``name_glob`` is matched against the ``basename`` column.
+    """
+    expression = pc.scalar(True)
+    if name_glob is not None:
+        expression &= pc.match_substring_regex(
+            pc.field("basename"), _glob_regex(name_glob)
+        )
+    if min_size is not None:
+        expression &= pc.field("size") >= min_size
+    if max_size is not None:
+        expression &= pc.field("size") <= max_size
+    if older_than is not None:
+        cutoff = (time.time() if now is None else now) - older_than.total_seconds()
+        expression &= pc.field("date") < pa.scalar(
+            int(cutoff * 1e9), type=pa.timestamp("ns", tz="UTC")
+        )
+    if owner is not None:
+        expression &= pc.field("owner").cast(pa.string()) == owner
+    if type is not None:
+        if type not in FILE_TYPES:
+            msg = f"Unknown type {type!r}, expected one of {list(FILE_TYPES)}"
+            raise ValueError(msg)
+        expression &= pc.starts_with(
+            pc.field("permissions").cast(pa.string()), FILE_TYPES[type]
+        )
+    return expression
+
+
+def _with_paths(directory: str, table: pa.Table) -> pa.Table:
+    """Replaces the names by full paths below ``directory`` and adds a basename column."""
+    # some backends list names, others full paths
+    basenames = [
+        posixpath.basename(name.rstrip("/"))
+        for name in table.column("name").to_pylist()
+    ]
+    paths = [posixpath.join(directory, name) for name in basenames]
+    table = table.set_column(
+        table.schema.get_field_index("name"), "name", pa.array(paths, pa.string())
+    )
+    return table.append_column("basename", pa.array(basenames, pa.string()))
+
+
+def filter_listing(
+    directory: str, table: pa.Table, expression: pc.Expression
+) -> pa.Table:
+    """Entries of a listing of ``directory`` that match ``expression``, with full paths."""
+    return _with_paths(directory, table).filter(expression).drop_columns(["basename"])
+
+
+def iter_find(
+    list_directory: Callable[[str], Listing],
+    root: str,
+    expression: pc.Expression,
+    max_depth: int | None = None,
+    exclude: Sequence[str] = (),
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> Iterator[pa.Table]:
+    """
+    Walks the directory ``root`` with up to ``max_workers`` listings in flight and yields the
+    entries matching ``expression``, as LsFormat tables with full paths, as they are found.
+    ``list_directory`` returns the listing batches of a directory (e.g.
+    ``FileSystem.iter_ls``). Directories whose name matches one of the ``exclude`` globs
+    are skipped with everything below them. Like ``find -maxdepth``, the entries of ``root``
+    are on level 1 and nothing deeper than ``max_depth`` levels is visited; ``root`` itself
+    is never yielded, so ``max_depth`` must be at least 1. Directories that cannot be
+    listed are logged and skipped, the walk carries on.
+    """
+    if max_depth is not None and max_depth < 1:
+        msg = f"max_depth must be at least 1, got {max_depth}"
+        raise ValueError(msg)
+    root = root.rstrip("/") or "/"
+    descend = pc.starts_with(pc.field("permissions").cast(pa.string()), "d")
+    for pattern in exclude:
+        descend &= ~pc.match_substring_regex(pc.field("basename"), _glob_regex(pattern))
+
+    def list_tables(directory: str) -> list[pa.Table]:
+        return [batch.to_arrow() for batch in list_directory(directory)]
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        pending: dict[Future[list[pa.Table]], tuple[str, int]] = {
+            executor.submit(list_tables, root): (root, 1)
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory, depth = pending.pop(future)
+                try:
+                    listings = future.result()
+                except OSError as e:
+                    # like find, an unreadable directory does not stop the search
+                    log.error("Could not read directory %s: %s", directory, e)
+                    continue
+                for listing in listings:
+                    table = _with_paths(directory, listing)
+                    matches = table.filter(expression)
+                    if matches.num_rows:
+                        yield matches.drop_columns(["basename"])
+                    if max_depth is not None and depth >= max_depth:
+                        continue
+                    for subdirectory in (
+                        table.filter(descend).column("name").to_pylist()
+                    ):
+                        pending[executor.submit(list_tables, subdirectory)] = (
+                            subdirectory,
+                            depth + 1,
+                        )
+    finally:
+        # the caller may stop early, queued listings are not needed any more
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,26 +1,90 @@
 from __future__ import annotations
 
+import posixpath
+import stat
+import threading
+import time
 import xml.etree.ElementTree as ET
-from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, Sequence
 
+import numpy as np
+import pyarrow as pa
+import pyarrow.dataset as ds
 import pyhdfs
+import requests
+from requests.adapters import HTTPAdapter
 
 from ..logger import log
-from ..units import convert_to_largest_unit
-from ..user import current_user
-from ._base import FileSystem, LsFormat
+from ..units import convert_to_largest_unit_array
+from ..user import current_user, get_user_index
+from ._base import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_LS_BATCH_SIZE,
+    FileSystem,
+    LsFormat,
+    size_tuples,
+)
+from ._checksum import DEFAULT_ALGORITHM, ChecksumCache, checksum_chunks
+from ._progress import PROGRESS_INTERVAL, Progress, ProgressCallback
 
 CONF = "/etc/hadoop/conf/hdfs-site.xml"
+# connection pool of the shared HTTP session: one pool per namenode/datanode host
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 32
 
+_REGISTRY_LOCK = threading.Lock()
+# conf path -> (mtime, namenodes)
+_NAMENODES: dict[str, tuple[int, list[str]]] = {}
+# (user, sorted namenodes, timeout) -> client
+_CLIENTS: dict[tuple[str, tuple[str, ...], float], pyhdfs.HdfsClient] = {}
+# limits on concurrent namenode requests, see HDFS.iter_size_of_paths
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_REQUEST_TIMEOUT = 20.0
+# copies stream the data through this process in chunks of this size
+COPY_CHUNK_SIZE = 8 * 1024 * 1024
+# concurrent file transfers and retries per file of HDFS.copy_recursive
+DEFAULT_MAX_TRANSFERS = 8
+DEFAULT_TRANSFER_RETRIES = 3
+RETRY_DELAY = 1.0
+# checksum algorithm computed by the datanodes (MD5 of the block MD5s of the chunk CRCs)
+SERVER_CHECKSUM = "hdfs"
 
-def __get_namenodes() -> list[str]:
+# file type bits used to render HDFS permissions like ``ls -l``
+_FILE_TYPES = {
+    "DIRECTORY": stat.S_IFDIR,
+    "FILE": stat.S_IFREG,
+    "SYMLINK": stat.S_IFLNK,
+}
+
+# one record per file or directory, as written by HDFS.scan_namespace
+NAMESPACE_SCHEMA = pa.schema(
+    [
+        ("path", pa.string()),
+        # first path component below the scanned root, used to partition the dataset
+        ("top_level", pa.string()),
+        ("type", pa.string()),
+        ("owner", pa.string()),
+        ("group", pa.string()),
+        ("length", pa.int64()),
+        ("replication", pa.int16()),
+        ("space_consumed", pa.int64()),
+        ("mtime", pa.timestamp("ms", tz="UTC")),
+    ]
+)
+# (upper limit in days, label) of the age buckets used by namespace_report
+AGE_BUCKETS = ((30, "<30d"), (90, "30d-90d"), (365, "90d-1y"), (3 * 365, "1y-3y"))
+OLDEST_AGE_BUCKET = ">3y"
+
+
+def _parse_namenodes(conf: str) -> list[str]:
     """
     Get the list of namenodes from the HDFS configuration file.
     """
 
-    tree = ET.parse(CONF)
+    tree = ET.parse(conf)
     root = tree.getroot()
     namenodes = []
 
@@ -38,11 +102,375 @@ def __get_namenodes() -> list[str]:
     return namenodes
 
 
-def get_hdfs_client(user: str) -> Any:
-    """Retrieving the HDFS client to execute operations on HDFS."""
-    namenodes = __get_namenodes()
-    log.debug("Connecting to HDFS via %s", namenodes)
-    return pyhdfs.HdfsClient(namenodes, user_name=user)  # can throw AssertionError
+def get_namenodes(conf: str | None = None) -> list[str]:
+    """
+    Returns the namenodes from the HDFS configuration file.
+    The parsed list is cached until the modification time of the file changes.
+    """
+    conf = conf or CONF
+    mtime = Path(conf).stat().st_mtime_ns
+    with _REGISTRY_LOCK:
+        cached = _NAMENODES.get(conf)
+        if cached is not None and cached[0] == mtime:
+            return list(cached[1])
+    namenodes = _parse_namenodes(conf)
+    with _REGISTRY_LOCK:
+        _NAMENODES[conf] = (mtime, namenodes)
+    return list(namenodes)
+
+
+@lru_cache(maxsize=None)
+def _shared_session() -> requests.Session:
+    """HTTP session with a keep-alive connection pool, shared by all HDFS clients and threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _active_namenode(namenodes: tuple[str, ...]) -> str | None:
+    """Returns the namenode most recently found to be active by any cached client."""
+    active, last_seen = None, 0.0
+    for (_, hosts, _), client in _CLIENTS.items():
+        # pylint: disable-next=protected-access
+        seen = client._last_time_recorded_active
+        if hosts == namenodes and seen is not None and seen > last_seen:
+            active, last_seen = client.hosts[0], seen
+    return active
+
+
+def get_hdfs_client(user: str, timeout: float = DEFAULT_REQUEST_TIMEOUT) -> Any:
+    """
+    Retrieving the HDFS client to execute operations on HDFS.
+    Clients are cached per (user, namenodes, timeout) for the lifetime of the process. New
+    clients start with the namenode that is known to be active, so standby namenodes are not
+    probed again, and all of them share one keep-alive connection pool.
+    ``timeout`` is the time in seconds to wait for a single namenode to answer a request.
+    """
+    namenodes = get_namenodes()
+    key = (user, tuple(sorted(namenodes)), timeout)
+    with _REGISTRY_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            active = _active_namenode(key[1])
+            if active is not None:
+                namenodes = [active] + [host for host in namenodes if host != active]
+            log.debug("Connecting to HDFS via %s", namenodes)
+            client = pyhdfs.HdfsClient(  # can throw AssertionError
+                namenodes,
+                user_name=user,
+                timeout=timeout,
+                randomize_hosts=active is None,
+                requests_session=_shared_session(),
+            )
+            _CLIENTS[key] = client
+    return client
+
+
+def clear_client_cache() -> None:
+    """Forgets all cached HDFS clients and namenode lists, e.g. after a fork."""
+    with _REGISTRY_LOCK:
+        _CLIENTS.clear()
+        _NAMENODES.clear()
+    _shared_session.cache_clear()
+
+
+def iter_status_pages(client: pyhdfs.HdfsClient, path: str) -> Iterator[list[Any]]:
+    """
+    Yields the raw ``FileStatus`` entries of a directory, one page at a time.
+    Uses ``LISTSTATUS_BATCH`` so that huge directories are fetched in chunks of the
+    namenode's ``dfs.ls.limit``; falls back to a single ``LISTSTATUS`` for namenodes that
+    do not support batched listings.
+    """
+    start_after: str | None = None
+    while True:
+        params = {} if start_after is None else {"startAfter": start_after}
+        try:
+            # pylint: disable-next=protected-access
+            response = client._get(path, "LISTSTATUS_BATCH", **params)
+        except (
+            pyhdfs.HdfsUnsupportedOperationException,
+            pyhdfs.HdfsIllegalArgumentException,
+        ):
+            if start_after is not None:
+                raise
+            log.debug("LISTSTATUS_BATCH not supported, falling back to LISTSTATUS")
+            # pylint: disable-next=protected-access
+            response = client._get(path, "LISTSTATUS")
+            yield response.json()["FileStatuses"]["FileStatus"]
+            return
+        listing = response.json()["DirectoryListing"]
+        statuses = listing["partialListing"]["FileStatuses"]["FileStatus"]
+        yield statuses
+        if not statuses or not listing.get("remainingEntries"):
+            return
+        start_after = statuses[-1]["pathSuffix"]
+
+
+def _render_permissions(file_type: str, permission: str) -> str:
+    """Renders an HDFS type and octal permission (e.g. DIRECTORY, 755) as ``drwxr-xr-x``."""
+    return stat.filemode(_FILE_TYPES.get(file_type, 0) | int(permission, 8))
+
+
+def statuses_to_ls_format(path: str, statuses: list[Any]) -> LsFormat:
+    """Builds the LsFormat columns for a page of raw ``FileStatus`` entries of ``path``."""
+    size = [status["length"] for status in statuses]
+    size_scaled, size_unit = convert_to_largest_unit_array(size, "B", scale=1024)
+    return LsFormat(
+        permissions=[
+            _render_permissions(status["type"], status["permission"])
+            for status in statuses
+        ],
+        owner=[status["owner"] for status in statuses],
+        group=[status["group"] for status in statuses],
+        size=size,
+        size_scaled=size_scaled,
+        size_unit=size_unit,
+        # WebHDFS reports modification times in milliseconds since the epoch
+        date=pa.array(
+            [status["modificationTime"] for status in statuses],
+            type=pa.timestamp("ms", tz="UTC"),
+        ),
+        # listing a file returns the file itself with an empty suffix
+        name=[
+            posixpath.join(path, status["pathSuffix"]) if status["pathSuffix"] else path
+            for status in statuses
+        ],
+    )
+
+
+def _top_level(root: str, path: str) -> str:
+    relative = path[len(root) :].lstrip("/")
+    return relative.split("/", 1)[0]
+
+
+def _namespace_batch(root: str, records: list[tuple[Any, ...]]) -> pa.RecordBatch:
+    """Builds a NAMESPACE_SCHEMA batch from (path, type, owner, group, length, replication,
+    mtime in ms) tuples."""
+    paths, types, owners, groups, lengths, replications, mtimes = (
+        zip(*records) if records else ([],) * 7
+    )
+    length = np.asarray(lengths, dtype=np.int64)
+    replication = np.asarray(replications, dtype=np.int16)
+    return pa.RecordBatch.from_arrays(
+        [
+            pa.array(paths, type=pa.string()),
+            pa.array([_top_level(root, path) for path in paths], type=pa.string()),
+            pa.array(types, type=pa.string()),
+            pa.array(owners, type=pa.string()),
+            pa.array(groups, type=pa.string()),
+            pa.array(length),
+            pa.array(replication),
+            pa.array(length * replication),
+            pa.array(mtimes, type=pa.timestamp("ms", tz="UTC")),
+        ],
+        schema=NAMESPACE_SCHEMA,
+    )
+
+
+def iter_namespace(
+    client: pyhdfs.HdfsClient, root: str, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT
+) -> Iterator[pa.RecordBatch]:
+    """
+    Walks the namespace below ``root`` and yields one NAMESPACE_SCHEMA batch per directory.
+    Directories are listed concurrently (at most ``max_in_flight`` at a time) with batched
+    listings, so the number of requests is about the number of directories, not of files.
+    """
+    root = root.rstrip("/") or "/"
+
+    def list_directory(path: str) -> tuple[str, list[Any]]:
+        return path, [
+            status for page in iter_status_pages(client, path) for status in page
+        ]
+
+    executor = ThreadPoolExecutor(max_workers=max_in_flight)
+    try:
+        pending = {executor.submit(list_directory, root)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                path, statuses = future.result()
+                records = []
+                for status in statuses:
+                    name = (
+                        posixpath.join(path, status["pathSuffix"])
+                        if status["pathSuffix"]
+                        else path
+                    )
+                    if status["type"] == "DIRECTORY":
+                        pending.add(executor.submit(list_directory, name))
+                    records.append(
+                        (
+                            name,
+                            status["type"],
+                            status["owner"],
+                            status["group"],
+                            status["length"],
+                            status.get("replication", 0),
+                            status["modificationTime"],
+                        )
+                    )
+                if records:
+                    yield _namespace_batch(root, records)
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _parse_inode(element: ET.Element) -> tuple[Any, ...]:
+    """(name, type, owner, group, length, replication, mtime) of an fsimage XML inode."""
+    # permissions are stored as <owner>:<group>:<octal mode>
+    owner, group, _ = (element.findtext("permission") or "::").split(":", 2)
+    length = sum(
+        int(block.findtext("numBytes") or 0) for block in element.iter("block")
+    )
+    return (
+        element.findtext("name") or "",
+        element.findtext("type") or "",
+        owner,
+        group,
+        length,
+        int(element.findtext("replication") or 0),
+        int(element.findtext("mtime") or 0),
+    )
+
+
+def iter_fsimage(
+    xml_path: str | Path, root: str = "/", batch_size: int = DEFAULT_LS_BATCH_SIZE
+) -> Iterator[pa.RecordBatch]:
+    """
+    Reads an offline fsimage dump (``hdfs oiv -p XML -i <fsimage> -o <xml_path>``) and yields
+    the files and directories below ``root`` as NAMESPACE_SCHEMA batches, without contacting
+    the namenode. Paths are only known once the INodeDirectorySection has been read, so the
+    inodes are kept in memory until then.
+    """
+    root = root.rstrip("/") or "/"
+    inodes: dict[int, tuple[Any, ...]] = {}
+    parents: dict[int, int] = {}
+    section = ""
+    for event, element in ET.iterparse(str(xml_path), events=("start", "end")):
+        if event == "start":
+            if element.tag.endswith("Section"):
+                section = element.tag
+            continue
+        if section == "INodeSection" and element.tag == "inode":
+            inodes[int(element.findtext("id") or 0)] = _parse_inode(element)
+            element.clear()
+        elif section == "INodeDirectorySection" and element.tag == "directory":
+            parent = int(element.findtext("parent") or 0)
+            for child in element.iterfind("child"):
+                parents[int(child.text or 0)] = parent
+            element.clear()
+
+    # the root inode is the only one without a name; inodes without a parent (only
+    # referenced by snapshots) and references to inodes missing from the INodeSection
+    # (e.g. snapshot reference inodes) are skipped
+    directories = {
+        inode: "/"
+        for inode, record in inodes.items()
+        if not record[0] and record[1] == "DIRECTORY"
+    }
+
+    def directory_path(inode: int) -> str | None:
+        chain = []
+        while inode not in directories:
+            if inode not in parents or inode not in inodes:
+                return None
+            chain.append(inode)
+            inode = parents[inode]
+        for child in reversed(chain):
+            directories[child] = posixpath.join(directories[inode], inodes[child][0])
+            inode = child
+        return directories[inode]
+
+    prefix = root.rstrip("/") + "/"
+    records = []
+    for inode, parent in parents.items():
+        parent_path = directory_path(parent)
+        if parent_path is None or inode not in inodes:
+            continue
+        record = inodes[inode]
+        path = posixpath.join(parent_path, record[0])
+        if not path.startswith(prefix):
+            continue
+        records.append((path, *record[1:]))
+        if len(records) >= batch_size:
+            yield _namespace_batch(root, records)
+            records = []
+    if records:
+        yield _namespace_batch(root, records)
+
+
+def write_namespace_dataset(
+    batches: Iterable[pa.RecordBatch], dest: str | Path
+) -> None:
+    """
+    Streams namespace batches into a Parquet dataset at ``dest``, partitioned (hive style)
+    by top-level directory. Partitions already present in ``dest`` are replaced.
+    """
+    ds.write_dataset(
+        batches,
+        str(dest),
+        schema=NAMESPACE_SCHEMA,
+        format="parquet",
+        partitioning=["top_level"],
+        partitioning_flavor="hive",
+        existing_data_behavior="delete_matching",
+    )
+
+
+def _age_buckets(mtime: pa.ChunkedArray, now: float) -> pa.Array:
+    age_days = (now * 1000 - mtime.cast(pa.int64()).to_numpy()) / 86_400_000
+    limits = np.array([limit for limit, _ in AGE_BUCKETS])
+    labels = np.array([label for _, label in AGE_BUCKETS] + [OLDEST_AGE_BUCKET])
+    return pa.array(labels[np.searchsorted(limits, age_days, side="right")])
+
+
+def namespace_report(
+    dataset_path: str | Path,
+    by: Sequence[str] = ("owner",),
+    now: float | None = None,
+    full_names: bool = False,
+) -> pa.Table:
+    """
+    Summarises the files of a namespace dataset: number of files, total length and space
+    consumed (including replication) grouped by any of ``owner``, ``group``, ``top_level``
+    and ``age`` (bucket of the time since the last modification, see AGE_BUCKETS).
+    Rows are sorted by space consumed, largest first. With ``full_names`` a report by
+    owner gets a ``full_name`` column from the user index.
+    """
+    dataset = ds.dataset(str(dataset_path), format="parquet", partitioning="hive")
+    keys = [key for key in by if key != "age"]
+    table = dataset.to_table(
+        columns=[*keys, "path", "length", "space_consumed", "mtime"],
+        filter=ds.field("type") == "FILE",
+    )
+    if "age" in by:
+        table = table.append_column(
+            "age", _age_buckets(table["mtime"], time.time() if now is None else now)
+        )
+    report = table.group_by(list(by)).aggregate(
+        [("path", "count"), ("length", "sum"), ("space_consumed", "sum")]
+    )
+    report = report.select(
+        [*by, "path_count", "length_sum", "space_consumed_sum"]
+    ).rename_columns([*by, "files", "length", "space_consumed"])
+    if full_names and "owner" in by:
+        owners = report.column("owner").to_pylist()
+        report = report.add_column(
+            by.index("owner") + 1,
+            "full_name",
+            pa.array(get_user_index().full_names(owners), type=pa.string()),
+        )
+    return report.sort_by([("space_consumed", "descending")])
+
+
+def _iter_chunks(reader: Any, chunk_size: int) -> Iterator[bytes]:
+    while True:
+        chunk = reader.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
 
 
 class HDFS(FileSystem):
@@ -54,63 +482,306 @@ class HDFS(FileSystem):
     def __init__(
         self,
         user: str | None = None,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
     ):
         self.user = current_user() if user is None else user
-        self.fs = get_hdfs_client(self.user)
+        # maximum number of concurrent requests to the namenode
+        self.max_in_flight = max_in_flight
+        self.fs = get_hdfs_client(self.user, timeout=request_timeout)
+
+    def _remove_protocol(self, path: str) -> str:
+        return path.replace(self.protocol, "")
 
     def size_of_path(self, path: str) -> tuple[str, int, float, str]:
-        cs = self.fs.get_content_summary(path)
-        total = cs.spaceConsumed
-        total_scaled, unit = convert_to_largest_unit(total, "B", scale=1024)
-        return str(path), total, total_scaled, unit
+        return self.size_of_paths([path])[0]
 
     def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
-        return [self.size_of_path(path) for path in paths]
+        paths = [self._remove_protocol(path) for path in paths]
+        totals = [0] * len(paths)
+        for index, total in self._iter_space_consumed(paths):
+            totals[index] = total
+        return size_tuples(paths, totals)
+
+    def iter_size_of_paths(
+        self, paths: list[str]
+    ) -> Iterator[tuple[str, int, float, str]]:
+        """
+        Like ``size_of_paths``, but yields the sizes in the order the namenode answers.
+        Stopping the iteration early cancels the requests that have not been sent yet.
+        """
+        paths = [self._remove_protocol(path) for path in paths]
+        for index, total in self._iter_space_consumed(paths):
+            yield size_tuples([paths[index]], [total])[0]
+
+    def _iter_space_consumed(self, paths: list[str]) -> Iterator[tuple[int, int]]:
+        """
+        Yields (index, space consumed) for the given paths as the content summaries arrive,
+        with at most ``max_in_flight`` requests outstanding.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight)
+        try:
+            futures = {
+                executor.submit(self.fs.get_content_summary, path): index
+                for index, path in enumerate(paths)
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result().spaceConsumed
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def get_owner(self, pathstr: str) -> str:
         status: pyhdfs.FileStatus = self.status(pathstr)
         return str(status.owner)
 
     def ls(self, path: str) -> LsFormat:
-        paths = self.fs.listdir(path)
-        listing: dict[str, Any] = defaultdict(list)
-        for relative_path in paths:
-            full_path = str(Path(path) / Path(relative_path))
-            status = self.status(full_path)
-            listing["permissions"].append(status.permission)
-            listing["owner"].append(status.owner)
-            listing["group"].append(status.group)
-            raw_size = status.length
-            listing["size"].append(raw_size)
-            tmp_size_scaled, tmp_unit = convert_to_largest_unit(
-                raw_size, "B", scale=1024
-            )
-            listing["size_scaled"].append(tmp_size_scaled)
-            listing["size_unit"].append(tmp_unit)
-            listing["date"].append(status.modificationTime)
-            listing["name"].append(full_path)
-        return LsFormat(**listing)
+        path = self._remove_protocol(path)
+        return LsFormat.concat(
+            [
+                statuses_to_ls_format(path, statuses)
+                for statuses in iter_status_pages(self.fs, path)
+            ]
+        )
+
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        path = self._remove_protocol(path)
+        pending: list[Any] = []
+        for statuses in iter_status_pages(self.fs, path):
+            pending.extend(statuses)
+            while len(pending) >= batch_size:
+                yield statuses_to_ls_format(path, pending[:batch_size])
+                pending = pending[batch_size:]
+        if pending:
+            yield statuses_to_ls_format(path, pending)
+
+    def scan_namespace(
+        self, path: str, dest: str | Path, fsimage: str | Path | None = None
+    ) -> None:
+        """
+        Writes a record of every file and directory below ``path`` into the Parquet dataset
+        ``dest``, for per-owner and per-group accounting with ``namespace_report``.
+        Reads the XML dump ``fsimage`` if given instead of listing the live namespace.
+        """
+        path = self._remove_protocol(path)
+        if fsimage is not None:
+            batches = iter_fsimage(fsimage, root=path)
+        else:
+            batches = iter_namespace(self.fs, path, max_in_flight=self.max_in_flight)
+        log.info("Scanning HDFS namespace below %s into %s", path, dest)
+        write_namespace_dataset(batches, dest)
 
     def status(self, path: str) -> Any:
         """Returns the status of a file or directory."""
-        return self.fs.get_file_status(path)
+        return self.fs.get_file_status(self._remove_protocol(path))
 
     def mkdir(self, path: str) -> None:
-        self.fs.mkdirs(path)
+        self.fs.mkdirs(self._remove_protocol(path))
 
     def rm(self, path: str) -> None:
+        path = self._remove_protocol(path)
         log.debug("Removing %s", path)
         self.fs.delete(path)
 
     def rm_recursive(self, path: str) -> None:
+        path = self._remove_protocol(path)
         log.debug("Removing %s", path)
         self.fs.delete(path, recursive=True)
 
+    def is_dir(self, path: str) -> bool:
+        path = self._remove_protocol(path)
+        try:
+            return bool(self.fs.get_file_status(path).type == "DIRECTORY")
+        except pyhdfs.HdfsFileNotFoundException:
+            return False
+
+    def _target(self, src: str, dest: str) -> str:
+        """Like ``cp``: copying into an existing directory keeps the source name."""
+        if self.is_dir(dest):
+            return posixpath.join(dest, posixpath.basename(src.rstrip("/")))
+        return dest
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        reader = self.fs.open(self._remove_protocol(path))
+        try:
+            yield from _iter_chunks(reader, chunk_size)
+        finally:
+            reader.close()
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        # requests sends iterables with chunked transfer encoding
+        self.fs.create(
+            self._remove_protocol(path),
+            iter(chunks),  # type: ignore[arg-type]
+            overwrite=True,
+        )
+
+    def _copy_file(self, src: str, dest: str) -> None:
+        """Streams ``src`` into ``dest`` chunk by chunk, the file is never held in memory."""
+        log.debug("Copying %s to %s", src, dest)
+        self.write_chunks(dest, self.read_chunks(src, COPY_CHUNK_SIZE))
+
+    def _copy_file_with_retries(self, src: str, dest: str, retries: int) -> None:
+        for attempt in range(retries + 1):
+            try:
+                self._copy_file(src, dest)
+                return
+            except (pyhdfs.HdfsException, requests.RequestException) as e:
+                if attempt == retries:
+                    raise
+                log.warning(
+                    "Copying %s failed (attempt %d/%d): %s",
+                    src,
+                    attempt + 1,
+                    retries + 1,
+                    e,
+                )
+                time.sleep(RETRY_DELAY * 2**attempt)
+
     def copy(self, src: str, dest: str) -> None:
-        pass
+        src, dest = self._remove_protocol(src), self._remove_protocol(dest)
+        self._copy_file(src, self._target(src, dest))
 
-    def copy_recursive(self, src: str, dest: str) -> None:
-        pass
+    def copy_recursive(
+        self,
+        src: str,
+        dest: str,
+        max_transfers: int = DEFAULT_MAX_TRANSFERS,
+        retries: int = DEFAULT_TRANSFER_RETRIES,
+    ) -> None:
+        """
+        Copies a directory tree, running up to ``max_transfers`` file copies at a time.
+        A failed file copy is retried ``retries`` times with an exponential back-off; files
+        that still fail are reported once all the others have been copied.
+        """
+        src = self._remove_protocol(src).rstrip("/") or "/"
+        dest = self._target(src, self._remove_protocol(dest))
+        if not self.is_dir(src):
+            self._copy_file_with_retries(src, dest, retries)
+            return
+        self.fs.mkdirs(dest)
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_transfers) as executor:
+            futures = {}
+            for batch in iter_namespace(self.fs, src, self.max_in_flight):
+                for path, file_type in zip(
+                    batch.column("path").to_pylist(), batch.column("type").to_pylist()
+                ):
+                    target = dest + path[len(src) :]
+                    if file_type == "DIRECTORY":
+                        self.fs.mkdirs(target)
+                    else:
+                        future = executor.submit(
+                            self._copy_file_with_retries, path, target, retries
+                        )
+                        futures[future] = path
+            for future in as_completed(futures):
+                if future.exception() is not None:
+                    log.error(
+                        "Could not copy %s: %s", futures[future], future.exception()
+                    )
+                    failed.append(futures[future])
+        if failed:
+            msg = f"Could not copy {len(failed)} of {len(futures)} files from {src} to {dest}"
+            raise pyhdfs.HdfsException(msg)
 
     def move(self, src: str, dest: str) -> None:
-        pass
+        """Moves with a server-side rename, no data is transferred."""
+        src, dest = self._remove_protocol(src), self._remove_protocol(dest)
+        log.debug("Moving %s to %s", src, dest)
+        if not self.fs.rename(src, dest):
+            msg = f"Could not move {src} to {dest}"
+            raise pyhdfs.HdfsException(msg)
+
+    def _checksum(self, path: str, algorithm: str, cache: ChecksumCache | None) -> str:
+        if algorithm == SERVER_CHECKSUM:
+            return str(self.fs.get_file_checksum(path).bytes)
+        if cache is None:
+            return checksum_chunks(self.read_chunks(path), algorithm)
+        status = self.fs.get_file_status(path)
+        key = (self.protocol + path, algorithm, status.length, status.modificationTime)
+        checksum = cache.get(*key)
+        if checksum is None:
+            checksum = checksum_chunks(self.read_chunks(path), algorithm)
+            cache.put(*key, checksum)
+        return checksum
+
+    def checksum(
+        self,
+        paths: list[str],
+        algorithm: str = DEFAULT_ALGORITHM,
+        cache: ChecksumCache | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields (path, checksum) as they complete, ``max_in_flight`` files at a time.
+        ``SERVER_CHECKSUM`` asks the datanodes for the native HDFS checksum, no data is
+        transferred. HDFS cannot compute adler32 or md5 of the file contents, so those
+        are streamed and computed here; they can be cached by (path, size, mtime).
+        """
+        paths = [self._remove_protocol(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = {
+                executor.submit(self._checksum, path, algorithm, cache): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _delete_tree(self, path: str, dry_run: bool, progress: Progress) -> None:
+        try:
+            summary = self.fs.get_content_summary(path)
+        except pyhdfs.HdfsFileNotFoundException:
+            # like rm -f, missing paths are not an error
+            return
+        if not dry_run:
+            log.debug("Removing %s", path)
+            if not self.fs.delete(path, recursive=True):
+                msg = f"Could not remove {path}"
+                raise pyhdfs.HdfsException(msg)
+        progress.add(files=summary.fileCount, nbytes=summary.length)
+
+    def bulk_delete(
+        self,
+        paths: list[str],
+        dry_run: bool = False,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        """
+        Removes many files and directory trees, ``max_in_flight`` at a time. Each tree is
+        deleted by the namenode in a single request; its content summary, fetched first,
+        provides the files and bytes reported by ``dry_run`` and ``on_progress``.
+        Failures are reported once all other paths have been removed.
+        """
+        paths = [self._remove_protocol(path) for path in paths]
+        progress = Progress()
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            futures = {
+                executor.submit(self._delete_tree, path, dry_run, progress): path
+                for path in paths
+            }
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=PROGRESS_INTERVAL)
+                for future in done:
+                    if future.exception() is not None:
+                        log.error(
+                            "Could not remove %s: %s",
+                            futures[future],
+                            future.exception(),
+                        )
+                        progress.fail(futures[future])
+                if on_progress is not None:
+                    on_progress(progress)
+        log.info(
+            "%s %d paths: %s",
+            "Would remove" if dry_run else "Removed",
+            len(paths),
+            progress,
+        )
+        if progress.failed:
+            msg = f"Could not remove {len(progress.failed)} of {len(paths)} paths"
+            raise pyhdfs.HdfsException(msg)
+        return progress
@@ -1,15 +1,93 @@
 from __future__ import annotations
 
-from datetime import datetime
+import os
+import re
+import stat
 from pathlib import Path
-from typing import Callable
+from typing import Iterable, Iterator
 
+import pyarrow as pa
 from plumbum import local
 from plumbum.commands.base import BoundCommand
 
-from dice_lib.units import convert_to_largest_unit
-
-from ._base import FileSystem, LsFormat
+from dice_lib.units import convert_to_largest_unit_array
+from dice_lib.user import get_owners, get_user_index
+
+from ._base import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_LS_BATCH_SIZE,
+    FileSystem,
+    LsFormat,
+    size_tuples,
+)
+from ._checksum import (
+    DEFAULT_ALGORITHM,
+    ChecksumCache,
+    iter_file_checksums,
+)
+from ._copy import copy_file, copy_tree
+from ._delete import delete_trees
+from ._du import disk_usage
+from ._progress import Progress, ProgressCallback
+
+_PROTOCOL = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*://")
+
+
+def _iter_scan(
+    path: str, batch_size: int
+) -> Iterator[list[tuple[str, os.stat_result]]]:
+    """
+    Yields (name, lstat) pairs for the entries of a directory in batches of ``batch_size``,
+    in directory order. For anything but a directory the path itself is returned,
+    like ``ls -la <file>``.
+    """
+    if not stat.S_ISDIR(Path(path).stat().st_mode):
+        yield [(path, os.lstat(path))]
+        return
+    batch = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                batch.append((entry.name, entry.stat(follow_symlinks=False)))
+            except FileNotFoundError:
+                # removed between readdir and stat
+                continue
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _scan(path: str) -> list[tuple[str, os.stat_result]]:
+    """Returns all (name, lstat) pairs for the entries of a directory, sorted by name."""
+    listing = [
+        item for batch in _iter_scan(path, DEFAULT_LS_BATCH_SIZE) for item in batch
+    ]
+    listing.sort(key=lambda item: item[0])
+    return listing
+
+
+def _to_ls_format(listing: list[tuple[str, os.stat_result]]) -> LsFormat:
+    """Fills the LsFormat columns from (name, lstat) pairs."""
+    size = [st.st_size for _, st in listing]
+    size_scaled, size_unit = convert_to_largest_unit_array(size, "B", scale=1024)
+    # epoch timestamps go straight into the date column, no per-entry conversion
+    date = pa.array(
+        [st.st_mtime_ns for _, st in listing], type=pa.timestamp("ns", tz="UTC")
+    )
+    # the shared index looks each distinct id up once, not once per entry
+    users = get_user_index()
+    return LsFormat(
+        permissions=[stat.filemode(st.st_mode) for _, st in listing],
+        owner=users.user_names(st.st_uid for _, st in listing),
+        group=users.group_names(st.st_gid for _, st in listing),
+        size=size,
+        size_scaled=size_scaled,
+        size_unit=size_unit,
+        date=date,
+        name=[name for name, _ in listing],
+    )
 
 
 class PosixFileSystem(FileSystem):
@@ -17,50 +95,57 @@ class PosixFileSystem(FileSystem):
 
     protocol: str = "file://"
 
-    def __init__(self) -> None:
+    def __init__(self, max_workers: int | None = None) -> None:
+        # number of threads used to walk, copy and delete directory trees
+        self.max_workers = max_workers
         # command definitions
-        self._size_cmd: BoundCommand = local["nice"]["-n19", "du"]["-s"]
-        self._copy_cmd: BoundCommand = local["cp"]["-p"]
-        self._copy_recursive_cmd: BoundCommand = local["cp"]["-pr"]
         self._move_cmd: BoundCommand = local["mv"]
-        self._ls_cmd: BoundCommand = local["ls"]["-la", "--time-style=long-iso"]
         self._mkdir_cmd: BoundCommand = local["mkdir"]["-p"]
         self._rm_cmd: BoundCommand = local["rm"]["-f"]
-        self._rm_recursive_cmd: BoundCommand = local["rm"]["-fr"]
-        self._dataparser: Callable[[str], datetime] = lambda x: datetime.strptime(
-            x, "%Y-%m-%d %H:%M"
-        )
 
     def _remove_protocol(self, path: str) -> str:
-        return path.replace(self.protocol, "")
+        # mounts with other protocols (e.g. nfs://) are also served from the local filesystem
+        return _PROTOCOL.sub("", path)
 
     def get_owner(self, pathstr: str) -> str:
-        pathstr = self._remove_protocol(pathstr)
-        path = Path(pathstr)
-        try:
-            owner = path.owner()
-        except KeyError:
-            owner = "unknown"
-        return owner
+        return self.get_owners([pathstr])[0]
+
+    def get_owners(self, paths: list[str]) -> list[str]:
+        return get_owners(self._remove_protocol(path) for path in paths)
 
     def size_of_path(self, path: str) -> tuple[str, int, float, str]:
-        path = self._remove_protocol(path)
-        total, _ = self._size_cmd(path).split()
-        total = int(total)
-        total_scaled, unit = convert_to_largest_unit(total, "B", scale=1024)
-        return str(path), total, total_scaled, unit
+        return self.size_of_paths([path])[0]
 
     def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
-        # TODO: should be able to do this in parallel
-        return [self.size_of_path(path) for path in paths]
+        paths = [self._remove_protocol(path) for path in paths]
+        return size_tuples(paths, disk_usage(paths, max_workers=self.max_workers))
+
+    @staticmethod
+    def _target(src: str, dest: str) -> str:
+        """Like ``cp``: copying into an existing directory keeps the source name."""
+        if Path(dest).is_dir():
+            return str(Path(dest) / Path(src.rstrip("/")).name)
+        return dest
 
     def copy(self, src: str, dest: str) -> None:
         src, dest = self._remove_protocol(src), self._remove_protocol(dest)
-        self._copy_cmd(src, dest)
-
-    def copy_recursive(self, src: str, dest: str) -> None:
+        copy_file(src, self._target(src, dest))
+
+    def copy_recursive(
+        self, src: str, dest: str, on_progress: ProgressCallback = None
+    ) -> None:
+        """
+        Copies a file or directory tree in-process like ``cp -pr``, many files at a time.
+        ``on_progress`` receives the running totals (files, bytes, throughput) about once a
+        second and when the copy has finished.
+        """
         src, dest = self._remove_protocol(src), self._remove_protocol(dest)
-        self._copy_recursive_cmd(src, dest)
+        copy_tree(
+            src,
+            self._target(src, dest),
+            max_workers=self.max_workers,
+            on_progress=on_progress,
+        )
 
     def move(self, src: str, dest: str) -> None:
         src, dest = self._remove_protocol(src), self._remove_protocol(dest)
@@ -68,41 +153,32 @@ class PosixFileSystem(FileSystem):
 
     def ls(self, path: str) -> LsFormat:
         path = self._remove_protocol(path)
-        cmd_output = self._ls_cmd(path)
-        # skip first 3 lines (total, ., ..) and last line (empty)
-        lines = cmd_output.split("\n")[3:-1]
-        permissions = []
-        owner = []
-        group = []
-        size = []
-        size_scaled = []
-        unit = []
-        date = []
-        name = []
-        for new_line in lines:
-            line = new_line.split()
-            permissions.append(line[0])
-            owner.append(line[2])
-            group.append(line[3])
-            raw_size = int(line[4])
-            size.append(raw_size)
-            tmp_size_scaled, tmp_unit = convert_to_largest_unit(
-                raw_size, "B", scale=1024
-            )
-            size_scaled.append(tmp_size_scaled)
-            unit.append(tmp_unit)
-            date.append(self._dataparser(line[5] + " " + line[6]))
-            name.append(line[7])
-        return LsFormat(
-            permissions=permissions,
-            owner=owner,
-            group=group,
-            size=size,
-            size_scaled=size_scaled,
-            size_unit=unit,
-            date=date,
-            name=name,
-        )
+        return _to_ls_format(_scan(path))
+
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        path = self._remove_protocol(path)
+        for batch in _iter_scan(path, batch_size):
+            yield _to_ls_format(batch)
+
+    def is_dir(self, path: str) -> bool:
+        return Path(self._remove_protocol(path)).is_dir()
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        with Path(self._remove_protocol(path)).open("rb", buffering=0) as reader:
+            while True:
+                chunk = reader.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        with Path(self._remove_protocol(path)).open("wb", buffering=0) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
 
     def mkdir(self, path: str) -> None:
         path = self._remove_protocol(path)
@@ -112,6 +188,44 @@ class PosixFileSystem(FileSystem):
         path = self._remove_protocol(path)
         self._rm_cmd(path)
 
-    def rm_recursive(self, path: str) -> None:
-        path = self._remove_protocol(path)
-        self._rm_recursive_cmd(path)
+    def checksum(
+        self,
+        paths: list[str],
+        algorithm: str = DEFAULT_ALGORITHM,
+        cache: ChecksumCache | None = None,
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yields (path, checksum) as they complete. Files are hashed in parallel on a
+        process pool with one worker per CPU; unchanged files are served from ``cache``.
+        """
+        return iter_file_checksums(
+            [self._remove_protocol(path) for path in paths], algorithm, cache=cache
+        )
+
+    def rm_recursive(
+        self, path: str, dry_run: bool = False, on_progress: ProgressCallback = None
+    ) -> Progress:
+        """
+        Removes a file or directory tree in-process like ``rm -fr``, many files at a time.
+        See ``bulk_delete`` for the options and the returned Progress.
+        """
+        return self.bulk_delete([path], dry_run=dry_run, on_progress=on_progress)
+
+    def bulk_delete(
+        self,
+        paths: list[str],
+        dry_run: bool = False,
+        on_progress: ProgressCallback = None,
+    ) -> Progress:
+        """
+        Removes files and directory trees like ``rm -fr``: directories are scanned and their
+        files unlinked in parallel, then the directories are removed bottom-up.
+        With ``dry_run`` only the files and bytes that would be removed are counted.
+        ``on_progress`` receives the running totals about once a second and at the end.
+        """
+        return delete_trees(
+            [self._remove_protocol(path) for path in paths],
+            max_workers=self.max_workers,
+            dry_run=dry_run,
+            on_progress=on_progress,
+        )
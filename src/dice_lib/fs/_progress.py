@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from ..units import convert_to_largest_unit
+
+# seconds between two progress reports of long running operations
+PROGRESS_INTERVAL = 1.0
+
+
+@dataclass
+class Progress:
+    """Thread-safe counters of a long running operation on many files."""
+
+    files: int = 0
+    bytes: int = 0
+    failed: list[str] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, files: int = 0, nbytes: int = 0) -> None:
+        with self._lock:
+            self.files += files
+            self.bytes += nbytes
+
+    def fail(self, path: str) -> None:
+        with self._lock:
+            self.failed.append(path)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Bytes per second since the start."""
+        elapsed = self.elapsed
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        size, unit = convert_to_largest_unit(self.bytes, "B", scale=1024)
+        rate, rate_unit = convert_to_largest_unit(self.throughput, "B/s", scale=1024)
+        failed = f", {len(self.failed)} failed" if self.failed else ""
+        return f"{self.files} files, {size:.1f} {unit} ({rate:.1f} {rate_unit}){failed}"
+
+
+ProgressCallback = Optional[Callable[[Progress], None]]
@@ -1,9 +1,457 @@
 from __future__ import annotations
 
-from ._base import FileSystem
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Any, Iterable, Iterator
+
+import pyarrow as pa
+
+from ..logger import log
+from ..units import convert_to_largest_unit_array
+from ._base import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_LS_BATCH_SIZE,
+    FileSystem,
+    LsFormat,
+    size_tuples,
+)
+
+try:
+    import boto3
+    from boto3.s3.transfer import TransferConfig
+    from botocore.config import Config
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover
+    boto3 = None
+
+# keep-alive connections shared by all threads using the same client
+POOL_MAXSIZE = 32
+DEFAULT_MAX_CONCURRENCY = 8
+# objects larger than this are uploaded and downloaded in parts, in parallel
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+# S3 requires at least 5 MiB per part (except the last one)
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+# S3 allows at most 10,000 parts of up to 5 GiB; streamed uploads double their part size
+# every PARTS_PER_SIZE parts, so objects up to the 5 TiB limit fit
+PARTS_PER_SIZE = 1000
+MAX_PART_SIZE = 5 * 1024 * 1024 * 1024
+# maximum number of keys per DeleteObjects request
+_DELETE_BATCH_SIZE = 1000
+_DIRECTORY_PERMISSIONS = "drwxr-xr-x"
+_FILE_PERMISSIONS = "-rw-r--r--"
+
+
+@lru_cache(maxsize=None)
+def get_s3_client(endpoint_url: str | None = None, profile: str | None = None) -> Any:
+    """
+    Returns the S3 client for an endpoint, shared by all S3FileSystem instances and threads
+    of the process (boto3 clients are thread-safe), so they all use one connection pool.
+    Credentials and, if ``endpoint_url`` is not given, the endpoint are taken from the
+    usual AWS environment variables and config files.
+    """
+    if boto3 is None:
+        msg = "S3 support requires boto3, install it with: pip install dice-lib[s3]"
+        raise ImportError(msg)
+    session = boto3.session.Session(profile_name=profile)
+    config = Config(
+        max_pool_connections=POOL_MAXSIZE,
+        tcp_keepalive=True,
+        retries={"max_attempts": 5, "mode": "adaptive"},
+    )
+    log.debug("Connecting to S3 via %s", endpoint_url or "the default endpoint")
+    return session.client("s3", endpoint_url=endpoint_url, config=config)
+
+
+def clear_client_cache() -> None:
+    """Forgets all cached S3 clients, e.g. after a fork."""
+    get_s3_client.cache_clear()
+
+
+def split_path(path: str) -> tuple[str, str]:
+    """Splits ``s3://bucket/some/key`` (or ``bucket/some/key``) into bucket and key."""
+    path = path.replace(S3FileSystem.protocol, "", 1).lstrip("/")
+    bucket, _, key = path.partition("/")
+    return bucket, key
+
+
+def _is_missing(error: ClientError) -> bool:
+    return str(error.response["Error"]["Code"]) in ("404", "NoSuchKey", "NoSuchBucket")
+
+
+def _objects_to_ls_format(
+    bucket: str, prefixes: list[str], objects: list[dict[str, Any]]
+) -> LsFormat:
+    """Builds the LsFormat columns for one page of ``ListObjectsV2``."""
+    size = [0] * len(prefixes) + [obj["Size"] for obj in objects]
+    size_scaled, size_unit = convert_to_largest_unit_array(size, "B", scale=1024)
+    owners = [""] * len(prefixes) + [
+        obj.get("Owner", {}).get("DisplayName") or obj.get("Owner", {}).get("ID", "")
+        for obj in objects
+    ]
+    return LsFormat(
+        permissions=[_DIRECTORY_PERMISSIONS] * len(prefixes)
+        + [_FILE_PERMISSIONS] * len(objects),
+        owner=owners,
+        group=[""] * len(size),
+        size=size,
+        size_scaled=size_scaled,
+        size_unit=size_unit,
+        # prefixes have no modification time
+        date=pa.array(
+            [None] * len(prefixes) + [obj["LastModified"] for obj in objects],
+            type=pa.timestamp("ns", tz="UTC"),
+        ),
+        name=[f"{bucket}/{prefix.rstrip('/')}" for prefix in prefixes]
+        + [f"{bucket}/{obj['Key']}" for obj in objects],
+    )
 
 
 class S3FileSystem(FileSystem):
     """Class for S3 filesystems."""
 
+    protocol: str = "s3://"
     _protocol: str = "s3://"
+
+    def __init__(
+        self,
+        endpoint_url: str | None = None,
+        profile: str | None = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        if boto3 is None:
+            msg = (
+                "S3FileSystem requires boto3, install it with: pip install dice-lib[s3]"
+            )
+            raise ImportError(msg)
+        self.client = get_s3_client(endpoint_url, profile)
+        # maximum number of concurrent requests of a single operation
+        self.max_concurrency = max_concurrency
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_THRESHOLD,
+            multipart_chunksize=MULTIPART_CHUNKSIZE,
+            max_concurrency=max_concurrency,
+        )
+
+    def _remove_protocol(self, path: str) -> str:
+        return path.replace(self.protocol, "", 1)
+
+    def _iter_pages(
+        self, bucket: str, prefix: str, delimiter: str = ""
+    ) -> Iterator[dict[str, Any]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        kwargs = {"Bucket": bucket, "Prefix": prefix, "FetchOwner": True}
+        if delimiter:
+            kwargs["Delimiter"] = delimiter
+        yield from paginator.paginate(**kwargs)
+
+    def _iter_keys(self, bucket: str, key: str) -> Iterator[dict[str, Any]]:
+        """Yields the object ``key`` itself, if it exists, and all objects below ``key/``."""
+        key = key.rstrip("/")
+        if key:
+            head = self._head(bucket, key)
+            if head is not None:
+                yield {
+                    "Key": key,
+                    "Size": head["ContentLength"],
+                    "LastModified": head["LastModified"],
+                }
+        for page in self._iter_pages(bucket, f"{key}/" if key else ""):
+            yield from page.get("Contents", [])
+
+    def _head(self, bucket: str, key: str) -> dict[str, Any] | None:
+        try:
+            return dict(self.client.head_object(Bucket=bucket, Key=key))
+        except ClientError as e:
+            if _is_missing(e):
+                return None
+            raise
+
+    def size_of_path(self, path: str) -> tuple[str, int, float, str]:
+        return self.size_of_paths([path])[0]
+
+    def _size_of_prefix(self, path: str) -> int:
+        bucket, key = split_path(path)
+        return sum(obj["Size"] for obj in self._iter_keys(bucket, key))
+
+    def size_of_paths(self, paths: list[str]) -> list[tuple[str, int, float, str]]:
+        """Sizes are the total size of all objects below each path (prefix)."""
+        paths = [self._remove_protocol(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            totals = list(executor.map(self._size_of_prefix, paths))
+        return size_tuples(paths, totals)
+
+    def get_owner(self, pathstr: str) -> str:
+        bucket, key = split_path(pathstr)
+        if key:
+            acl = self.client.get_object_acl(Bucket=bucket, Key=key)
+        else:
+            acl = self.client.get_bucket_acl(Bucket=bucket)
+        owner = acl["Owner"]
+        return str(owner.get("DisplayName") or owner.get("ID", "unknown"))
+
+    def is_dir(self, path: str) -> bool:
+        bucket, key = split_path(path)
+        if not key.rstrip("/"):
+            return True
+        response = self.client.list_objects_v2(
+            Bucket=bucket, Prefix=f"{key.rstrip('/')}/", MaxKeys=1
+        )
+        return bool(response.get("KeyCount", 0))
+
+    def ls(self, path: str) -> LsFormat:
+        return LsFormat.concat(list(self.iter_ls(path)))
+
+    def iter_ls(
+        self, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        """Yields one batch per page of the listing (at most 1000 keys)."""
+        bucket, key = split_path(path)
+        prefix = f"{key.rstrip('/')}/" if key.rstrip("/") else ""
+        found = False
+        for page in self._iter_pages(bucket, prefix, delimiter="/"):
+            prefixes = [item["Prefix"] for item in page.get("CommonPrefixes", [])]
+            # the directory marker created by mkdir is not an entry of the directory
+            objects = [obj for obj in page.get("Contents", []) if obj["Key"] != prefix]
+            # an empty directory only contains its marker
+            found = found or bool(page.get("KeyCount"))
+            if not prefixes and not objects:
+                continue
+            listing = _objects_to_ls_format(bucket, prefixes, objects)
+            for offset in range(0, len(listing), batch_size):
+                yield listing.slice(offset, batch_size)
+        if found or not key:
+            return
+        head = self._head(bucket, key)
+        if head is None:
+            msg = f"No such file or directory: {path}"
+            raise FileNotFoundError(msg)
+        yield _objects_to_ls_format(
+            bucket,
+            [],
+            [
+                {
+                    "Key": key,
+                    "Size": head["ContentLength"],
+                    "LastModified": head["LastModified"],
+                }
+            ],
+        )
+
+    def mkdir(self, path: str) -> None:
+        """Creates the bucket if needed and a directory marker object (``key/``)."""
+        bucket, key = split_path(path)
+        try:
+            self.client.head_bucket(Bucket=bucket)
+        except ClientError as e:
+            if not _is_missing(e):
+                raise
+            self.client.create_bucket(Bucket=bucket)
+        if key.rstrip("/"):
+            self.client.put_object(Bucket=bucket, Key=f"{key.rstrip('/')}/", Body=b"")
+
+    def rm(self, path: str) -> None:
+        bucket, key = split_path(path)
+        log.debug("Removing %s", path)
+        self.client.delete_object(Bucket=bucket, Key=key)
+
+    def rm_recursive(self, path: str) -> None:
+        bucket, key = split_path(path)
+        log.debug("Removing %s", path)
+        batch: list[dict[str, str]] = []
+        # DeleteObjects succeeds as a whole and lists the keys it could not delete
+        errors: list[dict[str, str]] = []
+        for obj in self._iter_keys(bucket, key):
+            batch.append({"Key": obj["Key"]})
+            if len(batch) == _DELETE_BATCH_SIZE:
+                errors += self._delete_objects(bucket, batch)
+                batch = []
+        if batch:
+            errors += self._delete_objects(bucket, batch)
+        if errors:
+            first = errors[0]
+            msg = (
+                f"Could not remove {len(errors)} objects below {path}, e.g. "
+                f"{first.get('Key')}: {first.get('Code')} {first.get('Message')}"
+            )
+            raise OSError(msg)
+
+    def _delete_objects(
+        self, bucket: str, batch: list[dict[str, str]]
+    ) -> list[dict[str, str]]:
+        response = self.client.delete_objects(Bucket=bucket, Delete={"Objects": batch})
+        return list(response.get("Errors", []))
+
+    def _copy_object(self, src: str, dest: str) -> None:
+        """Server-side copy, in parallel parts for large objects."""
+        src_bucket, src_key = split_path(src)
+        dest_bucket, dest_key = split_path(dest)
+        self.client.copy(
+            {"Bucket": src_bucket, "Key": src_key},
+            dest_bucket,
+            dest_key,
+            Config=self.transfer_config,
+        )
+
+    def copy(self, src: str, dest: str) -> None:
+        self._copy_object(src, dest)
+
+    def _copy_pairs(self, src: str, dest: str) -> list[tuple[str, str]]:
+        bucket, key = split_path(src)
+        dest_bucket, dest_key = split_path(dest)
+        pairs = []
+        for obj in self._iter_keys(bucket, key):
+            suffix = obj["Key"][len(key.rstrip("/")) :]
+            pairs.append(
+                (
+                    f"{bucket}/{obj['Key']}",
+                    f"{dest_bucket}/{dest_key.rstrip('/')}{suffix}",
+                )
+            )
+        return pairs
+
+    def copy_recursive(self, src: str, dest: str) -> None:
+        """Copies all objects below ``src`` server-side, ``max_concurrency`` at a time."""
+        pairs = self._copy_pairs(src, dest)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self._copy_object, *pair) for pair in pairs]
+            for future in as_completed(futures):
+                future.result()
+
+    def move(self, src: str, dest: str) -> None:
+        """S3 has no rename: objects are copied server-side, then deleted."""
+        self.copy_recursive(src, dest)
+        self.rm_recursive(src)
+
+    def _get_range(self, bucket: str, key: str, start: int, end: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}"
+        )
+        return bytes(response["Body"].read())
+
+    def _file_version(self, path: str) -> tuple[int, int] | None:
+        bucket, key = split_path(path)
+        head = self.client.head_object(Bucket=bucket, Key=key)
+        return int(head["ContentLength"]), int(head["LastModified"].timestamp())
+
+    def read_chunks(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ) -> Iterator[bytes]:
+        """
+        Small objects are streamed with a single request. Large objects are fetched as
+        ranges of ``chunk_size`` bytes, up to ``max_concurrency`` ranges at a time, and
+        yielded in order.
+        """
+        bucket, key = split_path(path)
+        size = int(self.client.head_object(Bucket=bucket, Key=key)["ContentLength"])
+        if size <= MULTIPART_THRESHOLD:
+            body = self.client.get_object(Bucket=bucket, Key=key)["Body"]
+            try:
+                yield from body.iter_chunks(chunk_size)
+            finally:
+                body.close()
+            return
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            pending: deque[Future[bytes]] = deque()
+            for start in range(0, size, chunk_size):
+                pending.append(
+                    executor.submit(
+                        self._get_range,
+                        bucket,
+                        key,
+                        start,
+                        min(start + chunk_size, size),
+                    )
+                )
+                if len(pending) >= self.max_concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def write_chunks(self, path: str, chunks: Iterable[bytes]) -> None:
+        """
+        Writes with a single PUT if the data fits in one part, otherwise as a multipart
+        upload with up to ``max_concurrency`` parts in flight; failed uploads are aborted.
+        The length of the stream is not known in advance, so the part size grows with the
+        number of parts (see PARTS_PER_SIZE).
+        """
+        bucket, key = split_path(path)
+        parts = _iter_parts(chunks, MULTIPART_CHUNKSIZE, grow_every=PARTS_PER_SIZE)
+        first = next(parts, b"")
+        second = next(parts, None)
+        if second is None:
+            self.client.put_object(Bucket=bucket, Key=key, Body=first)
+            return
+        upload_id = self.client.create_multipart_upload(Bucket=bucket, Key=key)[
+            "UploadId"
+        ]
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        # bounds the memory used by parts waiting to be uploaded
+        slots = threading.BoundedSemaphore(self.max_concurrency)
+
+        def upload(number: int, data: bytes) -> dict[str, Any]:
+            try:
+                response = self.client.upload_part(
+                    Bucket=bucket,
+                    Key=key,
+                    UploadId=upload_id,
+                    PartNumber=number,
+                    Body=data,
+                )
+            finally:
+                slots.release()
+            return {"PartNumber": number, "ETag": response["ETag"]}
+
+        try:
+            futures = []
+            all_parts = [first, second]
+            for number, data in enumerate(_chain(all_parts, parts), start=1):
+                slots.acquire()
+                futures.append(executor.submit(upload, number, data))
+            completed = [future.result() for future in futures]
+            self.client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=key,
+                UploadId=upload_id,
+                MultipartUpload={"Parts": completed},
+            )
+        except BaseException:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self.client.abort_multipart_upload(
+                Bucket=bucket, Key=key, UploadId=upload_id
+            )
+            raise
+        executor.shutdown(wait=True)
+
+
+def _chain(head: list[bytes], tail: Iterator[bytes]) -> Iterator[bytes]:
+    # drop the references to the first parts once they are handed out
+    while head:
+        yield head.pop(0)
+    yield from tail
+
+
+def _iter_parts(
+    chunks: Iterable[bytes], part_size: int, grow_every: int | None = None
+) -> Iterator[bytes]:
+    """
+    Regroups a stream of chunks into parts of exactly ``part_size`` bytes (but the last).
+    With ``grow_every``, the part size doubles after every ``grow_every`` parts, up to
+    MAX_PART_SIZE.
+    """
+    buffer = bytearray()
+    count = 0
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= part_size:
+            yield bytes(buffer[:part_size])
+            del buffer[:part_size]
+            count += 1
+            if grow_every and count % grow_every == 0:
+                part_size = min(2 * part_size, MAX_PART_SIZE)
+    if buffer:
+        yield bytes(buffer)
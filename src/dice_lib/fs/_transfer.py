@@ -0,0 +1,210 @@
+"""
+Streaming file transfers between any two filesystems (e.g. /storage <-> /hdfs).
+
+Every file is read by one thread and written by another, connected by a queue that holds
+at most ``buffers`` chunks. With the default of two buffers the next chunk is read while the
+previous one is being written (double buffering), so a transfer runs at the speed of the
+slower side instead of the sum of both. Several files are transferred at once.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from queue import Empty, Full, Queue
+from typing import Any, Iterable, Iterator
+
+from ..logger import log
+from ._base import DEFAULT_CHUNK_SIZE, FileSystem
+from ._checksum import checksum_chunks, new_checksum
+from ._progress import PROGRESS_INTERVAL, Progress, ProgressCallback
+
+DEFAULT_BUFFERS = 2
+DEFAULT_MAX_TRANSFERS = 8
+# marks the end of a prefetched stream
+_END = object()
+# seconds between checks whether the other side of a prefetch queue went away
+_POLL_INTERVAL = 0.1
+
+
+def prefetch(
+    chunks: Iterable[bytes], buffers: int = DEFAULT_BUFFERS
+) -> Iterator[bytes]:
+    """
+    Consumes ``chunks`` on a background thread, keeping up to ``buffers`` chunks ready.
+    Errors of the producer are raised in the consumer; stopping the iteration early stops
+    the producer.
+    """
+    queue: Queue[Any] = Queue(maxsize=buffers)
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def produce() -> None:
+        iterator = iter(chunks)
+        try:
+            for chunk in iterator:
+                if not put(chunk):
+                    return
+            put(_END)
+        except Exception as e:  # pylint: disable=broad-except
+            put(e)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            try:
+                item = queue.get(timeout=_POLL_INTERVAL)
+            except Empty:
+                if not producer.is_alive() and queue.empty():
+                    return
+                continue
+            if item is _END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+def transfer_file(
+    src_fs: FileSystem,
+    src: str,
+    dest_fs: FileSystem,
+    dest: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    buffers: int = DEFAULT_BUFFERS,
+    checksum: str | None = None,
+) -> int:
+    """
+    Streams a single file from ``src_fs`` to ``dest_fs``, returns the number of bytes.
+    With ``checksum`` (``adler32``, ``crc32`` or any ``hashlib`` algorithm) the data is
+    hashed while it is read, the destination is read back afterwards and OSError is raised
+    if they differ.
+    """
+    digest = new_checksum(checksum) if checksum else None
+    size = 0
+
+    def read() -> Iterator[bytes]:
+        nonlocal size
+        for chunk in src_fs.read_chunks(src, chunk_size):
+            size += len(chunk)
+            if digest is not None:
+                digest.update(chunk)
+            yield chunk
+
+    dest_fs.write_chunks(dest, prefetch(read(), buffers))
+    if digest is not None and checksum is not None:
+        written = checksum_chunks(
+            prefetch(dest_fs.read_chunks(dest, chunk_size), buffers), checksum
+        )
+        if written != digest.hexdigest():
+            msg = (
+                f"{checksum} of {dest} ({written}) does not match "
+                f"{src} ({digest.hexdigest()})"
+            )
+            raise OSError(msg)
+    return size
+
+
+def _plan(
+    src_fs: FileSystem, src: str, dest_fs: FileSystem, dest: str
+) -> Iterator[tuple[str, str]]:
+    """
+    Yields the (source, destination) files of a transfer and creates the destination
+    directories on the way.
+    """
+    if not src_fs.is_dir(src):
+        yield src, dest
+        return
+    stack = [(src, dest)]
+    while stack:
+        src_dir, dest_dir = stack.pop()
+        dest_fs.mkdir(dest_dir)
+        for batch in src_fs.iter_ls(src_dir):
+            # some backends list names, others full paths
+            for entry, permissions in zip(batch.name, batch.permissions):
+                name = posixpath.basename(entry)
+                source = posixpath.join(src_dir, name)
+                target = posixpath.join(dest_dir, name)
+                if permissions.startswith("d"):
+                    stack.append((source, target))
+                elif permissions.startswith("-"):
+                    yield source, target
+                else:
+                    log.warning("Skipping %s, only files are transferred", source)
+
+
+def transfer(
+    src_fs: FileSystem,
+    src: str,
+    dest_fs: FileSystem,
+    dest: str,
+    max_transfers: int = DEFAULT_MAX_TRANSFERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    buffers: int = DEFAULT_BUFFERS,
+    checksum: str | None = None,
+    on_progress: ProgressCallback = None,
+) -> Progress:
+    """
+    Transfers a file or directory tree from ``src_fs`` to ``dest_fs`` like ``cp -r``, with up
+    to ``max_transfers`` files in flight. See ``transfer_file`` for the other options.
+    Files that fail are reported with a single OSError once all others are done.
+    An unknown ``checksum`` algorithm raises ValueError before anything is created.
+    """
+    if checksum:
+        new_checksum(checksum)
+    if dest_fs.is_dir(dest):
+        dest = posixpath.join(dest, posixpath.basename(src.rstrip("/")))
+    progress = Progress()
+    # keeps the walk from queueing a whole tree of transfers up front
+    slots = threading.BoundedSemaphore(2 * max_transfers)
+
+    def run(source: str, target: str) -> None:
+        try:
+            size = transfer_file(
+                src_fs, source, dest_fs, target, chunk_size, buffers, checksum
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            log.error("Could not transfer %s to %s: %s", source, target, e)
+            progress.fail(source)
+        else:
+            progress.add(files=1, nbytes=size)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=max_transfers) as executor:
+        futures = set()
+        for source, target in _plan(src_fs, src, dest_fs, dest):
+            while not slots.acquire(timeout=PROGRESS_INTERVAL):
+                if on_progress is not None:
+                    on_progress(progress)
+            futures.add(executor.submit(run, source, target))
+            futures = {future for future in futures if not future.done()}
+        while futures:
+            _, futures = wait_futures(futures, timeout=PROGRESS_INTERVAL)
+            if on_progress is not None:
+                on_progress(progress)
+    if on_progress is not None:
+        on_progress(progress)
+    log.info("Transferred %s to %s: %s", src, dest, progress)
+    if progress.failed:
+        msg = f"Could not transfer {len(progress.failed)} files from {src} to {dest}"
+        raise OSError(msg)
+    return progress
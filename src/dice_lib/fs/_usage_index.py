@@ -0,0 +1,237 @@
+"""
+Persistent, incremental usage index for local storage mounts.
+
+The index keeps one row per directory (its mtime, the usage of its own entries and the
+usage of its whole subtree) in an SQLite database. An update only re-reads directories
+whose mtime changed since the last run; unchanged directories reuse their stored numbers
+and only their subdirectories are visited. Note that a directory's mtime changes when
+entries are created, removed or renamed, not when a file grows in place: use
+``update(full=True)`` to rescan everything periodically.
+
+Usage is counted like ``du -x`` (allocated blocks, no crossing of filesystems), except that
+hard links are counted once per link.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import stat
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from ..logger import log
+from ._du import BLOCK_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    mtime_ns INTEGER NOT NULL,
+    own_bytes INTEGER NOT NULL,
+    own_count INTEGER NOT NULL,
+    total_bytes INTEGER NOT NULL,
+    total_count INTEGER NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories (parent);
+"""
+
+
+@dataclass
+class UpdateStats:
+    """Number of directories read from disk and reused from the index during an update."""
+
+    scanned: int = 0
+    reused: int = 0
+    removed: int = 0
+
+
+@dataclass
+class _Pending:
+    """A directory of an update whose subdirectories are not all counted yet."""
+
+    path: str
+    parent: str | None
+    mtime_ns: int
+    own_bytes: int
+    own_count: int
+    total_bytes: int
+    total_count: int
+    subdirectories: list[tuple[str, os.stat_result]]
+
+
+class UsageIndex:
+    """Per-directory usage index of a single mount, stored in an SQLite database."""
+
+    def __init__(self, db_path: str | Path, root: str) -> None:
+        self.root = root.rstrip("/") or "/"
+        self.db_path = str(db_path)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def for_mount(cls, mount: str, index_dir: str | Path) -> UsageIndex:
+        """Opens (or creates) the index of a mount inside ``index_dir``."""
+        name = mount.strip("/").replace("/", "_") or "root"
+        Path(index_dir).mkdir(parents=True, exist_ok=True)
+        return cls(Path(index_dir) / f"{name}.sqlite", mount)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> UsageIndex:
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self.close()
+
+    def update(self, full: bool = False) -> UpdateStats:
+        """
+        Brings the index up to date with the filesystem.
+        Directories with an unchanged mtime are not re-read unless ``full`` is set.
+        """
+        stats = UpdateStats()
+        st = os.lstat(self.root)
+        with self._db:
+            self._refresh(self.root, None, st, full, stats)
+        log.debug(
+            "Updated usage index of %s: %d directories scanned, %d reused, %d removed",
+            self.root,
+            stats.scanned,
+            stats.reused,
+            stats.removed,
+        )
+        return stats
+
+    def usage(self, path: str) -> tuple[int, int] | None:
+        """
+        Returns (bytes, number of entries) for an indexed directory, or None if the path is
+        not in the index.
+        """
+        row = self._db.execute(
+            "SELECT total_bytes, total_count FROM directories WHERE path = ?",
+            (path.rstrip("/") or "/",),
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def _children(self, path: str) -> list[str]:
+        rows = self._db.execute(
+            "SELECT path FROM directories WHERE parent = ?", (path,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def _remove_subtree(self, path: str, stats: UpdateStats) -> None:
+        # all paths below <path>/ sort between "<path>/" and "<path>0" ("0" follows "/")
+        cursor = self._db.execute(
+            "DELETE FROM directories WHERE path = ? OR (path >= ? AND path < ?)",
+            (path, path + "/", path + "0"),
+        )
+        stats.removed += cursor.rowcount
+
+    def _scan(
+        self, path: str, device: int
+    ) -> tuple[int, int, dict[str, os.stat_result]]:
+        """Reads a directory: returns the usage and number of its files and its subdirectories."""
+        own_bytes, own_count = 0, 0
+        subdirectories = {}
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        log.debug("Cannot stat %s: %s", entry.path, e)
+                        continue
+                    if st.st_dev != device:
+                        continue
+                    if stat.S_ISDIR(st.st_mode):
+                        subdirectories[entry.path] = st
+                        continue
+                    own_bytes += st.st_blocks * BLOCK_SIZE
+                    own_count += 1
+        except OSError as e:
+            log.warning("Cannot read directory %s: %s", path, e)
+        return own_bytes, own_count, subdirectories
+
+    def _visit(
+        self,
+        path: str,
+        parent: str | None,
+        st: os.stat_result,
+        full: bool,
+        stats: UpdateStats,
+    ) -> _Pending:
+        """Reads or reuses the own usage of ``path`` and finds its subdirectories."""
+        row = self._db.execute(
+            "SELECT mtime_ns, own_bytes, own_count FROM directories WHERE path = ?",
+            (path,),
+        ).fetchone()
+        known_children = self._children(path)
+        if row is not None and row[0] == st.st_mtime_ns and not full:
+            stats.reused += 1
+            own_bytes, own_count = row[1], row[2]
+            # a change further down does not touch the mtime of this directory,
+            # so the subdirectories still need to be checked
+            subdirectories = {}
+            for child in known_children:
+                try:
+                    subdirectories[child] = os.lstat(child)
+                except FileNotFoundError:
+                    self._remove_subtree(child, stats)
+        else:
+            stats.scanned += 1
+            own_bytes, own_count, subdirectories = self._scan(path, st.st_dev)
+            for child in set(known_children) - set(subdirectories):
+                self._remove_subtree(child, stats)
+        return _Pending(
+            path=path,
+            parent=parent,
+            mtime_ns=st.st_mtime_ns,
+            own_bytes=own_bytes,
+            own_count=own_count,
+            # own_bytes only covers the files, the directory itself is added here
+            total_bytes=st.st_blocks * BLOCK_SIZE + own_bytes,
+            total_count=own_count,
+            subdirectories=list(subdirectories.items()),
+        )
+
+    def _refresh(
+        self,
+        path: str,
+        parent: str | None,
+        st: os.stat_result,
+        full: bool,
+        stats: UpdateStats,
+    ) -> tuple[int, int]:
+        """
+        Updates the row of ``path`` and its subtree, returns the subtree totals.
+        The tree is walked with an explicit stack, so its depth is not limited by the
+        recursion limit; every row is written once all of its subdirectories are.
+        """
+        stack = [self._visit(path, parent, st, full, stats)]
+        while True:
+            directory = stack[-1]
+            if directory.subdirectories:
+                child, child_st = directory.subdirectories.pop()
+                stack.append(self._visit(child, directory.path, child_st, full, stats))
+                continue
+            stack.pop()
+            self._db.execute(
+                "INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    directory.path,
+                    directory.parent,
+                    directory.mtime_ns,
+                    directory.own_bytes,
+                    directory.own_count,
+                    directory.total_bytes,
+                    directory.total_count,
+                    time.time(),
+                ),
+            )
+            if not stack:
+                return directory.total_bytes, directory.total_count
+            stack[-1].total_bytes += directory.total_bytes
+            stack[-1].total_count += directory.total_count + 1
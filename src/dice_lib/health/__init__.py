@@ -1,5 +1,28 @@
 from __future__ import annotations
 
-from .apel_accounting import check_apel_publication_test, check_apel_sync_data
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .apel_accounting import check_apel_publication_test, check_apel_sync_data
+
+# the checks pull in requests and bs4, they are imported when first used
+_LAZY = {
+    "check_apel_publication_test": ".apel_accounting",
+    "check_apel_sync_data": ".apel_accounting",
+}
 
 __all__ = ["check_apel_publication_test", "check_apel_sync_data"]
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _LAZY:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,5 +1,14 @@
 from __future__ import annotations
 
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+    import pyarrow as pa
+
+PREFIXES = ["", "k", "M", "G", "T", "P", "E", "Z", "Y"]
+
 
 def convert_to_largest_unit(
     value: float, unit: str, scale: float = 1000.0
@@ -15,12 +24,52 @@ def convert_to_largest_unit(
         231234.0 m -> 231.234 km
 
     """
-    prefixes = ["", "k", "M", "G", "T", "P", "E", "Z", "Y"]
     current_scale = value
     prefix_index = 0
-    for i, _ in enumerate(prefixes):
+    for i, _ in enumerate(PREFIXES):
         if current_scale < scale:
             prefix_index = i
             break
         current_scale /= scale
-    return current_scale, prefixes[prefix_index] + unit
+    return current_scale, PREFIXES[prefix_index] + unit
+
+
+def convert_to_largest_unit_array(
+    values: Any, unit: str, scale: float = 1000.0
+) -> tuple[npt.NDArray[np.float64], pa.DictionaryArray]:
+    """Vectorised version of ``convert_to_largest_unit`` for a whole column of values.
+
+    ``values`` can be anything NumPy can turn into an array (lists, NumPy or Arrow arrays).
+    Returns the scaled values and a dictionary-encoded Arrow array with the units. The prefix
+    of every value is found with a logarithm instead of repeated division; values beyond the
+    largest prefix stay in that prefix.
+
+    E.g.
+        with scale = 1024.0, unit='B' and values=[1, 2048, 3 * 1024**3]:
+        -> [1.0, 2.0, 3.0], ['B', 'kB', 'GB']
+    """
+    # imported here so that the scalar conversion does not load NumPy and Arrow
+    import numpy as np
+    import pyarrow as pa
+
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        values = values.to_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    max_index = len(PREFIXES) - 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = np.floor(np.log(values) / np.log(scale))
+    # zero, negative and NaN values stay in the base unit
+    exponent = np.nan_to_num(exponent, nan=0.0, posinf=max_index, neginf=0.0)
+    prefix_index = np.clip(exponent, 0, max_index).astype(np.int32)
+    scaled = values / np.power(scale, prefix_index)
+    # the logarithm can be off by one at exact powers of the scale
+    too_large = (scaled >= scale) & (prefix_index < max_index)
+    too_small = (scaled < 1) & (prefix_index > 0)
+    if too_large.any() or too_small.any():
+        prefix_index += too_large.astype(np.int32) - too_small.astype(np.int32)
+        scaled = values / np.power(scale, prefix_index)
+    units = pa.DictionaryArray.from_arrays(
+        pa.array(prefix_index, type=pa.int32()),
+        pa.array([prefix + unit for prefix in PREFIXES]),
+    )
+    return scaled, units
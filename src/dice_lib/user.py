@@ -1,7 +1,21 @@
 from __future__ import annotations
 
+import grp
 import os
+import pwd
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable
+
+# local account databases, read in one go when the index is (re)built
+PASSWD = "/etc/passwd"
+GROUP = "/etc/group"
+# seconds after which the index is rebuilt, to pick up changes in LDAP/SSSD
+DEFAULT_TTL = 600.0
+# seconds between two checks of the mtimes of the local databases
+MTIME_CHECK_INTERVAL = 1.0
 
 
 def current_user() -> str:
@@ -15,14 +29,153 @@ def current_user() -> str:
     return username
 
 
+def _gecos_name(gecos: str) -> str:
+    """Full name from a GECOS field, e.g. ``Jane Doe,,,`` -> ``Jane Doe``."""
+    return gecos.replace(",,,", "").strip()
+
+
+class UserIndex:
+    """
+    Maps uids and gids to user and group names and user names to full names.
+    The local ``passwd`` and ``group`` files are read at once; other ids and names
+    (e.g. from LDAP/SSSD) are looked up once through NSS and remembered, including
+    misses. Everything is forgotten when the files change or after ``ttl`` seconds.
+    """
+
+    def __init__(
+        self, passwd: str = PASSWD, group: str = GROUP, ttl: float = DEFAULT_TTL
+    ) -> None:
+        self.passwd = passwd
+        self.group = group
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users: dict[int, str | None] = {}
+        self._groups: dict[int, str | None] = {}
+        self._full_names: dict[str, str | None] = {}
+        self._mtimes: tuple[float, ...] = ()
+        self._built = 0.0
+        self._checked = 0.0
+
+    def _file_mtimes(self) -> tuple[float, ...]:
+        mtimes = []
+        for path in (self.passwd, self.group):
+            try:
+                mtimes.append(Path(path).stat().st_mtime)
+            except OSError:
+                mtimes.append(0.0)
+        return tuple(mtimes)
+
+    def _load(self) -> None:
+        """Reads the local files, replacing everything that was known before."""
+        self._users, self._groups, self._full_names = {}, {}, {}
+        try:
+            with Path(self.passwd).open(encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split(":")
+                    if len(fields) < 7 or not fields[2].isdigit():
+                        continue
+                    self._users.setdefault(int(fields[2]), fields[0])
+                    self._full_names.setdefault(fields[0], _gecos_name(fields[4]))
+        except OSError:
+            pass
+        try:
+            with Path(self.group).open(encoding="utf-8") as f:
+                for line in f:
+                    fields = line.rstrip("\n").split(":")
+                    if len(fields) < 4 or not fields[2].isdigit():
+                        continue
+                    self._groups.setdefault(int(fields[2]), fields[0])
+        except OSError:
+            pass
+        self._mtimes = self._file_mtimes()
+        self._built = self._checked = time.monotonic()
+
+    def _refresh(self) -> None:
+        """Rebuilds the index if it expired or the local files changed. Needs the lock."""
+        now = time.monotonic()
+        if self._built and now - self._built < self.ttl:
+            if now - self._checked < MTIME_CHECK_INTERVAL:
+                return
+            self._checked = now
+            if self._file_mtimes() == self._mtimes:
+                return
+        self._load()
+
+    def _user(self, uid: int) -> str | None:
+        if uid not in self._users:
+            try:
+                self._users[uid] = pwd.getpwuid(uid).pw_name
+            except KeyError:
+                self._users[uid] = None
+        return self._users[uid]
+
+    def _group(self, gid: int) -> str | None:
+        if gid not in self._groups:
+            try:
+                self._groups[gid] = grp.getgrgid(gid).gr_name
+            except KeyError:
+                self._groups[gid] = None
+        return self._groups[gid]
+
+    def _full_name(self, username: str) -> str | None:
+        if username not in self._full_names:
+            try:
+                self._full_names[username] = _gecos_name(
+                    pwd.getpwnam(username).pw_gecos
+                )
+            except KeyError:
+                self._full_names[username] = None
+        return self._full_names[username]
+
+    def user_names(self, uids: Iterable[int], default: str | None = None) -> list[str]:
+        """
+        Returns the user name of each uid. Unknown uids are returned as ``default``,
+        or as the number itself like ``ls`` does.
+        """
+        with self._lock:
+            self._refresh()
+            return [
+                self._user(uid) or (str(uid) if default is None else default)
+                for uid in uids
+            ]
+
+    def group_names(self, gids: Iterable[int], default: str | None = None) -> list[str]:
+        """Returns the group name of each gid, see ``user_names``."""
+        with self._lock:
+            self._refresh()
+            return [
+                self._group(gid) or (str(gid) if default is None else default)
+                for gid in gids
+            ]
+
+    def full_names(self, usernames: Iterable[str]) -> list[str]:
+        """Returns the full name of each user, or the user name if it is not known."""
+        with self._lock:
+            self._refresh()
+            return [self._full_name(username) or username for username in usernames]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._built = 0.0
+
+
+@lru_cache(maxsize=None)
+def get_user_index() -> UserIndex:
+    """Returns the index shared by the whole process."""
+    return UserIndex()
+
+
+def get_owners(paths: Iterable[str], default: str = "unknown") -> list[str]:
+    """Returns the owner of each path, ``default`` for uids without a user name."""
+    uids = [Path(path).stat().st_uid for path in paths]
+    return get_user_index().user_names(uids, default=default)
+
+
+def full_names(usernames: Iterable[str]) -> list[str]:
+    """Returns the full name of each user, or the user name if it is not known."""
+    return get_user_index().full_names(usernames)
+
+
 def get_user_full_name(username: str) -> str:
     """Returns a user's full name given a username or original value if not found"""
-    full_name = username
-    with Path("/etc/passwd").open(encoding="utf-8") as f:
-        for line in f:
-            if line.split(":")[0] == username:
-                full_name = line.split(":")[4].strip("/n")
-                break
-    if full_name:
-        return full_name.replace(",,,", "")
-    return username
+    return full_names([username])[0]
@@ -0,0 +1,317 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import posixpath
+import threading
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Iterable
+from urllib.parse import unquote, urlparse
+
+import pytest
+import requests
+
+from dice_lib.fs import HDFS
+from dice_lib.fs._hdfs import clear_client_cache
+
+MTIME = 1_600_000_000_000  # ms since epoch
+DATANODE = "http://datanode1:50075/webhdfs/v1"
+
+
+class FakeResponse:
+    """The parts of ``requests.Response`` that pyhdfs uses."""
+
+    def __init__(
+        self,
+        status_code: int = HTTPStatus.OK,
+        payload: Any = None,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self.status_code = status_code
+        self._payload = payload
+        self.headers = headers or {}
+        self.content = b""
+        self.text = str(payload)
+        self.raw: Any = None
+
+    def json(self) -> Any:
+        return self._payload
+
+
+def _error(status_code: int, exception: str, message: str) -> FakeResponse:
+    return FakeResponse(
+        status_code,
+        {
+            "RemoteException": {
+                "exception": exception,
+                "javaClassName": f"java.{exception}",
+                "message": message,
+            }
+        },
+    )
+
+
+def _url_path(url: str) -> str:
+    path = unquote(urlparse(url).path[len("/webhdfs/v1") :])
+    return path.rstrip("/") or "/"
+
+
+class FakeWebHDFS:
+    """
+    Minimal in-memory stand-in for the WebHDFS REST API.
+    It is passed as the ``requests_session`` of a pyhdfs client.
+    """
+
+    def __init__(self, page_size: int = 2, support_batch: bool = True) -> None:
+        self.page_size = page_size
+        self.support_batch = support_batch
+        self.files: dict[str, bytes] = {}
+        self.dirs: set[str] = {"/"}
+        self.calls: list[tuple[str, str]] = []
+        # sizes of the chunks received by the datanode, per uploaded file
+        self.uploads: dict[str, list[int]] = {}
+        # number of uploads that fail with a connection error before any succeeds
+        self.failing_uploads = 0
+        self._lock = threading.Lock()
+
+    def add_file(self, path: str, data: bytes = b"") -> None:
+        self.files[path] = data
+        parent = posixpath.dirname(path)
+        while parent not in self.dirs:
+            self.dirs.add(parent)
+            parent = posixpath.dirname(parent)
+
+    def _status(self, path: str, suffix: str) -> dict[str, Any]:
+        is_dir = path in self.dirs
+        return {
+            "pathSuffix": suffix,
+            "type": "DIRECTORY" if is_dir else "FILE",
+            "length": 0 if is_dir else len(self.files[path]),
+            "owner": "alice" if "alice" in path else "hdfs",
+            "group": "hadoop",
+            "permission": "755" if is_dir else "644",
+            "modificationTime": MTIME,
+            "accessTime": MTIME,
+            "blockSize": 134217728,
+            "replication": 0 if is_dir else 3,
+        }
+
+    def _children(self, path: str) -> list[str]:
+        children = {
+            child
+            for child in self.dirs | set(self.files)
+            if child != "/" and posixpath.dirname(child) == path
+        }
+        return sorted(children)
+
+    def _listing(self, path: str) -> list[dict[str, Any]]:
+        if path in self.files:
+            return [self._status(path, "")]
+        return [
+            self._status(child, posixpath.basename(child))
+            for child in self._children(path)
+        ]
+
+    def request(
+        self, method: str, url: str, params: dict[str, Any], **_: Any
+    ) -> FakeResponse:
+        path = _url_path(url)
+        op = params["op"]
+        self.calls.append((op, path))
+        handler = getattr(self, f"_{method}_{op.lower()}", None)
+        if handler is None or (op == "LISTSTATUS_BATCH" and not self.support_batch):
+            return _error(
+                HTTPStatus.BAD_REQUEST,
+                "IllegalArgumentException",
+                f"Invalid value for webhdfs parameter op: {op}",
+            )
+        exists = path in self.dirs or path in self.files
+        if not exists and op not in ("MKDIRS", "CREATE"):
+            return _error(
+                HTTPStatus.NOT_FOUND, "FileNotFoundException", f"{path} not found"
+            )
+        return handler(path, params)  # type: ignore[no-any-return]
+
+    def get(self, url: str, **_: Any) -> FakeResponse:
+        """Datanode side of OPEN and GETFILECHECKSUM."""
+        if urlparse(url).query == "op=GETFILECHECKSUM":
+            data = self.files[_url_path(url)]
+            return FakeResponse(
+                payload={
+                    "FileChecksum": {
+                        "algorithm": "MD5-of-0MD5-of-512CRC32C",
+                        "bytes": hashlib.md5(data).hexdigest(),
+                        "length": 28,
+                    }
+                }
+            )
+        response = FakeResponse()
+        response.raw = io.BytesIO(self.files[_url_path(url)])
+        return response
+
+    def put(self, url: str, data: bytes | Iterable[bytes], **_: Any) -> FakeResponse:
+        """Datanode side of CREATE."""
+        path = _url_path(url)
+        with self._lock:
+            if self.failing_uploads:
+                self.failing_uploads -= 1
+                msg = f"lost connection uploading {path}"
+                raise requests.ConnectionError(msg)
+        chunks = [data] if isinstance(data, bytes) else list(data)
+        with self._lock:
+            self.uploads[path] = [len(chunk) for chunk in chunks]
+            self.add_file(path, b"".join(chunks))
+        return FakeResponse(HTTPStatus.CREATED)
+
+    def _get_open(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        return FakeResponse(
+            HTTPStatus.TEMPORARY_REDIRECT, headers={"location": DATANODE + path}
+        )
+
+    def _get_getfilechecksum(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        return FakeResponse(
+            HTTPStatus.TEMPORARY_REDIRECT,
+            headers={"location": DATANODE + path + "?op=GETFILECHECKSUM"},
+        )
+
+    def _put_create(self, path: str, params: dict[str, Any]) -> FakeResponse:
+        if path in self.files and params.get("overwrite") not in (True, "true"):
+            return _error(
+                HTTPStatus.FORBIDDEN, "FileAlreadyExistsException", f"{path} exists"
+            )
+        return FakeResponse(
+            HTTPStatus.TEMPORARY_REDIRECT, headers={"location": DATANODE + path}
+        )
+
+    def _put_rename(self, path: str, params: dict[str, Any]) -> FakeResponse:
+        destination = params["destination"]
+        if destination in self.dirs:
+            destination = posixpath.join(destination, posixpath.basename(path))
+        if (
+            posixpath.dirname(destination) not in self.dirs
+            or destination in self.dirs
+            or destination in self.files
+        ):
+            return FakeResponse(payload={"boolean": False})
+        for name in [path, *self._descendants(path)]:
+            moved = destination + name[len(path) :]
+            if name in self.files:
+                self.files[moved] = self.files.pop(name)
+            else:
+                self.dirs.discard(name)
+                self.dirs.add(moved)
+        return FakeResponse(payload={"boolean": True})
+
+    def _descendants(self, path: str) -> list[str]:
+        prefix = path.rstrip("/") + "/"
+        return [name for name in self.dirs | set(self.files) if name.startswith(prefix)]
+
+    def _get_getfilestatus(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        return FakeResponse(payload={"FileStatus": self._status(path, "")})
+
+    def _get_liststatus(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        return FakeResponse(
+            payload={"FileStatuses": {"FileStatus": self._listing(path)}}
+        )
+
+    def _get_liststatus_batch(self, path: str, params: dict[str, Any]) -> FakeResponse:
+        listing = self._listing(path)
+        start_after = params.get("startAfter")
+        if start_after is not None:
+            listing = [item for item in listing if item["pathSuffix"] > start_after]
+        page = listing[: self.page_size]
+        return FakeResponse(
+            payload={
+                "DirectoryListing": {
+                    "partialListing": {"FileStatuses": {"FileStatus": page}},
+                    "remainingEntries": len(listing) - len(page),
+                }
+            }
+        )
+
+    def _get_getcontentsummary(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        files = [
+            name
+            for name in self.files
+            if name == path or name.startswith(path.rstrip("/") + "/")
+        ]
+        length = sum(len(self.files[name]) for name in files)
+        return FakeResponse(
+            payload={
+                "ContentSummary": {
+                    "directoryCount": 1,
+                    "fileCount": len(files),
+                    "length": length,
+                    "quota": -1,
+                    "spaceConsumed": 3 * length,
+                    "spaceQuota": -1,
+                }
+            }
+        )
+
+    def _put_mkdirs(self, path: str, _: dict[str, Any]) -> FakeResponse:
+        while path not in self.dirs:
+            self.dirs.add(path)
+            path = posixpath.dirname(path)
+        return FakeResponse(payload={"boolean": True})
+
+    def _delete_delete(self, path: str, params: dict[str, Any]) -> FakeResponse:
+        if path in self.files:
+            del self.files[path]
+            return FakeResponse(payload={"boolean": True})
+        children = self._descendants(path)
+        if children and not params.get("recursive"):
+            return _error(
+                HTTPStatus.FORBIDDEN,
+                "PathIsNotEmptyDirectoryException",
+                f"{path} is non empty",
+            )
+        for name in children:
+            self.files.pop(name, None)
+            self.dirs.discard(name)
+        self.dirs.discard(path)
+        return FakeResponse(payload={"boolean": True})
+
+
+@pytest.fixture()
+def webhdfs() -> FakeWebHDFS:
+    server = FakeWebHDFS()
+    server.add_file("/user/alice/a.txt", b"a" * 10)
+    server.add_file("/user/alice/b.txt", b"b" * 2048)
+    server.add_file("/user/alice/data/c.root", b"c" * 4096)
+    server.add_file("/user/alice/data/d.root", b"d" * 100)
+    server.add_file("/user/bob/e.txt", b"e" * 5)
+    return server
+
+
+HDFS_SITE = """<?xml version="1.0"?>
+<configuration>
+  <property>
+    <name>dfs.namenode.http-address.cluster.nn1</name>
+    <value>namenode1:50070</value>
+  </property>
+  <property>
+    <name>dfs.namenode.http-address.cluster.nn2</name>
+    <value>namenode2:50070</value>
+  </property>
+</configuration>
+"""
+
+
+@pytest.fixture()
+def hdfs_site(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    conf = tmp_path / "hdfs-site.xml"
+    conf.write_text(HDFS_SITE)
+    monkeypatch.setattr("dice_lib.fs._hdfs.CONF", str(conf))
+    clear_client_cache()
+    return conf
+
+
+@pytest.fixture()
+def hdfs(
+    webhdfs: FakeWebHDFS, hdfs_site: Path, monkeypatch: pytest.MonkeyPatch
+) -> HDFS:
+    monkeypatch.setattr("dice_lib.fs._hdfs._shared_session", lambda: webhdfs)
+    assert hdfs_site.exists()
+    return HDFS(user="alice")
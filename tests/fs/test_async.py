@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from dice_lib.fs import HDFS, AsyncFSClient, PosixFileSystem
+from dice_lib.fs._async import AsyncHDFS, ThreadedAsyncFileSystem
+
+from .conftest import FakeWebHDFS, _error
+
+httpx = pytest.importorskip("httpx")
+
+
+def _transport(webhdfs: FakeWebHDFS, standby: set[str] | None = None) -> Any:
+    def handle(request: Any) -> Any:
+        if request.url.host in (standby or set()):
+            response = _error(
+                HTTPStatus.FORBIDDEN, "StandbyException", "Operation not supported"
+            )
+        else:
+            response = webhdfs.request(
+                request.method.lower(), str(request.url), dict(request.url.params)
+            )
+        return httpx.Response(response.status_code, json=response.json())
+
+    return httpx.MockTransport(handle)
+
+
+def _client(
+    config_path: str, webhdfs: FakeWebHDFS, standby: set[str] | None = None
+) -> AsyncFSClient:
+    client = AsyncFSClient(config_path, backend_limits={"Default": 2})
+    client._filesystems["hdfs://"] = AsyncHDFS(
+        asyncio.Semaphore(4), user="alice", transport=_transport(webhdfs, standby)
+    )
+    return client
+
+
+def test_ls_matches_blocking_client(
+    config_path: str, webhdfs: FakeWebHDFS, hdfs: HDFS
+) -> None:
+    async def main() -> Any:
+        async with _client(config_path, webhdfs) as client:
+            listing = await client.ls("/hdfs/user/alice")
+            batches = [
+                batch.name async for batch in client.iter_ls("/hdfs/user/alice", 2)
+            ]
+            return listing, batches
+
+    listing, batches = asyncio.run(main())
+    assert listing.to_list() == hdfs.ls("/user/alice").to_list()
+    assert batches == [
+        ["/user/alice/a.txt", "/user/alice/b.txt"],
+        ["/user/alice/data"],
+    ]
+
+
+@pytest.mark.usefixtures("hdfs_site")
+def test_size_of_paths_mixed_backends(
+    config_path: str, webhdfs: FakeWebHDFS, tmp_path: Path
+) -> None:
+    (tmp_path / "local.txt").write_text("local")
+
+    async def main() -> Any:
+        async with _client(config_path, webhdfs) as client:
+            sizes = await client.size_of_paths(
+                ["/hdfs/user/bob", str(tmp_path), "/hdfs/user/alice/data"]
+            )
+            owners = await client.get_owners(["/hdfs/user/alice/a.txt", "/tmp"])
+            return sizes, owners
+
+    sizes, owners = asyncio.run(main())
+    assert [size[:2] for size in sizes] == [
+        ("/hdfs/user/bob", 15),
+        (str(tmp_path), PosixFileSystem().size_of_path(str(tmp_path))[1]),
+        ("/hdfs/user/alice/data", 3 * (4096 + 100)),
+    ]
+    assert owners == ["alice", "root"]
+
+
+@pytest.mark.usefixtures("hdfs_site")
+def test_standby_namenode_is_skipped(config_path: str, webhdfs: FakeWebHDFS) -> None:
+    async def main() -> list[str]:
+        async with _client(config_path, webhdfs, standby={"namenode1"}) as client:
+            await client.ls("/hdfs/user/alice")
+            hdfs = client._filesystems["hdfs://"]
+            assert isinstance(hdfs, AsyncHDFS)
+            return hdfs.hosts
+
+    assert asyncio.run(main())[0] == "namenode2:50070"
+
+
+def test_local_backend_is_bounded(
+    config_path: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    lock = threading.Lock()
+    running: list[int] = []
+    peak: list[int] = []
+    size_of_paths = PosixFileSystem.size_of_paths
+
+    def slow_size_of_paths(self: PosixFileSystem, paths: list[str]) -> Any:
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+        return size_of_paths(self, paths)
+
+    monkeypatch.setattr(PosixFileSystem, "size_of_paths", slow_size_of_paths)
+
+    async def main() -> None:
+        async with AsyncFSClient(config_path, backend_limits={"Default": 2}) as client:
+            await asyncio.gather(
+                *(client.size_of_paths([str(tmp_path)]) for _ in range(6))
+            )
+            assert isinstance(client._filesystems["Default"], ThreadedAsyncFileSystem)
+
+    asyncio.run(main())
+    assert max(peak) == 2
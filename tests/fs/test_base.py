@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pytest
+
+from dice_lib.fs._base import LS_SCHEMA, LsFormat
+
+
+@pytest.fixture()
+def listing() -> LsFormat:
+    return LsFormat(
+        permissions=["drwxr-xr-x", "-rw-r--r--", "-rw-r--r--"],
+        owner=["alice", "bob", "alice"],
+        group=["users", "users", "admins"],
+        size=[4096, 10, 2048],
+        size_scaled=[4.0, 10.0, 2.0],
+        size_unit=["kB", "B", "kB"],
+        date=[
+            datetime(2023, 1, 1, 12, 0, tzinfo=timezone.utc),
+            datetime(2023, 1, 2, 12, 0, tzinfo=timezone.utc),
+            datetime(2023, 1, 3, 12, 0, 30, tzinfo=timezone.utc),
+        ],
+        name=["a", "b c", "d"],
+    )
+
+
+def test_ls_format_columns(listing: LsFormat) -> None:
+    assert len(listing) == 3
+    assert listing.owner == ["alice", "bob", "alice"]
+    assert listing.size == [4096, 10, 2048]
+    assert listing.name == ["a", "b c", "d"]
+    assert listing.date[2].second == 30
+    assert listing.to_arrow().schema == LS_SCHEMA
+
+
+def test_ls_format_to_pandas(listing: LsFormat) -> None:
+    frame = listing.to_pandas()
+    assert list(frame.columns) == LS_SCHEMA.names
+    assert frame["size"].sum() == 4096 + 10 + 2048
+    assert str(frame["owner"].dtype) == "category"
+
+
+def test_ls_format_to_list(listing: LsFormat) -> None:
+    rows = listing.to_list()
+    assert len(rows) == 3
+    assert rows[1][:6] == ["-rw-r--r--", "bob", "users", 10, 10.0, "B"]
+    assert rows[1][7] == "b c"
+
+
+def test_ls_format_from_arrow_and_concat(listing: LsFormat) -> None:
+    copy = LsFormat.from_arrow(listing.to_arrow())
+    assert copy == listing
+    combined = LsFormat.concat([listing, copy])
+    assert len(combined) == 6
+    assert len(LsFormat.concat([])) == 0
+
+
+def test_ls_format_repr_is_truncated(listing: LsFormat) -> None:
+    big = LsFormat.concat([listing] * 10)
+    text = repr(big)
+    assert "[30 rows x 8 columns]" in text
+    assert "..." in text
+
+
+def test_ls_format_missing_column() -> None:
+    with pytest.raises(ValueError, match="missing columns"):
+        LsFormat(name=["a"])
+
+
+def test_ls_format_epoch_dates() -> None:
+    listing = LsFormat(
+        permissions=["-rw-r--r--"],
+        owner=["alice"],
+        group=["users"],
+        size=[1],
+        size_scaled=[1.0],
+        size_unit=["B"],
+        date=pa.array([1_600_000_000_000], type=pa.timestamp("ms", tz="UTC")),
+        name=["a"],
+    )
+    assert listing.date[0] == datetime.fromtimestamp(1_600_000_000, timezone.utc)
+
+
+def test_ls_format_slice(listing: LsFormat) -> None:
+    assert listing.slice(1).name == ["b c", "d"]
+    assert listing.slice(0, 1).owner == ["alice"]
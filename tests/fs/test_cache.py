@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from dice_lib.fs import HDFS, FSClient, MetadataCache, PosixFileSystem
+from dice_lib.fs._cache import CachedFileSystem
+from dice_lib.fs._progress import Progress
+
+from .conftest import FakeWebHDFS
+
+
+def _ops(webhdfs: FakeWebHDFS, op: str) -> int:
+    return sum(1 for name, _ in webhdfs.calls if name == op)
+
+
+@pytest.fixture()
+def cached_hdfs(hdfs: HDFS) -> CachedFileSystem:
+    return CachedFileSystem(hdfs, MetadataCache())
+
+
+def test_lru_eviction() -> None:
+    cache = MetadataCache(max_entries=2)
+    cache.put("file://", "owner", "/a", "alice")
+    cache.put("file://", "owner", "/b", "bob")
+    assert cache.get("file://", "owner", "/a") == (True, "alice")
+    cache.put("file://", "owner", "/c", "carol")
+    # /b was the least recently used entry
+    assert cache.get("file://", "owner", "/b") == (False, None)
+    assert len(cache) == 2
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.evictions) == (1, 1, 1)
+
+
+def test_per_backend_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("dice_lib.fs._cache.time.monotonic", lambda: now[0])
+    cache = MetadataCache(ttls={"hdfs://": 60.0, "file://": 1.0})
+    cache.put("hdfs://", "owner", "/a", "alice")
+    cache.put("file://", "owner", "/a", "root")
+    now[0] += 30
+    assert cache.get("hdfs://", "owner", "hdfs:///a/") == (True, "alice")
+    assert cache.get("file://", "owner", "/a") == (False, None)
+
+
+def test_metadata_is_cached(
+    cached_hdfs: CachedFileSystem, webhdfs: FakeWebHDFS
+) -> None:
+    for _ in range(3):
+        assert cached_hdfs.get_owner("hdfs:///user/alice/a.txt") == "alice"
+        assert cached_hdfs.status("/user/alice/a.txt").length == 10
+        assert cached_hdfs.size_of_paths(["/user/alice", "/user/bob"])[1][1] == 15
+    assert _ops(webhdfs, "GETFILESTATUS") == 2
+    assert _ops(webhdfs, "GETCONTENTSUMMARY") == 2
+    assert cached_hdfs.cache.stats.hits == 8
+
+
+def test_changes_invalidate_entries(
+    cached_hdfs: CachedFileSystem, webhdfs: FakeWebHDFS
+) -> None:
+    assert cached_hdfs.is_dir("/user/alice/data")
+    assert cached_hdfs.size_of_path("/user/alice")[1] == 3 * 6254
+    assert not cached_hdfs.is_dir("/user/alice/new")
+
+    cached_hdfs.mkdir("/user/alice/new")
+    assert cached_hdfs.is_dir("/user/alice/new")
+
+    cached_hdfs.rm_recursive("/user/alice/data")
+    assert not cached_hdfs.is_dir("/user/alice/data")
+    # the size of the parent is fetched again
+    assert cached_hdfs.size_of_path("/user/alice")[1] == 3 * 2058
+
+    cached_hdfs.move("/user/alice/a.txt", "/user/bob/a.txt")
+    assert cached_hdfs.size_of_path("/user/alice")[1] == 3 * 2048
+    assert _ops(webhdfs, "GETCONTENTSUMMARY") == 3
+
+
+def test_fsclient_cache_is_opt_in(
+    config_path: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    calls: list[list[str]] = []
+    get_owners = PosixFileSystem.get_owners
+
+    def counting_get_owners(self: PosixFileSystem, paths: list[str]) -> list[str]:
+        calls.append(paths)
+        return get_owners(self, paths)
+
+    monkeypatch.setattr(PosixFileSystem, "get_owners", counting_get_owners)
+    paths = [str(tmp_path), "/tmp"]
+    client = FSClient(config_path, metadata_cache=MetadataCache())
+    owners = client.get_owners(paths)
+    assert client.get_owners([*paths, "/var"]) == [*owners, "root"]
+    assert calls == [paths, ["/var"]]
+
+    FSClient(config_path).get_owners(paths)
+    assert len(calls) == 3
+
+
+def test_options_reach_the_wrapped_filesystem(tmp_path: Path) -> None:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    cached = CachedFileSystem(PosixFileSystem(), MetadataCache())
+    copied: list[Progress] = []
+    removed: list[Progress] = []
+
+    cached.copy_recursive(
+        str(tmp_path / "src"), str(tmp_path / "dest"), on_progress=copied.append
+    )
+    assert (tmp_path / "dest" / "a.txt").read_text() == "a"
+    assert copied[-1].files == 1
+
+    progress = cached.rm_recursive(str(tmp_path / "dest"), on_progress=removed.append)
+    assert not (tmp_path / "dest").exists()
+    assert progress is not None
+    assert progress.files == removed[-1].files == 1
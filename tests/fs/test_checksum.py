@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from dice_lib.fs import HDFS, ChecksumCache, FSClient, PosixFileSystem, _checksum
+from dice_lib.fs._checksum import checksum_file
+from dice_lib.fs._hdfs import SERVER_CHECKSUM
+
+from .conftest import FakeWebHDFS
+
+
+@pytest.fixture()
+def files(tmp_path: Path) -> dict[str, bytes]:
+    contents = {}
+    for i in range(12):
+        data = os.urandom(1000 * i + 1)
+        (tmp_path / f"file{i}.dat").write_bytes(data)
+        contents[str(tmp_path / f"file{i}.dat")] = data
+    return contents
+
+
+def _adler32(data: bytes) -> str:
+    return f"{zlib.adler32(data):08x}"
+
+
+@pytest.mark.parametrize("algorithm", ["adler32", "crc32", "md5", "sha256"])
+def test_checksum_file(tmp_path: Path, algorithm: str) -> None:
+    data = os.urandom(3 * 1024 * 1024 + 7)
+    (tmp_path / "data").write_bytes(data)
+    if algorithm == "adler32":
+        expected = _adler32(data)
+    elif algorithm == "crc32":
+        expected = f"{zlib.crc32(data):08x}"
+    else:
+        expected = hashlib.new(algorithm, data).hexdigest()
+    assert checksum_file(str(tmp_path / "data"), algorithm) == expected
+
+
+def test_posix_checksum(files: dict[str, bytes]) -> None:
+    results = dict(PosixFileSystem().checksum(list(files)))
+    assert results == {path: _adler32(data) for path, data in files.items()}
+
+
+def test_checksum_workers_are_not_forked(
+    files: dict[str, bytes], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    start_methods: list[str] = []
+
+    def recording_executor(*args: Any, **kwargs: Any) -> Any:
+        start_methods.append(kwargs["mp_context"].get_start_method())
+        return ProcessPoolExecutor(*args, **kwargs)
+
+    monkeypatch.setattr("dice_lib.fs._checksum.ProcessPoolExecutor", recording_executor)
+    assert len(dict(PosixFileSystem().checksum(list(files)))) == len(files)
+    assert start_methods == [_checksum.MP_START_METHOD]
+    assert _checksum.MP_START_METHOD != "fork"
+
+
+def test_posix_checksum_cache(files: dict[str, bytes], tmp_path: Path) -> None:
+    path = next(iter(files))
+    with ChecksumCache(tmp_path / "checksums.db") as cache:
+        assert dict(PosixFileSystem().checksum([path], "md5", cache)) == {
+            path: hashlib.md5(files[path]).hexdigest()
+        }
+        # same size and mtime: the file is considered unchanged
+        st = Path(path).stat()
+        Path(path).write_bytes(b"x" * st.st_size)
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        assert dict(PosixFileSystem().checksum([path], "md5", cache))[path] == (
+            hashlib.md5(files[path]).hexdigest()
+        )
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        assert dict(PosixFileSystem().checksum([path], "md5", cache))[path] == (
+            hashlib.md5(b"x" * st.st_size).hexdigest()
+        )
+
+
+def test_hdfs_server_checksum(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    results = dict(
+        hdfs.checksum(["hdfs:///user/alice/a.txt", "/user/bob/e.txt"], SERVER_CHECKSUM)
+    )
+    assert results == {
+        "/user/alice/a.txt": hashlib.md5(b"a" * 10).hexdigest(),
+        "/user/bob/e.txt": hashlib.md5(b"e" * 5).hexdigest(),
+    }
+    assert not any(op == "OPEN" for op, _ in webhdfs.calls)
+
+
+def test_hdfs_streamed_checksum_cache(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    paths = ["/user/alice/b.txt", "/user/alice/data/c.root"]
+    cache = ChecksumCache()
+    for _ in range(2):
+        assert dict(hdfs.checksum(paths, cache=cache)) == {
+            path: _adler32(webhdfs.files[path]) for path in paths
+        }
+    assert sum(1 for op, _ in webhdfs.calls if op == "OPEN") == 2
+
+
+def test_fsclient_checksum(config_path: str, files: dict[str, bytes]) -> None:
+    results = dict(FSClient(config_path).checksum(list(files), "md5"))
+    assert results == {
+        path: hashlib.md5(data).hexdigest() for path, data in files.items()
+    }
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import pytest
+import requests
+
+from dice_lib.fs import DavixFileSystem
+
+wsgidav_app = pytest.importorskip("wsgidav.wsgidav_app")
+cheroot_wsgi = pytest.importorskip("cheroot.wsgi")
+
+MiB = 1024 * 1024
+
+
+@pytest.fixture()
+def served(tmp_path: Path) -> Path:
+    root = tmp_path / "se"
+    (root / "alice" / "run" / "deep").mkdir(parents=True)
+    (root / "alice" / "a.txt").write_bytes(b"a" * 10)
+    (root / "alice" / "b file.txt").write_bytes(b"b" * 2048)
+    (root / "alice" / "run" / "c.root").write_bytes(b"c" * 4096)
+    (root / "alice" / "run" / "deep" / "d.root").write_bytes(b"d" * 100)
+    return root
+
+
+@pytest.fixture()
+def base_url(served: Path) -> Iterator[str]:
+    app = wsgidav_app.WsgiDAVApp(
+        {
+            "provider_mapping": {"/": str(served)},
+            "simple_dc": {"user_mapping": {"*": True}},
+            "verbose": 0,
+            "logging": {"enable_loggers": []},
+        }
+    )
+    server = cheroot_wsgi.Server(("127.0.0.1", 0), app)
+    server.prepare()
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield f"dav://127.0.0.1:{server.bind_addr[1]}"
+    server.stop()
+    thread.join()
+
+
+@pytest.fixture()
+def dav(base_url: str) -> Iterator[DavixFileSystem]:
+    # depends on the server only so that it is stopped after the session is closed
+    del base_url
+    fs = DavixFileSystem(verify=False)
+    yield fs
+    # drop the keep-alive connections so the server can stop right away
+    fs.session.close()
+
+
+def test_ls_uses_one_propfind(
+    dav: DavixFileSystem, base_url: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    methods = []
+    request = dav.session.request
+
+    def counting_request(method: str, *args: object, **kwargs: object) -> object:
+        methods.append(method)
+        return request(method, *args, **kwargs)  # type: ignore[arg-type]
+
+    monkeypatch.setattr(dav.session, "request", counting_request)
+    listing = dav.ls(f"{base_url}/alice")
+    host = base_url.split("://")[1]
+    assert sorted(listing.name) == [
+        f"{host}/alice/a.txt",
+        f"{host}/alice/b file.txt",
+        f"{host}/alice/run",
+    ]
+    index = listing.name.index(f"{host}/alice/b file.txt")
+    assert listing.size[index] == 2048
+    assert listing.permissions[listing.name.index(f"{host}/alice/run")][0] == "d"
+    assert methods == ["PROPFIND"]
+    assert dav.ls(f"{base_url}/alice/a.txt").name == [f"{host}/alice/a.txt"]
+
+
+def test_missing_path(dav: DavixFileSystem, base_url: str) -> None:
+    with pytest.raises(FileNotFoundError):
+        dav.ls(f"{base_url}/nobody")
+    assert not dav.is_dir(f"{base_url}/nobody")
+
+
+def test_size_of_paths(dav: DavixFileSystem, base_url: str) -> None:
+    sizes = dav.size_of_paths([f"{base_url}/alice", f"{base_url}/alice/run/c.root"])
+    assert [size[1] for size in sizes] == [10 + 2048 + 4096 + 100, 4096]
+
+
+def test_mkdir_copy_move_rm(dav: DavixFileSystem, base_url: str, served: Path) -> None:
+    dav.mkdir(f"{base_url}/bob/new/dir")
+    assert (served / "bob" / "new" / "dir").is_dir()
+    dav.copy(f"{base_url}/alice/a.txt", f"{base_url}/bob/a.txt")
+    assert (served / "bob" / "a.txt").read_bytes() == b"a" * 10
+    dav.copy_recursive(f"{base_url}/alice/run", f"{base_url}/bob/run")
+    assert (served / "bob" / "run" / "deep" / "d.root").exists()
+    dav.move(f"{base_url}/bob/run", f"{base_url}/bob/moved")
+    assert not (served / "bob" / "run").exists()
+    assert (served / "bob" / "moved" / "c.root").exists()
+    dav.rm(f"{base_url}/bob/a.txt")
+    dav.rm_recursive(f"{base_url}/bob")
+    assert not (served / "bob").exists()
+
+
+def test_mkdir_only_creates_missing_levels(
+    dav: DavixFileSystem,
+    base_url: str,
+    served: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    methods = []
+    request = dav.session.request
+
+    def forbidding_request(method: str, url: str, **kwargs: Any) -> Any:
+        methods.append(method)
+        # like a storage element, MKCOL above the user's own directories is refused
+        if method == "MKCOL" and not url.rstrip("/").endswith("/alice/new"):
+            return SimpleNamespace(status_code=403, raise_for_status=_forbidden)
+        return request(method, url, **kwargs)
+
+    monkeypatch.setattr(dav.session, "request", forbidding_request)
+    dav.mkdir(f"{base_url}/alice/new")
+    assert (served / "alice" / "new").is_dir()
+    assert methods == ["PROPFIND", "PROPFIND", "MKCOL"]
+
+
+def _forbidden() -> None:
+    msg = "403 Forbidden"
+    raise requests.HTTPError(msg)
+
+
+def test_ranged_read_and_write(
+    dav: DavixFileSystem, base_url: str, served: Path
+) -> None:
+    data = os.urandom(3 * MiB + 5)
+    (served / "big.bin").write_bytes(data)
+    chunks = list(dav.read_chunks(f"{base_url}/big.bin", chunk_size=MiB))
+    assert [len(chunk) for chunk in chunks] == [MiB, MiB, MiB, 5]
+    assert b"".join(chunks) == data
+
+    dav.write_chunks(f"{base_url}/copy.bin", iter(chunks))
+    assert (served / "copy.bin").read_bytes() == data
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from dice_lib.fs import HDFS, FSClient, LsFormat, PosixFileSystem
+from dice_lib.fs._base import DEFAULT_LS_BATCH_SIZE
+
+DAY = 24 * 3600
+
+
+@pytest.fixture()
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    for directory in ("a", "a/b", "a/b/c", "skip", "skip/deep"):
+        (root / directory).mkdir(parents=True)
+    sizes = {
+        "small.txt": 10,
+        "a/big.root": 5000,
+        "a/b/medium.root": 1000,
+        "a/b/c/old.root": 3000,
+        "skip/deep/hidden.root": 8000,
+    }
+    for name, size in sizes.items():
+        (root / name).write_bytes(b"x" * size)
+    old = time.time() - 100 * DAY
+    os.utime(root / "a/b/c/old.root", (old, old))
+    (root / "a/link.root").symlink_to(root / "a/big.root")
+    return root
+
+
+def _paths(listings: Iterator[LsFormat], root: Path) -> list[str]:
+    return sorted(
+        os.path.relpath(name, root) for listing in listings for name in listing.name
+    )
+
+
+def test_find_by_name_and_size(tree: Path) -> None:
+    fs = PosixFileSystem()
+    found = fs.find(str(tree), name_glob="*.root", min_size=1000, max_size=5000)
+    assert _paths(found, tree) == ["a/b/c/old.root", "a/b/medium.root", "a/big.root"]
+
+
+def test_find_by_age_type_and_owner(tree: Path) -> None:
+    fs = PosixFileSystem()
+    old = fs.find(str(tree), older_than=timedelta(days=90), type="f")
+    assert _paths(old, tree) == ["a/b/c/old.root"]
+    assert _paths(fs.find(str(tree), type="d"), tree) == [
+        "a",
+        "a/b",
+        "a/b/c",
+        "skip",
+        "skip/deep",
+    ]
+    assert _paths(fs.find(str(tree), type="l"), tree) == ["a/link.root"]
+    owner = (tree / "small.txt").owner()
+    assert len(_paths(fs.find(str(tree), owner=owner), tree)) == 11
+    assert _paths(fs.find(str(tree), owner="nobody-here"), tree) == []
+
+
+def test_find_prunes_subtrees(tree: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    listed: list[str] = []
+    iter_ls = PosixFileSystem.iter_ls
+
+    def recording_iter_ls(
+        self: PosixFileSystem, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        listed.append(os.path.relpath(path, tree))
+        return iter_ls(self, path, batch_size)
+
+    monkeypatch.setattr(PosixFileSystem, "iter_ls", recording_iter_ls)
+    found = PosixFileSystem().find(
+        str(tree), name_glob="*.root", exclude=["skip"], max_depth=3
+    )
+    assert _paths(found, tree) == ["a/b/medium.root", "a/big.root", "a/link.root"]
+    assert sorted(listed) == [".", "a", "a/b"]
+
+
+def test_find_skips_unreadable_directories(
+    tree: Path, monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    iter_ls = PosixFileSystem.iter_ls
+
+    def failing_iter_ls(
+        self: PosixFileSystem, path: str, batch_size: int = DEFAULT_LS_BATCH_SIZE
+    ) -> Iterator[LsFormat]:
+        if path.endswith("/b"):
+            raise PermissionError(path)
+        return iter_ls(self, path, batch_size)
+
+    monkeypatch.setattr(PosixFileSystem, "iter_ls", failing_iter_ls)
+    found = PosixFileSystem().find(str(tree), name_glob="*.root", exclude=["skip"])
+    assert _paths(found, tree) == ["a/big.root", "a/link.root"]
+    assert "Could not read directory" in caplog.text
+
+
+def test_find_max_depth(tree: Path) -> None:
+    fs = PosixFileSystem()
+    top = _paths(fs.find(str(tree), max_depth=1), tree)
+    assert "a" in top
+    assert all("/" not in path for path in top)
+    with pytest.raises(ValueError, match="max_depth must be at least 1"):
+        list(fs.find(str(tree), max_depth=0))
+
+
+def test_find_file(tree: Path) -> None:
+    found = PosixFileSystem().find(str(tree / "a" / "big.root"), min_size=1)
+    assert _paths(found, tree) == ["a/big.root"]
+
+
+def test_find_rejects_unknown_type(tree: Path) -> None:
+    with pytest.raises(ValueError, match="Unknown type"):
+        list(PosixFileSystem().find(str(tree), type="x"))
+
+
+@pytest.mark.usefixtures("webhdfs")
+def test_find_hdfs(hdfs: HDFS) -> None:
+    found = hdfs.find("/user", name_glob="*.root", min_size=1000)
+    assert [name for listing in found for name in listing.name] == [
+        "/user/alice/data/c.root"
+    ]
+    files = hdfs.find("/user", type="f", owner="alice")
+    assert sorted(name for listing in files for name in listing.name) == [
+        "/user/alice/a.txt",
+        "/user/alice/b.txt",
+        "/user/alice/data/c.root",
+        "/user/alice/data/d.root",
+    ]
+
+
+def test_fsclient_find(config_path: str, tree: Path) -> None:
+    found = FSClient(config_path).find(str(tree), name_glob="small*")
+    assert _paths(found, tree) == ["small.txt"]
@@ -1,11 +1,20 @@
 from __future__ import annotations
 
+import hashlib
+from pathlib import Path
 from typing import Any
 
 import pytest
 
 from dice_lib import load_config
-from dice_lib.fs import FSClient, get_mount_settings_from_config, prepare_paths
+from dice_lib.fs import (
+    HDFS,
+    FSClient,
+    MountIndex,
+    PosixFileSystem,
+    get_mount_settings_from_config,
+    prepare_paths,
+)
 
 
 @pytest.mark.parametrize(
@@ -37,6 +46,10 @@ def test_get_mount_settings_from_config(
         ("/storage/user/username", "file:///storage/user/username"),
         ("/software/user/username", "nfs:///software/user/username"),
         ("nfs:///software/user/username", "nfs:///software/user/username"),
+        ("/usersc/username", "nfs:///usersc/username"),
+        ("/hdfs/", "hdfs:///"),
+        ("/hdfsx/user", "/hdfsx/user"),
+        ("/tmp/username", "/tmp/username"),
     ],
 )
 def test_prepare_paths(config_path: str, path: str, expected: str) -> None:
@@ -46,6 +59,22 @@ def test_prepare_paths(config_path: str, path: str, expected: str) -> None:
     assert prepared_paths[0] == expected
 
 
+def test_prepare_paths_longest_prefix() -> None:
+    mount_settings = {
+        "/data": {"protocol": "file://", "remove_mount_for_native_access": False},
+        "/data/hdfs": {"protocol": "hdfs://", "remove_mount_for_native_access": True},
+        "/datax": {"protocol": "nfs://", "remove_mount_for_native_access": False},
+    }
+    paths = ["/data/a", "/data/hdfs/b/", "/data/a", "/datax/c", "/data/hdfsc"]
+    assert prepare_paths(paths, MountIndex(mount_settings)) == [
+        "file:///data/a",
+        "hdfs:///b",
+        "file:///data/a",
+        "nfs:///datax/c",
+        "file:///data/hdfsc",
+    ]
+
+
 @pytest.mark.parametrize(
     ("path", "expected"),
     [
@@ -56,3 +85,69 @@ def test_get_owner(config_path: str, path: str, expected: str) -> None:
     fs = FSClient(config_path)
     owner = fs.get_owner(path)
     assert owner == expected
+
+
+def test_filesystems_are_cached(config_path: str) -> None:
+    fs = FSClient(config_path)
+    assert fs._get_filesystem("file:///tmp") is fs._get_filesystem("file:///other")
+
+
+def test_size_of_paths_mixed_backends(
+    config_path: str, hdfs: HDFS, tmp_path: Path
+) -> None:
+    (tmp_path / "local.txt").write_text("local")
+    fs = FSClient(config_path)
+    fs._filesystems["hdfs://"] = hdfs
+    paths = ["/hdfs/user/bob", str(tmp_path), "/hdfs/user/alice/data"]
+    sizes = fs.size_of_paths(paths)
+    assert [size[0] for size in sizes] == paths
+    assert sizes[0][1] == 15
+    assert sizes[1][1] == PosixFileSystem().size_of_path(str(tmp_path))[1]
+    assert fs.get_owners(["/hdfs/user/alice/a.txt", "/tmp"]) == ["alice", "root"]
+
+
+def test_bulk_delete_mixed_backends_reports_all_failures(
+    config_path: str, hdfs: HDFS, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "local.txt").write_text("local")
+    delete = hdfs.fs.delete
+    monkeypatch.setattr(
+        hdfs.fs,
+        "delete",
+        lambda path, **kwargs: path != "/user/bob" and delete(path, **kwargs),
+    )
+    fs = FSClient(config_path)
+    fs._filesystems["hdfs://"] = hdfs
+    reports: list[int] = []
+    with pytest.raises(OSError, match="Could not remove 1 paths"):
+        fs.bulk_delete(
+            ["/hdfs/user/bob", str(tmp_path / "local.txt"), "/hdfs/user/alice/data"],
+            on_progress=lambda progress: reports.append(progress.files),
+        )
+    # the local file and the other HDFS tree are removed regardless
+    assert not (tmp_path / "local.txt").exists()
+    assert not hdfs.is_dir("/user/alice/data")
+    assert hdfs.is_dir("/user/bob")
+    assert reports[-1] == 3
+
+
+def test_empty_batches(config_path: str) -> None:
+    fs = FSClient(config_path)
+    assert fs.size_of_paths([]) == []
+    assert fs.get_owners([]) == []
+    assert list(fs.checksum([])) == []
+    assert fs.bulk_delete([]).files == 0
+
+
+def test_checksum_mixed_backends_keeps_caller_paths(
+    config_path: str, hdfs: HDFS, tmp_path: Path
+) -> None:
+    (tmp_path / "local.txt").write_bytes(b"local")
+    fs = FSClient(config_path)
+    fs._filesystems["hdfs://"] = hdfs
+    paths = ["/hdfs/user/alice/a.txt", str(tmp_path / "local.txt")]
+    results = dict(fs.checksum(paths, "md5"))
+    assert results == {
+        paths[0]: hashlib.md5(b"a" * 10).hexdigest(),
+        paths[1]: hashlib.md5(b"local").hexdigest(),
+    }
@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pyhdfs
+import pytest
+
+from dice_lib.fs import HDFS, namespace_report
+from dice_lib.fs._hdfs import get_hdfs_client, get_namenodes, iter_fsimage
+from dice_lib.user import UserIndex
+
+from .conftest import MTIME, FakeWebHDFS
+
+
+def test_ls_uses_batched_listing(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    listing = hdfs.ls("hdfs:///user/alice")
+    assert listing.name == [
+        "/user/alice/a.txt",
+        "/user/alice/b.txt",
+        "/user/alice/data",
+    ]
+    assert listing.permissions == ["-rw-r--r--", "-rw-r--r--", "drwxr-xr-x"]
+    assert listing.size == [10, 2048, 0]
+    assert listing.size_unit == ["B", "kB", "B"]
+    assert listing.date[0] == datetime.fromtimestamp(MTIME / 1000, timezone.utc)
+    # two pages, no per-entry GETFILESTATUS
+    assert [op for op, _ in webhdfs.calls] == ["LISTSTATUS_BATCH"] * 2
+
+
+def test_ls_falls_back_to_liststatus(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    webhdfs.support_batch = False
+    listing = hdfs.ls("/user/alice")
+    assert len(listing) == 3
+    assert [op for op, _ in webhdfs.calls] == ["LISTSTATUS_BATCH", "LISTSTATUS"]
+
+
+def test_ls_file(hdfs: HDFS) -> None:
+    listing = hdfs.ls("/user/alice/a.txt")
+    assert listing.name == ["/user/alice/a.txt"]
+    assert listing.owner == ["alice"]
+
+
+def test_size_of_paths(hdfs: HDFS) -> None:
+    sizes = hdfs.size_of_paths(["hdfs:///user/alice/data", "/user/bob"])
+    assert sizes[0][:2] == ("/user/alice/data", 3 * (4096 + 100))
+    assert sizes[1] == ("/user/bob", 15, 15.0, "B")
+
+
+def test_get_owner(hdfs: HDFS) -> None:
+    assert hdfs.get_owner("hdfs:///user/alice/a.txt") == "alice"
+
+
+def test_missing_path(hdfs: HDFS) -> None:
+    with pytest.raises(pyhdfs.HdfsFileNotFoundException):
+        hdfs.ls("/user/nobody")
+
+
+def test_namenodes_are_cached_until_modified(hdfs_site: Path) -> None:
+    assert get_namenodes() == ["namenode1:50070", "namenode2:50070"]
+    hdfs_site.write_text(hdfs_site.read_text().replace("namenode2", "namenode3"))
+    os.utime(hdfs_site, ns=(0, 0))
+    assert get_namenodes() == ["namenode1:50070", "namenode3:50070"]
+
+
+def test_clients_are_shared(hdfs: HDFS) -> None:
+    assert get_hdfs_client("alice") is hdfs.fs
+    assert HDFS(user="alice").fs is hdfs.fs
+    assert get_hdfs_client("bob") is not hdfs.fs
+
+
+def test_new_clients_start_with_active_namenode(hdfs: HDFS) -> None:
+    hdfs.ls("/user/alice")
+    active = hdfs.fs.hosts[0]
+    assert get_hdfs_client("bob").hosts[0] == active
+
+
+def test_size_of_paths_limits_requests_in_flight(
+    hdfs: HDFS, webhdfs: FakeWebHDFS, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    lock = threading.Lock()
+    in_flight = []
+    peak = []
+    request = webhdfs.request
+
+    def slow_request(*args: Any, **kwargs: Any) -> Any:
+        with lock:
+            in_flight.append(1)
+            peak.append(len(in_flight))
+        time.sleep(0.01)
+        with lock:
+            in_flight.pop()
+        return request(*args, **kwargs)
+
+    monkeypatch.setattr(webhdfs, "request", slow_request)
+    hdfs.max_in_flight = 3
+    paths = ["/user/alice", "/user/bob", "/user/alice/data"] * 4
+    sizes = hdfs.size_of_paths(paths)
+    assert [size[0] for size in sizes] == paths
+    assert max(peak) <= 3
+
+
+def test_iter_size_of_paths(hdfs: HDFS) -> None:
+    paths = ["/user/alice", "/user/bob", "/user/alice/data"]
+    sizes = list(hdfs.iter_size_of_paths(paths))
+    assert sorted(sizes) == sorted(hdfs.size_of_paths(paths))
+
+
+def test_iter_ls(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    batches = list(hdfs.iter_ls("/user/alice", batch_size=1))
+    assert [batch.name for batch in batches] == [
+        ["/user/alice/a.txt"],
+        ["/user/alice/b.txt"],
+        ["/user/alice/data"],
+    ]
+    webhdfs.calls.clear()
+    first = next(iter(hdfs.iter_ls("/user/alice", batch_size=2)))
+    assert len(first) == 2
+    assert len(webhdfs.calls) == 1
+
+
+def test_scan_namespace(hdfs: HDFS, tmp_path: Path) -> None:
+    dest = tmp_path / "namespace"
+    hdfs.scan_namespace("hdfs:///user", dest)
+    assert sorted(path.name for path in dest.iterdir()) == [
+        "top_level=alice",
+        "top_level=bob",
+    ]
+    report = namespace_report(dest, by=["owner"]).to_pylist()
+    assert report == [
+        {
+            "owner": "alice",
+            "files": 4,
+            "length": 10 + 2048 + 4096 + 100,
+            "space_consumed": 3 * (10 + 2048 + 4096 + 100),
+        },
+        {"owner": "hdfs", "files": 1, "length": 5, "space_consumed": 15},
+    ]
+    by_dir = namespace_report(dest, by=["top_level", "group"]).to_pylist()
+    assert [(row["top_level"], row["group"]) for row in by_dir] == [
+        ("alice", "hadoop"),
+        ("bob", "hadoop"),
+    ]
+
+
+def test_namespace_report_full_names(
+    hdfs: HDFS, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    (tmp_path / "passwd").write_text("alice:x:1000:1000:Alice Smith,,,:/:/bin/sh\n")
+    index = UserIndex(str(tmp_path / "passwd"), str(tmp_path / "group"))
+    monkeypatch.setattr("dice_lib.fs._hdfs.get_user_index", lambda: index)
+
+    def getpwnam(name: str) -> Any:
+        raise KeyError(name)
+
+    # hdfs is not a local account
+    monkeypatch.setattr("dice_lib.user.pwd.getpwnam", getpwnam)
+    hdfs.scan_namespace("/user", tmp_path / "namespace")
+    report = namespace_report(tmp_path / "namespace", full_names=True)
+    assert report.column_names == [
+        "owner",
+        "full_name",
+        "files",
+        "length",
+        "space_consumed",
+    ]
+    assert report.column("full_name").to_pylist() == ["Alice Smith", "hdfs"]
+
+
+def test_namespace_report_age_buckets(hdfs: HDFS, tmp_path: Path) -> None:
+    hdfs.scan_namespace("/user", tmp_path / "namespace")
+    now = MTIME / 1000 + 100 * 86400
+    report = namespace_report(tmp_path / "namespace", by=["age"], now=now)
+    assert report.to_pylist() == [
+        {"age": "90d-1y", "files": 5, "length": 6259, "space_consumed": 3 * 6259}
+    ]
+
+
+FSIMAGE = """<?xml version="1.0"?>
+<fsimage>
+<INodeSection><lastInodeId>16390</lastInodeId>
+<inode><id>16385</id><type>DIRECTORY</type><name></name><mtime>0</mtime>
+<permission>hdfs:supergroup:0755</permission></inode>
+<inode><id>16386</id><type>DIRECTORY</type><name>user</name><mtime>0</mtime>
+<permission>hdfs:supergroup:0755</permission></inode>
+<inode><id>16387</id><type>DIRECTORY</type><name>alice</name><mtime>0</mtime>
+<permission>alice:users:0755</permission></inode>
+<inode><id>16388</id><type>FILE</type><name>a.root</name><replication>3</replication>
+<mtime>1600000000000</mtime><permission>alice:users:0644</permission>
+<blocks><block><id>1</id><genstamp>1001</genstamp><numBytes>1000</numBytes></block>
+<block><id>2</id><genstamp>1002</genstamp><numBytes>500</numBytes></block></blocks>
+</inode>
+<inode><id>16389</id><type>FILE</type><name>notes.txt</name><replication>2</replication>
+<mtime>1600000000000</mtime><permission>hdfs:supergroup:0644</permission>
+<blocks><block><id>3</id><genstamp>1003</genstamp><numBytes>10</numBytes></block></blocks>
+</inode>
+<inode><id>16390</id><type>FILE</type><name>deleted</name><replication>3</replication>
+<mtime>0</mtime><permission>hdfs:supergroup:0644</permission></inode>
+</INodeSection>
+<INodeDirectorySection>
+<directory><parent>16385</parent><child>16386</child><child>16389</child></directory>
+<directory><parent>16386</parent><child>16387</child></directory>
+<directory><parent>16387</parent><child>16388</child><child>16400</child></directory>
+<directory><parent>16401</parent><child>16390</child></directory>
+</INodeDirectorySection>
+</fsimage>
+"""
+
+
+def test_iter_fsimage(tmp_path: Path) -> None:
+    xml = tmp_path / "fsimage.xml"
+    xml.write_text(FSIMAGE)
+    records = {
+        row["path"]: row
+        for batch in iter_fsimage(xml, batch_size=2)
+        for row in batch.to_pylist()
+    }
+    assert sorted(records) == [
+        "/notes.txt",
+        "/user",
+        "/user/alice",
+        "/user/alice/a.root",
+    ]
+    assert records["/user/alice/a.root"]["owner"] == "alice"
+    assert records["/user/alice/a.root"]["length"] == 1500
+    assert records["/user/alice/a.root"]["space_consumed"] == 4500
+    assert records["/user/alice/a.root"]["top_level"] == "user"
+
+    below_user = [
+        row["path"]
+        for batch in iter_fsimage(xml, root="/user")
+        for row in batch.to_pylist()
+    ]
+    assert sorted(below_user) == ["/user/alice", "/user/alice/a.root"]
+
+
+def test_scan_namespace_from_fsimage(hdfs: HDFS, tmp_path: Path) -> None:
+    xml = tmp_path / "fsimage.xml"
+    xml.write_text(FSIMAGE)
+    hdfs.scan_namespace("/", tmp_path / "namespace", fsimage=xml)
+    report = namespace_report(tmp_path / "namespace", by=["owner"])
+    assert report.column("owner").to_pylist() == ["alice", "hdfs"]
+
+
+def test_move(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    hdfs.move("hdfs:///user/alice/data", "/user/bob/data")
+    assert "/user/bob/data/c.root" in webhdfs.files
+    assert "/user/alice/data" not in webhdfs.dirs
+    # moving into an existing directory keeps the name
+    hdfs.move("/user/alice/a.txt", "/user/bob")
+    assert webhdfs.files["/user/bob/a.txt"] == b"a" * 10
+    assert not any(op in ("OPEN", "CREATE") for op, _ in webhdfs.calls)
+
+
+def test_move_failure(hdfs: HDFS) -> None:
+    with pytest.raises(pyhdfs.HdfsException, match="Could not move"):
+        hdfs.move("/user/alice/a.txt", "/nonexistent/a.txt")
+
+
+def test_copy_streams_chunks(
+    hdfs: HDFS, webhdfs: FakeWebHDFS, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("dice_lib.fs._hdfs.COPY_CHUNK_SIZE", 1000)
+    hdfs.copy("hdfs:///user/alice/data/c.root", "/user/bob/c.root")
+    assert webhdfs.files["/user/bob/c.root"] == webhdfs.files["/user/alice/data/c.root"]
+    assert webhdfs.uploads["/user/bob/c.root"] == [1000] * 4 + [96]
+    hdfs.copy("/user/alice/a.txt", "/user/bob")
+    assert webhdfs.files["/user/bob/a.txt"] == b"a" * 10
+
+
+def test_copy_recursive(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    webhdfs.add_file("/user/alice/data/nested/f.root", b"f" * 20)
+    hdfs.copy_recursive("/user/alice", "/backup", max_transfers=3)
+    for name, data in list(webhdfs.files.items()):
+        if name.startswith("/user/alice/"):
+            assert webhdfs.files["/backup" + name[len("/user/alice") :]] == data
+    # an existing destination directory receives a copy named after the source
+    hdfs.copy_recursive("/user/alice/data", "/backup")
+    assert "/backup/data/nested/f.root" in webhdfs.files
+
+
+def test_copy_recursive_retries(
+    hdfs: HDFS, webhdfs: FakeWebHDFS, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("dice_lib.fs._hdfs.RETRY_DELAY", 0)
+    webhdfs.failing_uploads = 2
+    hdfs.copy_recursive("/user/alice", "/backup", retries=2)
+    assert webhdfs.files["/backup/data/d.root"] == b"d" * 100
+
+    webhdfs.failing_uploads = 100
+    with pytest.raises(pyhdfs.HdfsException, match="Could not copy 4 of 4 files"):
+        hdfs.copy_recursive("/user/alice", "/backup2", retries=1)
+
+
+def test_bulk_delete_dry_run(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    progress = hdfs.bulk_delete(["hdfs:///user/alice", "/user/bob"], dry_run=True)
+    assert (progress.files, progress.bytes) == (5, 10 + 2048 + 4096 + 100 + 5)
+    assert len(webhdfs.files) == 5
+    assert not any(op == "DELETE" for op, _ in webhdfs.calls)
+
+
+def test_bulk_delete(hdfs: HDFS, webhdfs: FakeWebHDFS) -> None:
+    reports: list[int] = []
+    progress = hdfs.bulk_delete(
+        ["/user/alice/data", "/user/bob", "/user/carol"],
+        on_progress=lambda progress: reports.append(progress.files),
+    )
+    assert (progress.files, progress.bytes) == (3, 4096 + 100 + 5)
+    assert reports[-1] == 3
+    assert sorted(webhdfs.files) == ["/user/alice/a.txt", "/user/alice/b.txt"]
+
+
+def test_bulk_delete_failure(hdfs: HDFS, monkeypatch: pytest.MonkeyPatch) -> None:
+    delete = hdfs.fs.delete
+    monkeypatch.setattr(
+        hdfs.fs,
+        "delete",
+        lambda path, **kwargs: path != "/user/bob" and delete(path, **kwargs),
+    )
+    with pytest.raises(pyhdfs.HdfsException, match="Could not remove 1 of 2 paths"):
+        hdfs.bulk_delete(["/user/alice/data", "/user/bob"])
+    assert not hdfs.is_dir("/user/alice/data")
+    assert hdfs.is_dir("/user/bob")
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import os
+import shutil
+import stat
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from dice_lib.fs import PosixFileSystem, _copy
+from dice_lib.fs._du import disk_usage
+from dice_lib.fs._progress import Progress
+
+
+def _du(path: Path) -> int:
+    output = subprocess.run(
+        ["du", "-sx", "-B1", str(path)], check=True, capture_output=True, text=True
+    ).stdout
+    return int(output.split()[0])
+
+
+@pytest.fixture()
+def tree(tmp_path: Path) -> Path:
+    root = tmp_path / "tree"
+    for i in range(3):
+        subdir = root / f"dir{i}" / "nested"
+        subdir.mkdir(parents=True)
+        for j in range(5):
+            (subdir / f"file{j}.dat").write_bytes(os.urandom(1024 * (i + j + 1)))
+    (root / "top.txt").write_text("hello world")
+    (root / "empty").mkdir()
+    os.link(root / "dir0" / "nested" / "file4.dat", root / "hardlink.dat")
+    (root / "symlink").symlink_to(root / "dir1")
+    return root
+
+
+@pytest.mark.skipif(shutil.which("du") is None, reason="du is not available")
+def test_disk_usage_matches_du(tree: Path) -> None:
+    assert disk_usage([str(tree)]) == [_du(tree)]
+
+
+def test_disk_usage_counts_hardlinks_once(tree: Path) -> None:
+    before = disk_usage([str(tree)])[0]
+    os.link(tree / "top.txt", tree / "another_hardlink.txt")
+    assert disk_usage([str(tree)])[0] == before
+
+
+def test_disk_usage_keeps_order(tree: Path) -> None:
+    paths = [str(tree / "dir2"), str(tree / "top.txt"), str(tree / "dir0")]
+    totals = disk_usage(paths, max_workers=2)
+    assert totals == [disk_usage([path])[0] for path in paths]
+
+
+def test_disk_usage_missing_path(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        disk_usage([str(tmp_path / "missing")])
+
+
+def test_size_of_paths(tree: Path) -> None:
+    fs = PosixFileSystem()
+    sizes = fs.size_of_paths([f"file://{tree}", str(tree / "dir1")])
+    assert [size[0] for size in sizes] == [str(tree), str(tree / "dir1")]
+    assert sizes[0][1] == disk_usage([str(tree)])[0]
+    assert sizes[0][3].endswith("B")
+
+
+def test_ls(tree: Path) -> None:
+    (tree / "name with spaces.txt").write_text("spaces")
+    listing = PosixFileSystem().ls(str(tree))
+    assert listing.name == sorted(os.listdir(tree))
+    assert "name with spaces.txt" in listing.name
+    index = listing.name.index("top.txt")
+    st = (tree / "top.txt").stat()
+    assert listing.size[index] == st.st_size
+    assert listing.permissions[index] == stat.filemode(st.st_mode)
+    assert listing.permissions[listing.name.index("symlink")].startswith("l")
+    assert listing.permissions[listing.name.index("empty")].startswith("d")
+    assert listing.date[index].timestamp() == pytest.approx(st.st_mtime, abs=1e-5)
+
+
+def test_ls_file(tree: Path) -> None:
+    listing = PosixFileSystem().ls(str(tree / "top.txt"))
+    assert listing.name == [str(tree / "top.txt")]
+    assert listing.size == [len("hello world")]
+
+
+def test_iter_ls(tree: Path) -> None:
+    fs = PosixFileSystem()
+    batches = list(fs.iter_ls(str(tree), batch_size=2))
+    assert all(len(batch) <= 2 for batch in batches)
+    names = [name for batch in batches for name in batch.name]
+    assert sorted(names) == fs.ls(str(tree)).name
+    # stopping early is fine
+    first = next(iter(fs.iter_ls(str(tree), batch_size=1)))
+    assert len(first) == 1
+
+
+def _snapshot(root: Path) -> dict[str, tuple[int, int, bytes | str]]:
+    """Relative path -> (mode, mtime, content or link target) of a tree."""
+    result: dict[str, tuple[int, int, bytes | str]] = {}
+    for path in sorted(root.rglob("*")):
+        st = path.lstat()
+        if path.is_symlink():
+            content: bytes | str = os.readlink(path)
+        elif path.is_dir():
+            content = b""
+        else:
+            content = path.read_bytes()
+        result[str(path.relative_to(root))] = (st.st_mode, st.st_mtime_ns, content)
+    return result
+
+
+def test_copy_recursive(tree: Path, tmp_path: Path) -> None:
+    (tree / "top.txt").chmod(0o600)
+    os.utime(tree / "dir1", ns=(1_000_000_000, 1_000_000_000))
+    reports: list[Progress] = []
+    fs = PosixFileSystem(max_workers=4)
+    fs.copy_recursive(f"file://{tree}", str(tmp_path / "copy"), reports.append)
+    assert _snapshot(tmp_path / "copy") == _snapshot(tree)
+    progress = reports[-1]
+    assert progress.files == 18
+    assert progress.bytes == sum(
+        path.stat().st_size
+        for path in tree.rglob("*")
+        if path.is_file() and not path.is_symlink()
+    )
+    assert "18 files" in str(progress)
+
+
+def test_copy_recursive_into_existing_directory(tree: Path, tmp_path: Path) -> None:
+    (tmp_path / "backup").mkdir()
+    PosixFileSystem().copy_recursive(str(tree / "dir0"), str(tmp_path / "backup"))
+    assert (tmp_path / "backup" / "dir0" / "nested" / "file0.dat").exists()
+
+
+def test_copy_recursive_again_updates_the_copy(tree: Path, tmp_path: Path) -> None:
+    fs = PosixFileSystem()
+    (tmp_path / "backup").mkdir()
+    fs.copy_recursive(str(tree), str(tmp_path / "backup"))
+    (tree / "top.txt").write_text("changed")
+    fs.copy_recursive(str(tree), str(tmp_path / "backup"))
+    assert _snapshot(tmp_path / "backup" / "tree") == _snapshot(tree)
+
+
+def test_copy_recursive_reports_unreadable_directories(
+    tree: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    scandir = os.scandir
+
+    def failing_scandir(path: str) -> Any:
+        if path.endswith("dir1"):
+            raise PermissionError(path)
+        return scandir(path)
+
+    monkeypatch.setattr(os, "scandir", failing_scandir)
+    with pytest.raises(OSError, match="Could not copy 1 files"):
+        PosixFileSystem().copy_recursive(str(tree), str(tmp_path / "copy"))
+    assert (tmp_path / "copy" / "dir2" / "nested" / "file4.dat").exists()
+    assert not (tmp_path / "copy" / "dir1" / "nested").exists()
+
+
+def test_copy_recursive_reports_failures(
+    tree: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    copy_file = _copy.copy_file
+
+    def failing_copy_file(src: str, dest: str, st: os.stat_result) -> int:
+        if src.endswith("top.txt"):
+            raise PermissionError(src)
+        return copy_file(src, dest, st)
+
+    monkeypatch.setattr(_copy, "copy_file", failing_copy_file)
+    with pytest.raises(OSError, match="Could not copy 1 files"):
+        PosixFileSystem().copy_recursive(str(tree), str(tmp_path / "copy"))
+    assert (tmp_path / "copy" / "dir2" / "nested" / "file4.dat").exists()
+
+
+def test_copy(tree: Path, tmp_path: Path) -> None:
+    fs = PosixFileSystem()
+    fs.copy(str(tree / "top.txt"), str(tmp_path))
+    assert (tmp_path / "top.txt").read_text() == "hello world"
+    assert (tmp_path / "top.txt").stat().st_mtime_ns == (
+        tree / "top.txt"
+    ).stat().st_mtime_ns
+
+
+def test_rm_recursive(tree: Path) -> None:
+    target = tree / "dir1"
+    progress = PosixFileSystem().rm_recursive(str(tree))
+    assert not tree.exists()
+    assert progress.files > 0
+    assert not progress.failed
+    # the symbolic link is removed, not followed
+    assert not target.exists()
+
+
+def test_bulk_delete_dry_run(tree: Path) -> None:
+    reports: list[int] = []
+    progress = PosixFileSystem(max_workers=2).bulk_delete(
+        [str(tree / "dir0"), str(tree / "top.txt")],
+        dry_run=True,
+        on_progress=lambda progress: reports.append(progress.files),
+    )
+    assert (progress.files, progress.bytes) == (6, 15 * 1024 + 11)
+    assert reports[-1] == 6
+    assert (tree / "dir0" / "nested" / "file0.dat").exists()
+    assert (tree / "top.txt").exists()
+
+
+def test_bulk_delete(tree: Path) -> None:
+    progress = PosixFileSystem().bulk_delete(
+        [str(tree / "dir0"), str(tree / "dir2"), str(tree / "missing")]
+    )
+    assert (progress.files, progress.bytes) == (10, 15 * 1024 + 25 * 1024)
+    assert sorted(path.name for path in tree.iterdir()) == [
+        "dir1",
+        "empty",
+        "hardlink.dat",
+        "symlink",
+        "top.txt",
+    ]
+
+
+def test_bulk_delete_reports_failures(
+    tree: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    unlink = os.unlink
+
+    def failing_unlink(path: str | os.PathLike[str]) -> None:
+        if os.fspath(path).endswith("file2.dat"):
+            raise PermissionError(path)
+        unlink(path)
+
+    monkeypatch.setattr(os, "unlink", failing_unlink)
+    # the files, the directories above them and the root cannot be removed
+    with pytest.raises(OSError, match="Could not remove 10 paths"):
+        PosixFileSystem().bulk_delete([str(tree)])
+    assert sorted(path.name for path in tree.rglob("*")) == [
+        "dir0",
+        "dir1",
+        "dir2",
+        "file2.dat",
+        "file2.dat",
+        "file2.dat",
+        "nested",
+        "nested",
+        "nested",
+    ]
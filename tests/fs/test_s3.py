@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from typing import Any, Iterator
+
+import pytest
+
+from dice_lib.fs import ChecksumCache, FSClient, S3FileSystem
+from dice_lib.fs._s3 import _iter_parts, clear_client_cache
+
+moto = pytest.importorskip("moto")
+
+MiB = 1024 * 1024
+
+
+@pytest.fixture()
+def s3(monkeypatch: pytest.MonkeyPatch) -> Iterator[S3FileSystem]:
+    for name, value in {
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+    }.items():
+        monkeypatch.setenv(name, value)
+    clear_client_cache()
+    with moto.mock_aws():
+        fs = S3FileSystem()
+        fs.mkdir("s3://data")
+        for key, size in {
+            "alice/a.txt": 10,
+            "alice/b.txt": 2048,
+            "alice/run/c.root": 4096,
+            "bob/d.txt": 5,
+        }.items():
+            fs.client.put_object(Bucket="data", Key=key, Body=b"x" * size)
+        yield fs
+    clear_client_cache()
+
+
+def test_ls(s3: S3FileSystem) -> None:
+    listing = s3.ls("s3://data/alice")
+    assert listing.name == ["data/alice/run", "data/alice/a.txt", "data/alice/b.txt"]
+    assert listing.permissions[0].startswith("d")
+    assert listing.size == [0, 10, 2048]
+    assert s3.ls("s3://data/alice/a.txt").name == ["data/alice/a.txt"]
+    with pytest.raises(FileNotFoundError):
+        s3.ls("s3://data/nobody")
+
+
+def test_iter_ls_paginates(s3: S3FileSystem) -> None:
+    for i in range(1005):
+        s3.client.put_object(Bucket="data", Key=f"many/{i:04d}", Body=b"")
+    batches = list(s3.iter_ls("s3://data/many", batch_size=600))
+    assert [len(batch) for batch in batches] == [600, 400, 5]
+
+
+def test_size_of_paths(s3: S3FileSystem) -> None:
+    sizes = s3.size_of_paths(["s3://data/alice", "s3://data/bob/d.txt", "s3://data"])
+    assert [size[1] for size in sizes] == [10 + 2048 + 4096, 5, 10 + 2048 + 4096 + 5]
+    # alice is a prefix of the key, not of the directory
+    s3.client.put_object(Bucket="data", Key="alice2/x", Body=b"x")
+    assert s3.size_of_path("s3://data/alice")[1] == 10 + 2048 + 4096
+    # an object and a directory can share a name
+    s3.client.put_object(Bucket="data", Key="alice", Body=b"x" * 7)
+    assert s3.size_of_path("s3://data/alice")[1] == 7 + 10 + 2048 + 4096
+
+
+def test_is_dir_and_mkdir(s3: S3FileSystem) -> None:
+    assert s3.is_dir("s3://data/alice")
+    assert not s3.is_dir("s3://data/alice/a.txt")
+    s3.mkdir("s3://data/empty")
+    assert s3.is_dir("s3://data/empty")
+    assert len(s3.ls("s3://data/empty")) == 0
+
+
+def test_multipart_round_trip(
+    s3: S3FileSystem, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr("dice_lib.fs._s3.MULTIPART_THRESHOLD", 5 * MiB)
+    monkeypatch.setattr("dice_lib.fs._s3.MULTIPART_CHUNKSIZE", 5 * MiB)
+    data = os.urandom(11 * MiB + 3)
+    chunks = (data[i : i + MiB] for i in range(0, len(data), MiB))
+    s3.write_chunks("s3://data/big.bin", chunks)
+    head = s3.client.head_object(Bucket="data", Key="big.bin")
+    # three parts were uploaded
+    assert head["ETag"].endswith('-3"')
+    assert b"".join(s3.read_chunks("s3://data/big.bin", chunk_size=2 * MiB)) == data
+
+
+def test_part_size_grows_with_the_number_of_parts() -> None:
+    parts = _iter_parts((b"x" for _ in range(100)), 4, grow_every=3)
+    assert [len(part) for part in parts] == [4, 4, 4, 8, 8, 8, 16, 16, 16, 16]
+
+
+def test_missing_boto3(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("dice_lib.fs._s3.boto3", None)
+    with pytest.raises(ImportError, match=r"dice-lib\[s3\]"):
+        S3FileSystem()
+
+
+def test_small_write_is_a_single_put(s3: S3FileSystem) -> None:
+    s3.write_chunks("s3://data/small.txt", [b"hello ", b"world"])
+    assert b"".join(s3.read_chunks("s3://data/small.txt")) == b"hello world"
+
+
+def test_rm_recursive_reports_undeleted_keys(
+    s3: S3FileSystem, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    delete_objects = s3.client.delete_objects
+
+    def partial_delete(Bucket: str, Delete: dict[str, Any]) -> dict[str, Any]:
+        kept = [obj for obj in Delete["Objects"] if obj["Key"].endswith("b.txt")]
+        removed = [obj for obj in Delete["Objects"] if obj not in kept]
+        delete_objects(Bucket=Bucket, Delete={"Objects": removed})
+        return {
+            "Errors": [
+                {"Key": obj["Key"], "Code": "AccessDenied", "Message": "Access Denied"}
+                for obj in kept
+            ]
+        }
+
+    monkeypatch.setattr(s3.client, "delete_objects", partial_delete)
+    with pytest.raises(OSError, match="Could not remove 1 objects .*alice/b.txt"):
+        s3.move("s3://data/alice", "s3://data/moved")
+    assert s3.ls("s3://data/alice").name == ["data/alice/b.txt"]
+
+
+def test_checksum_cache(s3: S3FileSystem, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = "s3://data/alice/b.txt"
+    with ChecksumCache() as cache:
+        expected = dict(s3.checksum([path], "md5", cache))
+        assert expected == {path: hashlib.md5(b"x" * 2048).hexdigest()}
+
+        def read_chunks(*_: object) -> None:
+            msg = "the object should not be read again"
+            raise AssertionError(msg)
+
+        monkeypatch.setattr(s3, "read_chunks", read_chunks)
+        assert dict(s3.checksum([path], "md5", cache)) == expected
+
+
+def test_copy_move_rm(s3: S3FileSystem) -> None:
+    s3.copy_recursive("s3://data/alice", "s3://data/backup")
+    assert s3.size_of_path("s3://data/backup")[1] == 10 + 2048 + 4096
+    s3.move("s3://data/backup", "s3://data/moved")
+    assert s3.size_of_path("s3://data/backup")[1] == 0
+    assert s3.ls("s3://data/moved/run").name == ["data/moved/run/c.root"]
+    s3.rm("s3://data/moved/a.txt")
+    s3.rm_recursive("s3://data/moved")
+    assert s3.size_of_path("s3://data/moved")[1] == 0
+    assert s3.size_of_path("s3://data/alice")[1] == 10 + 2048 + 4096
+
+
+@pytest.mark.usefixtures("s3")
+def test_fsclient(config_path: str) -> None:
+    fs = FSClient(config_path)
+    assert isinstance(fs._get_filesystem("s3://data"), S3FileSystem)
+    sizes = fs.size_of_paths(["s3://data/bob", "s3://data/alice/run"])
+    assert [size[1] for size in sizes] == [5, 4096]
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterator
+
+import pytest
+
+from dice_lib.fs import HDFS, FSClient, Progress
+from dice_lib.fs._transfer import prefetch
+
+from .conftest import FakeWebHDFS
+
+
+@pytest.fixture()
+def client(config_path: str, hdfs: HDFS) -> FSClient:
+    fs = FSClient(config_path)
+    fs._filesystems["hdfs://"] = hdfs
+    return fs
+
+
+@pytest.fixture()
+def local_tree(tmp_path: Path) -> Path:
+    root = tmp_path / "results"
+    (root / "run1").mkdir(parents=True)
+    (root / "run2" / "logs").mkdir(parents=True)
+    (root / "run1" / "out.root").write_bytes(os.urandom(3000))
+    (root / "run2" / "out.root").write_bytes(os.urandom(5000))
+    (root / "run2" / "logs" / "job.log").write_text("done")
+    return root
+
+
+def test_prefetch_keeps_order() -> None:
+    released = threading.Event()
+
+    def chunks() -> Iterator[bytes]:
+        for i in range(5):
+            yield bytes([i])
+        released.set()
+
+    stream = prefetch(chunks(), buffers=2)
+    assert next(stream) == b"\x00"
+    assert list(stream) == [bytes([i]) for i in range(1, 5)]
+    assert released.is_set()
+
+
+def test_prefetch_raises_producer_errors() -> None:
+    def chunks() -> Iterator[bytes]:
+        yield b"a"
+        msg = "disk on fire"
+        raise OSError(msg)
+
+    stream = prefetch(chunks())
+    assert next(stream) == b"a"
+    with pytest.raises(OSError, match="disk on fire"):
+        next(stream)
+
+
+def test_prefetch_stops_producer_early() -> None:
+    closed = threading.Event()
+
+    def chunks() -> Iterator[bytes]:
+        try:
+            while True:
+                yield b"x"
+        finally:
+            closed.set()
+
+    stream = prefetch(chunks())
+    next(stream)
+    stream.close()  # type: ignore[attr-defined]
+    assert closed.is_set()
+
+
+def test_transfer_local_to_hdfs_and_back(
+    client: FSClient, webhdfs: FakeWebHDFS, local_tree: Path, tmp_path: Path
+) -> None:
+    reports: list[Progress] = []
+    progress = client.transfer(
+        str(local_tree),
+        "/hdfs/user/alice",
+        checksum="md5",
+        chunk_size=1024,
+        on_progress=reports.append,
+    )
+    assert progress.files == 3
+    assert progress.bytes == 3000 + 5000 + 4
+    assert reports[-1] is progress
+    uploaded = webhdfs.files["/user/alice/results/run2/out.root"]
+    assert uploaded == (local_tree / "run2" / "out.root").read_bytes()
+    assert webhdfs.uploads["/user/alice/results/run2/out.root"][0] == 1024
+
+    client.transfer("/hdfs/user/alice/results", str(tmp_path / "back"))
+    for path in local_tree.rglob("*"):
+        copy = tmp_path / "back" / path.relative_to(local_tree)
+        assert (
+            copy.is_dir() if path.is_dir() else copy.read_bytes() == path.read_bytes()
+        )
+
+
+def test_transfer_single_file(client: FSClient, webhdfs: FakeWebHDFS) -> None:
+    client.transfer("/hdfs/user/alice/a.txt", "/hdfs/user/bob")
+    assert webhdfs.files["/user/bob/a.txt"] == b"a" * 10
+
+
+def test_transfer_detects_checksum_mismatch(
+    client: FSClient,
+    webhdfs: FakeWebHDFS,
+    local_tree: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    put = webhdfs.put
+
+    def corrupting_put(url: str, data: Any, **kwargs: Any) -> Any:
+        response = put(url, data, **kwargs)
+        if url.endswith("job.log"):
+            webhdfs.files["/user/alice/results/run2/logs/job.log"] = b"dome"
+        return response
+
+    monkeypatch.setattr(webhdfs, "put", corrupting_put)
+    with pytest.raises(OSError, match="Could not transfer 1 files"):
+        client.transfer(str(local_tree), "/hdfs/user/alice", checksum="md5")
+    assert "/user/alice/results/run1/out.root" in webhdfs.files
+
+
+def test_transfer_verifies_adler32(
+    client: FSClient, webhdfs: FakeWebHDFS, local_tree: Path
+) -> None:
+    progress = client.transfer(str(local_tree), "/hdfs/user/alice", checksum="adler32")
+    assert progress.files == 3
+    assert not progress.failed
+    assert "/user/alice/results/run2/logs/job.log" in webhdfs.files
+
+
+def test_transfer_rejects_unknown_checksum(
+    client: FSClient, webhdfs: FakeWebHDFS, local_tree: Path
+) -> None:
+    with pytest.raises(ValueError, match="unsupported hash type"):
+        client.transfer(str(local_tree), "/hdfs/user/alice", checksum="nope")
+    assert not any(op == "MKDIRS" for op, _ in webhdfs.calls)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import inspect
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from dice_lib.fs import FSClient, MountIndex, UsageIndex
+from dice_lib.fs._du import disk_usage
+
+
+def _bytes(index: UsageIndex, path: Path) -> int:
+    usage = index.usage(str(path))
+    assert usage is not None
+    return usage[0]
+
+
+def _touch(path: Path, size: int) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(os.urandom(size))
+
+
+@pytest.fixture()
+def mount(tmp_path: Path) -> Path:
+    root = tmp_path / "storage"
+    for user in ("alice", "bob"):
+        for i in range(3):
+            _touch(root / user / f"project{i}" / "data.bin", 4096 * (i + 1))
+    return root
+
+
+def test_update_matches_du(mount: Path, tmp_path: Path) -> None:
+    with UsageIndex.for_mount(str(mount), tmp_path / "index") as index:
+        stats = index.update()
+        assert stats.scanned == 9
+        assert index.usage(str(mount)) == (disk_usage([str(mount)])[0], 14)
+        assert _bytes(index, mount / "alice") == disk_usage([str(mount / "alice")])[0]
+        assert index.usage(str(mount / "missing")) is None
+
+
+def test_update_only_rescans_changed_directories(mount: Path, tmp_path: Path) -> None:
+    with UsageIndex.for_mount(str(mount), tmp_path / "index") as index:
+        index.update()
+        _touch(mount / "bob" / "project1" / "more.bin", 8192)
+        shutil.rmtree(mount / "alice" / "project2")
+        stats = index.update()
+        assert stats.scanned == 2
+        assert stats.removed == 1
+        assert _bytes(index, mount) == disk_usage([str(mount)])[0]
+        assert index.usage(str(mount / "alice" / "project2")) is None
+        assert index.update(full=True).scanned == 8
+
+
+def test_update_deeper_than_recursion_limit(tmp_path: Path) -> None:
+    root = path = tmp_path / "deep"
+    depth = 200
+    for _ in range(depth):
+        path = path / "d"
+    path.mkdir(parents=True)
+    limit = sys.getrecursionlimit()
+    # leaves room for the update itself, but not for a frame per directory level
+    sys.setrecursionlimit(len(inspect.stack()) + depth // 2)
+    try:
+        with UsageIndex.for_mount(str(root), tmp_path / "index") as index:
+            assert index.update().scanned == depth + 1
+            usage = index.usage(str(root))
+    finally:
+        sys.setrecursionlimit(limit)
+    assert usage is not None
+    assert usage[1] == depth
+
+
+def test_index_is_persistent(mount: Path, tmp_path: Path) -> None:
+    with UsageIndex.for_mount(str(mount), tmp_path / "index") as index:
+        index.update()
+    with UsageIndex.for_mount(str(mount), tmp_path / "index") as index:
+        assert index.update().scanned == 0
+        assert index.usage(str(mount / "bob")) is not None
+
+
+def test_fsclient_size_of_paths_from_index(
+    config_path: str, mount: Path, tmp_path: Path
+) -> None:
+    fs = FSClient(config_path, usage_index_dir=str(tmp_path / "index"))
+    fs.mount_settings = {
+        str(mount): {"protocol": "file://", "remove_mount_for_native_access": False}
+    }
+    fs.mount_index = MountIndex(fs.mount_settings)
+    fs.update_usage_index()
+    _touch(mount / "alice" / "new.bin", 4096)
+    paths = [str(mount / "alice"), str(tmp_path)]
+    indexed, live = fs.size_of_paths(paths, from_index=True)
+    assert indexed[0] == str(mount / "alice")
+    # answered from the index, so the new file is not included yet
+    assert indexed[1] < disk_usage([str(mount / "alice")])[0]
+    assert live[1] == disk_usage([str(tmp_path)])[0]
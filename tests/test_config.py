@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import dataclasses
 from pathlib import Path
+from unittest import mock
 
+import pytest
 from omegaconf import OmegaConf
 
 import dice_lib._config as config
@@ -165,3 +168,40 @@ def test_full_config(config_path: str) -> None:
     assert len(merged_cfg.computing_grid.computing_elements) == 2
     assert len(merged_cfg.site_info.supported_vos) == 13
     assert merged_cfg.node_info.owner == "ME"
+
+
+def test_load_config_is_cached(config_path: str, tmp_path: Path) -> None:
+    path = tmp_path / "config.yaml"
+    path.write_text(Path(config_path).read_text())
+    first = config.load_config(str(path))
+    assert config.load_config(str(path)) is first
+    assert config.load_config(str(path), use_cache=False) is not first
+    # any edit changes the size or mtime of the file
+    path.write_text(path.read_text().replace("ME", "YOU"))
+    reloaded = config.load_config(str(path))
+    assert reloaded is not first
+    assert reloaded.node_info.owner == "YOU"
+
+
+def test_load_config_view(config_path: str) -> None:
+    view = config.load_config_view(config_path)
+    assert isinstance(view, config.DiceConfig)
+    assert view.computing_grid.site_name == "UKI-SOUTHGRID-BRIS-HEP"
+    assert view.login_nodes[0].status is config.ServerStatus.ONLINE
+    assert config.load_config_view(config_path) is view
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        view.cluster_name = "other"  # type: ignore[misc]
+
+
+def test_load_config_view_disk_cache(config_path: str, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    config.clear_config_cache()
+    view = config.load_config_view(config_path, cache_dir=cache_dir)
+    assert len(list(cache_dir.glob("dice-config-*.pickle"))) == 1
+    config.clear_config_cache()
+    # a new process would read the pickle instead of the YAML file
+    with mock.patch("omegaconf.OmegaConf.load") as load:
+        cached = config.load_config_view(config_path, cache_dir=cache_dir)
+    load.assert_not_called()
+    assert cached == view
+    assert cached is not view
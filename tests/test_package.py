@@ -1,7 +1,64 @@
 from __future__ import annotations
 
+import subprocess
+import sys
+
+import pytest
+
 import dice_lib as m
 
+# seconds a fresh interpreter may spend importing a module, generous for slow CI machines
+IMPORT_TIME_BUDGETS = {"dice_lib": 0.25, "dice_lib.fs": 0.6, "dice_lib.units": 0.25}
+# third-party packages that are only imported when the code needing them is used
+HEAVY_MODULES = (
+    "bs4",
+    "boto3",
+    "httpx",
+    "numpy",
+    "omegaconf",
+    "pandas",
+    "plumbum",
+    "pyarrow",
+    "pyhdfs",
+    "requests",
+)
+# heavy modules that are needed at import time, listings are Arrow tables
+REQUIRED_HEAVY_MODULES = {"dice_lib.fs": {"numpy", "pyarrow"}}
+
+IMPORT_CHECK = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start)
+print(" ".join(name for name in {heavy!r} if name in sys.modules))
+"""
+
+
+def _import_in_subprocess(module: str) -> tuple[float, list[str]]:
+    """Returns the import time and the heavy modules loaded by a fresh interpreter."""
+    code = IMPORT_CHECK.format(module=module, heavy=HEAVY_MODULES)
+    # the first run warms up the bytecode and file system caches
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, capture_output=True, text=True
+    ).stdout.splitlines()
+    return float(output[0]), output[1].split() if len(output) > 1 else []
+
 
 def test_version() -> None:
     assert m.__version__
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_TIME_BUDGETS))
+def test_import_is_lazy(module: str) -> None:
+    seconds, loaded = _import_in_subprocess(module)
+    assert set(loaded) <= REQUIRED_HEAVY_MODULES.get(module, set())
+    assert seconds < IMPORT_TIME_BUDGETS[module]
+
+
+def test_lazy_attributes() -> None:
+    assert m.load_config is m._config.load_config
+    assert m.fs.FACTORIES["file://"] is m.fs.PosixFileSystem
+    assert set(m.__all__) <= set(dir(m))
+    with pytest.raises(AttributeError):
+        m.no_such_attribute  # noqa: B018
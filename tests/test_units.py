@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from dice_lib.units import convert_to_largest_unit, convert_to_largest_unit_array
+
+
+@pytest.mark.parametrize(
+    ("value", "scale", "expected"),
+    [
+        (1.0, 1000.0, (1.0, "m")),
+        (231234.0, 1000.0, (231.234, "km")),
+        (1024.0, 1024.0, (1.0, "km")),
+        (1023.0, 1024.0, (1023.0, "m")),
+    ],
+)
+def test_convert_to_largest_unit(
+    value: float, scale: float, expected: tuple[float, str]
+) -> None:
+    scaled, unit = convert_to_largest_unit(value, "m", scale=scale)
+    assert scaled == pytest.approx(expected[0])
+    assert unit == expected[1]
+
+
+@pytest.mark.parametrize("scale", [1000.0, 1024.0])
+def test_convert_to_largest_unit_array_matches_scalar(scale: float) -> None:
+    values = [0, 1, 999, 1000, 1023, 1024, 1025, 10**6, 1024**3, 3 * 1024**4 - 1]
+    values += [int(scale**power) for power in range(1, 8)]
+    values += [int(scale**power) - 1 for power in range(1, 8)]
+    scaled, units = convert_to_largest_unit_array(values, "B", scale=scale)
+    expected = [convert_to_largest_unit(value, "B", scale=scale) for value in values]
+    assert scaled.tolist() == pytest.approx([item[0] for item in expected])
+    assert units.to_pylist() == [item[1] for item in expected]
+
+
+def test_convert_to_largest_unit_array_inputs() -> None:
+    sizes = pa.array([1, 2048, 3 * 1024**3], type=pa.int64())
+    scaled, units = convert_to_largest_unit_array(sizes, "B", scale=1024)
+    assert scaled.tolist() == [1.0, 2.0, 3.0]
+    assert units.to_pylist() == ["B", "kB", "GB"]
+    scaled, units = convert_to_largest_unit_array(np.array([]), "B")
+    assert len(scaled) == 0
+    assert len(units) == 0
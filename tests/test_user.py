@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from dice_lib import user
+from dice_lib.user import UserIndex
+
+PASSWD = """root:x:0:0:root:/root:/bin/bash
+jdoe:x:1000:1000:Jane Doe,,,:/home/jdoe:/bin/bash
+svc:x:1001:1001::/srv:/usr/sbin/nologin
+"""
+GROUP = """root:x:0:
+jdoe:x:1000:
+physics:x:2000:jdoe
+"""
+
+
+@pytest.fixture()
+def lookups(monkeypatch: pytest.MonkeyPatch) -> list[int | str]:
+    """Records the NSS lookups, which find nothing."""
+    lookups: list[int | str] = []
+
+    def getpwuid(uid: int) -> None:
+        lookups.append(uid)
+        raise KeyError(uid)
+
+    def getpwnam(name: str) -> None:
+        lookups.append(name)
+        raise KeyError(name)
+
+    monkeypatch.setattr("dice_lib.user.pwd.getpwuid", getpwuid)
+    monkeypatch.setattr("dice_lib.user.pwd.getpwnam", getpwnam)
+    return lookups
+
+
+@pytest.fixture()
+def index(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> UserIndex:
+    (tmp_path / "passwd").write_text(PASSWD)
+    (tmp_path / "group").write_text(GROUP)
+    monkeypatch.setattr(user, "MTIME_CHECK_INTERVAL", 0.0)
+    return UserIndex(str(tmp_path / "passwd"), str(tmp_path / "group"))
+
+
+def test_names_from_local_files(index: UserIndex, lookups: list[int | str]) -> None:
+    assert index.user_names([1000, 0, 1000]) == ["jdoe", "root", "jdoe"]
+    assert index.group_names([2000, 1000]) == ["physics", "jdoe"]
+    assert index.full_names(["jdoe", "svc"]) == ["Jane Doe", "svc"]
+    assert lookups == []
+
+
+def test_unknown_ids_are_looked_up_once(
+    index: UserIndex, lookups: list[int | str]
+) -> None:
+    assert index.user_names([4242, 4242]) == ["4242", "4242"]
+    assert index.user_names([4242], default="unknown") == ["unknown"]
+    assert index.full_names(["nobody", "nobody"]) == ["nobody", "nobody"]
+    assert lookups == [4242, "nobody"]
+
+
+@pytest.mark.usefixtures("lookups")
+def test_index_is_rebuilt_when_files_change(index: UserIndex) -> None:
+    assert index.user_names([1002]) == ["1002"]
+    passwd = Path(index.passwd)
+    with passwd.open("a", encoding="utf-8") as f:
+        f.write("new:x:1002:1002:New User:/home/new:/bin/bash\n")
+    stat = passwd.stat()
+    os.utime(passwd, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert index.user_names([1002]) == ["new"]
+    assert index.full_names(["new"]) == ["New User"]
+
+
+def test_index_expires(
+    index: UserIndex, lookups: list[int | str], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    now = [1000.0]
+    monkeypatch.setattr("dice_lib.user.time.monotonic", lambda: now[0])
+    index.user_names([4242])
+    now[0] += index.ttl / 2
+    index.user_names([4242])
+    now[0] += index.ttl
+    index.user_names([4242])
+    assert lookups == [4242, 4242]
+
+
+def test_get_owners(tmp_path: Path) -> None:
+    (tmp_path / "file").touch()
+    owners = user.get_owners([str(tmp_path), str(tmp_path / "file")])
+    assert owners == [(tmp_path / "file").owner()] * 2